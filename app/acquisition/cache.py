@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger("LocalQuantAgent")
+
+class FetchCache:
+    """
+    On-disk cache of fetched provider results.
+
+    Entries are keyed by a hash of (provider, symbol, request parameters) and stored as
+    Parquet files under <root>/objects/, with a SQLite index tracking size and access times.
+    - TTLs are looked up per "provider:symbol", then per provider, then 'default_ttl' (seconds).
+    - When the cache grows beyond 'max_bytes', least recently used entries are evicted.
+    - In 'offline' mode expired entries are still served and misses never hit the network
+      (fetchers return an empty DataFrame instead), for reproducible re-runs.
+    """
+    def __init__(self, root, max_bytes: int = 1024 ** 3, default_ttl: float = 86400, ttls: dict = None,
+                 offline: bool = False):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.default_ttl = float(default_ttl)
+        self.ttls = ttls or {}
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, provider TEXT, symbol TEXT, size INTEGER, created REAL, last_access REAL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def make_key(provider: str, symbol: str, **params) -> str:
+        payload = json.dumps({"provider": provider, "symbol": symbol, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / f"{key}.parquet"
+
+    def ttl_for(self, provider: str, symbol: str) -> float:
+        ttl = self.ttls.get(f"{provider}:{symbol}", self.ttls.get(provider, self.default_ttl))
+        return float(ttl)
+
+    def get(self, provider: str, symbol: str, **params):
+        """
+        Returns the cached DataFrame, or None on a miss (or an expired entry when online).
+        """
+        key = self.make_key(provider, symbol, **params)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT created FROM entries WHERE key = ?", (key,)).fetchone()
+            expired = row is not None and now - row[0] > self.ttl_for(provider, symbol)
+            if row is None or (expired and not self.offline):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+
+        try:
+            df = pd.read_parquet(self._path(key))
+        except Exception as e:
+            logger.warning(f"Cache entry for {provider}:{symbol} is unreadable, dropping it: {e}")
+            self._remove(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        logger.debug("Cache hit for %s:%s%s.", provider, symbol, " (expired, offline mode)" if expired else "")
+        return df
+
+    def put(self, provider: str, symbol: str, df: pd.DataFrame, **params):
+        """
+        Stores a non-empty DataFrame (index included), then evicts LRU entries if over the size cap.
+        """
+        if df is None or df.empty:
+            return
+        key = self.make_key(provider, symbol, **params)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            df.to_parquet(tmp_path, index=True, engine='pyarrow')
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not cache {provider}:{symbol}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, provider, symbol, size, created, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, provider, symbol, path.stat().st_size, now, now)
+            )
+            self._db.commit()
+        self._evict()
+
+    def _remove(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _evict(self):
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(key)
+                total -= size
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in evicted])
+            self._db.commit()
+            self.evictions += len(evicted)
+        for key in evicted:
+            self._path(key).unlink(missing_ok=True)
+        logger.debug("Cache evicted %d entries to stay under %d bytes.", len(evicted), self.max_bytes)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size_bytes": self.size_bytes()}
+
+    def clear(self):
+        with self._lock:
+            keys = [row[0] for row in self._db.execute("SELECT key FROM entries")]
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+        for key in keys:
+            self._path(key).unlink(missing_ok=True)
+
+
+def build_fetch_cache(cache_settings: dict, base_path: Path):
+    """
+    Builds a FetchCache from settings such as
+    {'enabled': True, 'dir': 'cache', 'max_size_mb': 1024, 'default_ttl_seconds': 3600,
+     'ttl_seconds': {'fred': 259200}, 'offline': False}.
+    Returns None if caching is disabled.
+    """
+    cache_settings = cache_settings or {}
+    if not cache_settings.get("enabled", False):
+        return None
+    cache = FetchCache(
+        Path(base_path) / cache_settings.get("dir", "cache"),
+        max_bytes=int(cache_settings.get("max_size_mb", 1024) * 1024 * 1024),
+        default_ttl=cache_settings.get("default_ttl_seconds", 3600),
+        ttls=cache_settings.get("ttl_seconds", {}),
+        offline=cache_settings.get("offline", False)
+    )
+    logger.info(f"Fetch cache enabled at {cache.root}{' (offline: cache-only)' if cache.offline else ''}.")
+    return cache
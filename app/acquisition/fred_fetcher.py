@@ -1,22 +1,54 @@
 import pandas as pd
-from fredapi import Fred
 import logging
+import time
 
 logger = logging.getLogger("LocalQuantAgent")
 
-def fetch_fred_series(series_id: str, api_key: str, start_date=None, end_date=None) -> pd.DataFrame:
+def fredapi_backend(series_id: str, api_key: str, start_date=None, end_date=None) -> pd.Series:
+    """
+    Default backend: one fredapi request. Returns the series indexed by observation date.
+    """
+    from fredapi import Fred # Deferred: only needed for real requests
+
+    fred = Fred(api_key=api_key)
+    return fred.get_series(series_id, observation_start=start_date, observation_end=end_date)
+
+
+def fetch_fred_series(series_id: str, api_key: str, start_date=None, end_date=None, rate_limiter=None,
+                      cache=None, backend=None, metrics=None) -> pd.DataFrame:
     """
     Fetches a specific series from FRED.
     Returns a DataFrame with 'Date' and 'Value' columns.
+    'rate_limiter' (optional TokenBucket) is acquired before the request.
+    'cache' (optional FetchCache) is consulted first and filled with successful results.
+    'backend' is a callable(series_id, api_key, start_date, end_date) -> Series; defaults to fredapi_backend.
+    'metrics' (optional MetricsRecorder) receives request latency, error and wait counts.
     """
-    logger.info(f"Fetching FRED series: {series_id}")
+    backend = backend or fredapi_backend
+    logger.debug("Fetching FRED series: %s", series_id)
+    cache_params = {"start": str(start_date), "end": str(end_date)}
+    if cache is not None:
+        cached = cache.get("fred", series_id, **cache_params)
+        if cached is not None:
+            return cached
+        if cache.offline:
+            logger.warning(f"Offline mode: no cached data for FRED series {series_id}. Skipping fetch.")
+            return pd.DataFrame()
+
     if not api_key:
         logger.error("FRED API key not provided. Cannot fetch FRED data.")
         return pd.DataFrame()
 
+    if rate_limiter is not None:
+        waited = rate_limiter.acquire()
+        if metrics is not None:
+            metrics.inc("rate_limit_wait_seconds_total", waited, provider="fred")
+    request_started = time.perf_counter()
     try:
-        fred = Fred(api_key=api_key)
-        series_data = fred.get_series(series_id, observation_start=start_date, observation_end=end_date)
+        series_data = backend(series_id, api_key, start_date, end_date)
+        if metrics is not None:
+            metrics.inc("fetch_requests_total", provider="fred")
+            metrics.observe("fetch_request_seconds", time.perf_counter() - request_started, provider="fred")
 
         if series_data is None or series_data.empty:
             logger.warning(f"No data returned for FRED series: {series_id}")
@@ -26,8 +58,12 @@ def fetch_fred_series(series_id: str, api_key: str, start_date=None, end_date=No
         df = series_data.reset_index()
         df.columns = ['Date', 'Value'] # FRED series index is usually date, value is the series itself
         df['SeriesID'] = series_id # Add series ID for context
-        logger.info(f"Successfully fetched {len(df)} data points for FRED series: {series_id}")
+        logger.debug("Successfully fetched %d data points for FRED series: %s", len(df), series_id)
+        if cache is not None:
+            cache.put("fred", series_id, df, **cache_params)
         return df
     except Exception as e:
         logger.error(f"Error fetching FRED series {series_id}: {e}")
+        if metrics is not None:
+            metrics.inc("fetch_errors_total", provider="fred")
         return pd.DataFrame()
\ No newline at end of file
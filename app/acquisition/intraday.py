@@ -0,0 +1,43 @@
+import logging
+from datetime import date, timedelta
+
+logger = logging.getLogger("LocalQuantAgent")
+
+# yfinance intraday limits: interval -> (days of history available, max days per request)
+INTRADAY_LIMITS = {
+    "1m": (30, 7),
+    "2m": (60, 60),
+    "5m": (60, 60),
+    "15m": (60, 60),
+    "30m": (60, 60),
+    "90m": (60, 60),
+    "60m": (730, 730),
+    "1h": (730, 730),
+}
+
+def is_intraday(interval: str) -> bool:
+    return interval in INTRADAY_LIMITS
+
+
+def intraday_windows(interval: str, lookback_days: int, chunk_days: int, today: date = None) -> list:
+    """
+    Splits the last 'lookback_days' calendar days (today included) into day-aligned
+    [start, end) request windows of at most 'chunk_days' days.
+    Both are capped to what the provider serves for 'interval' (e.g. 1m: the last 30 days,
+    7 days per request); one day of margin keeps the oldest window inside the limit.
+    Returns a list of (start, end) dates, oldest first.
+    """
+    if interval not in INTRADAY_LIMITS:
+        raise ValueError(f"'{interval}' is not an intraday interval. Expected one of {sorted(INTRADAY_LIMITS)}.")
+    available_days, max_request_days = INTRADAY_LIMITS[interval]
+    today = today or date.today()
+    lookback_days = max(1, min(int(lookback_days), available_days - 1))
+    chunk_days = max(1, min(int(chunk_days), max_request_days))
+
+    windows = []
+    start = today - timedelta(days=lookback_days - 1)
+    while start <= today:
+        end = min(start + timedelta(days=chunk_days), today + timedelta(days=1))
+        windows.append((start, end))
+        start = end
+    return windows
@@ -1,33 +1,184 @@
-import yfinance as yf
 import pandas as pd
 import logging
+import threading
 import time # For retries
 
 logger = logging.getLogger("LocalQuantAgent")
 
-def fetch_stock_data(ticker: str, period: str = "1y", interval: str = "1d", retries: int = 3, delay: int = 5) -> pd.DataFrame:
+# yf.download() collects results and errors in module-global dicts, so concurrent calls
+# (e.g. from pipeline fetch workers) can mix up or lose each other's tickers
+_DOWNLOAD_LOCK = threading.Lock()
+
+def fetch_stock_data(ticker: str, period: str = "1y", interval: str = "1d", retries: int = 3, delay: int = 5,
+                     rate_limiter=None, start=None, cache=None, metrics=None) -> pd.DataFrame:
     """
-    Fetches historical stock data for a given ticker using yfinance.
-    Includes a simple retry mechanism.
+    Fetches historical stock data for a single ticker: fetch_stock_data_batch() for one ticker
+    (see there for retries, caching and metrics). Returns an empty DataFrame if there is no data.
     """
-    logger.info(f"Fetching data for {ticker} | Period: {period}, Interval: {interval}")
-    for attempt in range(retries):
-        try:
-            stock = yf.Ticker(ticker)
-            # data = stock.history(period=period, interval=interval, auto_adjust=True, prepost=False) # auto_adjust simplifies some things
-            data = stock.history(period=period, interval=interval)
-            if data.empty:
-                # yfinance sometimes returns empty if no data for the period, not necessarily an error
-                logger.warning(f"No data returned for {ticker} (Period: {period}, Interval: {interval}).")
-                return pd.DataFrame() # Return empty if no data, don't retry this specifically unless an error
-            logger.info(f"Successfully fetched {len(data)} rows for {ticker}.")
-            return data
-        except Exception as e: # Catch more generic exceptions from yfinance
-            logger.error(f"Error fetching data for {ticker} (Attempt {attempt + 1}/{retries}): {e}")
-            if attempt < retries - 1:
-                logger.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+    return fetch_stock_data_batch([ticker], period=period, interval=interval, chunk_size=1, retries=retries,
+                                  delay=delay, rate_limiter=rate_limiter, start=start, cache=cache,
+                                  metrics=metrics)[ticker]
+
+def _record_request(metrics, seconds: float, failed: bool = False):
+    metrics.inc("fetch_requests_total", provider="yfinance")
+    metrics.observe("fetch_request_seconds", seconds, provider="yfinance")
+    if failed:
+        metrics.inc("fetch_errors_total", provider="yfinance")
+
+
+def _cache_params(period: str, interval: str, start=None, end=None) -> dict:
+    # A start date replaces the period, so it (and the end, if any) identifies the requested range
+    if start is not None:
+        params = {"start": str(start), "interval": interval}
+        if end is not None:
+            params["end"] = str(end)
+        return params
+    return {"period": period, "interval": interval}
+
+
+def yfinance_batch_backend(tickers: list, period: str, interval: str, start=None, end=None) -> pd.DataFrame:
+    """
+    Default batch backend: a single yf.download() request for several tickers.
+    Fetches from 'start' onwards (up to 'end', exclusive, if given), otherwise for 'period'.
+    Returns a frame with (Ticker, Field) MultiIndex columns.
+    yf.download() is not safe to call concurrently, so calls are serialized process-wide;
+    each call still fetches its tickers on yfinance's own threads, and pipeline workers
+    overlap cleaning and saving with the request in flight.
+    """
+    import yfinance as yf # Deferred: ~0.2s to import, only needed for real requests
+
+    range_kwargs = {"start": start, "end": end} if start is not None else {"period": period}
+    with _DOWNLOAD_LOCK:
+        return yf.download(
+            tickers=tickers,
+            interval=interval,
+            **range_kwargs,
+            group_by="ticker",
+            auto_adjust=True,  # Matches Ticker.history() defaults
+            actions=True,
+            threads=True,
+            progress=False,
+        )
+
+
+def split_batch_frame(data: pd.DataFrame, tickers: list) -> dict:
+    """
+    Splits a combined multi-ticker frame back into one frame per ticker.
+    Tickers missing from the result, or with no non-NaN rows, map to an empty DataFrame.
+    """
+    frames = {}
+    if data is None or data.empty:
+        return {ticker: pd.DataFrame() for ticker in tickers}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Single-ticker downloads may come back with flat columns
+        if len(tickers) == 1:
+            ticker_data = data.dropna(how="all")
+            return {tickers[0]: ticker_data}
+        return {ticker: pd.DataFrame() for ticker in tickers}
+
+    # Accept both (Ticker, Field) and (Field, Ticker) column layouts
+    ticker_level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+    available = set(data.columns.get_level_values(ticker_level))
+
+    for ticker in tickers:
+        if ticker not in available:
+            frames[ticker] = pd.DataFrame()
+            continue
+        ticker_data = data.xs(ticker, axis=1, level=ticker_level).dropna(how="all")
+        ticker_data.columns.name = None
+        frames[ticker] = ticker_data
+    return frames
+
+
+def fetch_stock_data_batch(tickers: list, period: str = "1y", interval: str = "1d", chunk_size: int = 100,
+                           retries: int = 3, delay: int = 5, backend=None, rate_limiter=None, start=None,
+                           cache=None, metrics=None, end=None) -> dict:
+    """
+    Fetches historical data for many tickers, 'chunk_size' tickers per request.
+    Only chunks whose request raised are retried, and the retry delay is paid once per round
+    rather than once per ticker. A ticker that comes back without rows from a successful request
+    (delisted, or no data in the range) is not an error and is not retried.
+    If 'start' is given, data is fetched from that date onwards (up to 'end', exclusive, if given)
+    instead of for 'period'.
+    'backend' is a callable(tickers, period, interval, start, end) -> DataFrame with (Ticker, Field)
+    MultiIndex columns; defaults to yfinance_batch_backend.
+    'rate_limiter' (optional TokenBucket) is acquired before every chunk request.
+    'cache' (optional FetchCache): cached tickers are not requested at all, and every
+    successfully fetched ticker is cached individually.
+    'metrics' (optional MetricsRecorder) receives request latency, error, retry and wait counts
+    ('fetch_retries_total' counts re-requested tickers).
+    Returns a dict of ticker -> DataFrame (empty DataFrame for tickers without data).
+    """
+    backend = backend or yfinance_batch_backend
+    chunk_size = max(1, int(chunk_size))
+    results = {}
+    no_data = []
+    pending = list(dict.fromkeys(tickers))  # De-duplicate, keep order
+
+    cache_params = _cache_params(period, interval, start, end)
+    if cache is not None:
+        uncached = []
+        for ticker in pending:
+            cached = cache.get("yfinance", ticker, **cache_params)
+            if cached is not None:
+                results[ticker] = cached
             else:
-                logger.error(f"Failed to fetch data for {ticker} after {retries} attempts.")
-                return pd.DataFrame()
-    return pd.DataFrame() # Should be unreachable if retries > 0 but good for safety
\ No newline at end of file
+                uncached.append(ticker)
+        if len(uncached) < len(pending):
+            logger.info("Cache served %d of %d tickers.", len(pending) - len(uncached), len(pending))
+        pending = uncached
+        if cache.offline and pending:
+            logger.warning(f"Offline mode: no cached data for {len(pending)} tickers. Skipping fetch: {pending}")
+            retries = 0
+
+    for attempt in range(retries):
+        if not pending:
+            break
+        logger.info("Batch fetching %d tickers in chunks of %d | %s: %s, End: %s, Interval: %s (Attempt %d/%d)",
+                    len(pending), chunk_size, "Start" if start is not None else "Period",
+                    start if start is not None else period, end, interval, attempt + 1, retries)
+        failed = []
+        for offset in range(0, len(pending), chunk_size):
+            chunk = pending[offset:offset + chunk_size]
+            if rate_limiter is not None:
+                waited = rate_limiter.acquire()
+                if metrics is not None:
+                    metrics.inc("rate_limit_wait_seconds_total", waited, provider="yfinance")
+            request_started = time.perf_counter()
+            try:
+                combined = backend(chunk, period, interval, start, end)
+            except Exception as e:
+                logger.error(f"Error batch fetching {len(chunk)} tickers ({chunk[0]}..{chunk[-1]}): {e}")
+                if metrics is not None:
+                    _record_request(metrics, time.perf_counter() - request_started, failed=True)
+                failed.extend(chunk)
+                continue
+            if metrics is not None:
+                _record_request(metrics, time.perf_counter() - request_started)
+
+            for ticker, ticker_data in split_batch_frame(combined, chunk).items():
+                if ticker_data.empty:
+                    no_data.append(ticker)  # Yahoo has nothing for it: not retried
+                else:
+                    results[ticker] = ticker_data
+                    if cache is not None:
+                        cache.put("yfinance", ticker, ticker_data, **cache_params)
+
+        logger.info("Batch attempt %d/%d: %d fetched, %d failed.", attempt + 1, retries, len(pending) - len(failed), len(failed))
+        pending = failed
+        if pending and attempt < retries - 1:
+            logger.info("Retrying %d tickers in %s seconds...", len(pending), delay)
+            if metrics is not None:
+                metrics.inc("fetch_retries_total", len(pending), provider="yfinance")
+                metrics.inc("retry_sleep_seconds_total", delay, provider="yfinance")
+            time.sleep(delay)
+
+    if no_data:
+        logger.warning(f"No data returned for {len(no_data)} tickers (Interval: {interval}): {no_data}")
+    if pending and retries:
+        logger.error(f"Failed to fetch {len(pending)} tickers after {retries} attempts: {pending}")
+    for ticker in no_data + pending:
+        results[ticker] = pd.DataFrame()
+
+    return {ticker: results[ticker] for ticker in dict.fromkeys(tickers)}
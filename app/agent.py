@@ -1,43 +1,156 @@
+"""
+LocalQuant agent command line.
+
+    python -m app.agent                       # same as 'serve'
+    python -m app.agent serve                 # resident scheduler
+    python -m app.agent run indian_equity     # one job, then exit (e.g. from cron)
+    python -m app.agent run indian_equity --tickers RELIANCE.NS TCS.NS
+    python -m app.agent worker --jobs indian_equity   # sharded run (see app/worker.py)
+    python -m app.agent jobs                  # list job names
+
+The scheduler, pandas and the provider libraries are only imported by the command that
+needs them, so '--help' and 'jobs' return at interpreter speed.
+"""
+import argparse
 import logging
-from app.utils.logger import setup_logging
+import sys
+from pathlib import Path
+
+from app.utils.logger import setup_logging, stop_logging
 from app.config_manager import ConfigManager
-from app.scheduler import run_scheduler
 
-def main():
+# Job name -> DataCuratorJob method (names, so the scheduler is only imported to run one)
+JOBS = {
+    "indian_equity": "run_daily_indian_equity_job",
+    "intl_equity": "run_daily_international_equity_job",
+    "indian_macro": "run_daily_indian_macro_job",
+    "indian_intraday": "run_intraday_equity_job",
+    "indian_panel": "build_indian_panel",
+}
+# Jobs the 'worker' command can shard: the keys of DataCuratorJob.SHARDED_JOBS (kept in sync by tests)
+SHARDED_JOBS = ("indian_equity", "indian_intraday", "intl_equity")
+
+def configure_logging(config: ConfigManager, log_file: str = None):
+    """
+    Sets up logging from the log_file_path, log_level and logging settings.
+    """
+    log_level = config.get_setting("log_level", "INFO")
+    logging_settings = config.get_setting("logging", {}) or {}
+    return setup_logging(
+        log_file_path_str=log_file or config.get_log_file_path(),
+        level=log_level,
+        use_queue=logging_settings.get("queue", True),
+        json_format=logging_settings.get("json_format", False),
+        max_bytes=int(logging_settings.get("max_size_mb", 0) * 1024 * 1024),
+        backup_count=logging_settings.get("backup_count", 5)
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.agent", description="LocalQuant data curator agent.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="Run the resident scheduler (default).")
+
+    run_parser = commands.add_parser("run", help="Run one job now and exit.")
+    run_parser.add_argument("job", choices=sorted(JOBS))
+    run_parser.add_argument("--tickers", nargs="+", help="Only these tickers (or FRED series IDs for indian_macro).")
+
+    worker_parser = commands.add_parser("worker", help="Work on shards of a distributed run alongside other workers.")
+    worker_parser.add_argument("--jobs", nargs="+", choices=sorted(SHARDED_JOBS),
+                               help="Jobs to work on (default: workers.jobs in settings).")
+    worker_parser.add_argument("--run-id", help="Run to join (default: today's date).")
+    worker_parser.add_argument("--worker-id", help="Worker name (default: <hostname>-<pid>).")
+
+    commands.add_parser("jobs", help="List the job names accepted by 'run'.")
+    return parser
+
+
+def _serve(config: ConfigManager, args) -> int:
+    from app.async_scheduler import run_scheduler
+
+    run_scheduler(config)
+    return 0
+
+
+def _run_job(config: ConfigManager, args) -> int:
+    from app.scheduler import DataCuratorJob, job_failed
+
+    logger = logging.getLogger("LocalQuantAgent")
+    curator = DataCuratorJob(config)
+    job = getattr(curator, JOBS[args.job])
+    try:
+        if args.tickers:
+            if args.job == "indian_panel":
+                logger.warning("indian_panel takes no tickers. Ignoring --tickers.")
+                result = job()
+            else:
+                result = job(tickers=args.tickers)
+        else:
+            result = job()
+    finally:
+        curator.wait_for_background_work() # Compaction runs on a daemon thread
+    if job_failed(result):
+        logger.error(f"Job '{args.job}' failed: {result}")
+        return 1
+    return 0
+
+
+def _worker(config: ConfigManager, args) -> int:
+    from app.worker import run_worker
+
+    stats = run_worker(config, jobs=args.jobs, run_id=args.run_id, worker_id=args.worker_id)
+    return 1 if stats["failed"] else 0
+
+
+COMMANDS = {"serve": _serve, "run": _run_job, "worker": _worker}
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    command = args.command or "serve"
+    if command == "jobs":
+        print("\n".join(sorted(JOBS)))
+        return 0
+
     try:
         # 1. Initialize Configuration
         config = ConfigManager()
     except RuntimeError:
         # ConfigManager already logs the error, just exit.
         print("Critical error during configuration loading. Agent cannot start.")
-        return
+        return 2
 
     # 2. Setup Logging (after config is loaded to get log path and level)
-    log_file = config.get_log_file_path()
-    log_level = config.get_setting("log_level", "INFO")
-    setup_logging(log_file_path_str=log_file, level=log_level)
+    log_file = None
+    if command == "worker":
+        from app.worker import default_worker_id
 
-    logger = logging.getLogger("LocalQuantAgent")
-    logger.info("LocalQuant Agent is starting...")
+        args.worker_id = args.worker_id or default_worker_id()
+        # One log file per worker: rotating handlers must not share a file across processes
+        log_path = Path(config.get_log_file_path())
+        log_file = str(log_path.with_name(f"{log_path.stem}.{args.worker_id}{log_path.suffix}"))
+    logger = configure_logging(config, log_file=log_file)
+    logger.info(f"LocalQuant Agent is starting ({command})...")
 
-    # 3. Start the Scheduler
+    # 3. Run the command
     try:
-        run_scheduler(config)
+        return COMMANDS[command](config, args)
     except Exception as e:
-        logger.critical(f"An unhandled exception occurred in the scheduler: {e}", exc_info=True)
+        logger.critical(f"An unhandled exception occurred in '{command}': {e}", exc_info=True)
+        return 1
     finally:
         logger.info("LocalQuant Agent is shutting down.")
+        stop_logging() # Flush queued log records
 
 if __name__ == "__main__":
     # Create __init__.py in app/ subdirectories if you haven't
     # e.g., app/acquisition/__init__.py (can be empty)
     # This allows Python to treat them as packages for relative imports
     import os
-    subdirs = ["acquisition", "processing", "storage", "utils"]
+    subdirs = ["acquisition", "processing", "stages", "storage", "utils"]
     for subdir in subdirs:
         init_file = os.path.join("app", subdir, "__init__.py")
         if not os.path.exists(init_file):
             with open(init_file, "w") as f:
                 pass # Create empty __init__.py
 
-    main()
\ No newline at end of file
+    sys.exit(main())
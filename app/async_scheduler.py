@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .config_manager import ConfigManager
+from .scheduler import DataCuratorJob
+
+logger = logging.getLogger("LocalQuantAgent")
+
+
+def _trigger_today(at: str, now: datetime) -> datetime:
+    hour, minute = (int(part) for part in at.split(":"))
+    return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def next_trigger(at: str, now: datetime) -> datetime:
+    """
+    Next daily trigger time ("HH:MM", local time) strictly after 'now'.
+    """
+    trigger = _trigger_today(at, now)
+    return trigger if trigger > now else trigger + timedelta(days=1)
+
+
+def last_trigger(at: str, now: datetime) -> datetime:
+    """
+    Most recent daily trigger time ("HH:MM", local time) at or before 'now'.
+    """
+    trigger = _trigger_today(at, now)
+    return trigger if trigger <= now else trigger - timedelta(days=1)
+
+
+class AsyncScheduler:
+    """
+    Event-loop scheduler for daily jobs.
+    - Each job sleeps until its exact trigger time (no polling), then runs in a worker thread.
+    - Independent jobs run concurrently, at most 'max_concurrent_jobs' at a time.
+    - The last completed trigger of every job is persisted to 'state_file'; on restart, a job
+      whose latest trigger passed while the process was down is run immediately (catch-up).
+      Jobs with no recorded run (first start) simply wait for their next trigger.
+    """
+    MAX_SLEEP_SECONDS = 300 # Re-check the wall clock at least this often (clock changes, suspend)
+
+    def __init__(self, max_concurrent_jobs: int = 2, state_file=None, catch_up: bool = True):
+        self.jobs = {} # name -> (at, func)
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.state_file = Path(state_file) if state_file else None
+        self.catch_up = catch_up
+        self.state = self._load_state()
+        self._state_lock = threading.Lock()
+
+    def add_job(self, name: str, at: str, func):
+        next_trigger(at, datetime.now()) # Validate "HH:MM" early
+        self.jobs[name] = (at, func)
+
+    def _load_state(self) -> dict:
+        if self.state_file is None or not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("Could not read scheduler state from %s: %s", self.state_file, e)
+            return {}
+
+    def _record_run(self, name: str, trigger: datetime, started: datetime, finished: datetime):
+        with self._state_lock:
+            self.state[name] = {
+                "last_trigger": trigger.isoformat(),
+                "last_started": started.isoformat(),
+                "last_finished": finished.isoformat(),
+            }
+            if self.state_file is None:
+                return
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_name(f".{self.state_file.name}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(tmp_path, self.state_file)
+
+    def _missed_trigger(self, name: str, at: str, now: datetime):
+        """
+        Returns the trigger time to catch up on, or None.
+        """
+        recorded = self.state.get(name, {}).get("last_trigger")
+        if not self.catch_up or recorded is None:
+            return None
+        latest = last_trigger(at, now)
+        return latest if datetime.fromisoformat(recorded) < latest else None
+
+    async def _run_job(self, name: str, func, trigger: datetime, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = datetime.now()
+            logger.info("Running job '%s' (trigger %s, start latency %.0f ms).", name, f"{trigger:%Y-%m-%d %H:%M}",
+                        (started - trigger).total_seconds() * 1000)
+            try:
+                await asyncio.to_thread(func)
+            except Exception as e:
+                # Not recorded as run, so a restart will catch it up
+                logger.error("Job '%s' failed: %s", name, e, exc_info=True)
+                return
+            finished = datetime.now()
+            self._record_run(name, trigger, started, finished)
+            logger.info("Job '%s' finished in %.1fs.", name, (finished - started).total_seconds())
+
+    async def _job_loop(self, name: str, at: str, func, semaphore: asyncio.Semaphore):
+        missed = self._missed_trigger(name, at, datetime.now())
+        if missed is not None:
+            logger.info("Job '%s' missed its %s run. Catching up now.", name, f"{missed:%Y-%m-%d %H:%M}")
+            await self._run_job(name, func, missed, semaphore)
+
+        while True:
+            trigger = next_trigger(at, datetime.now())
+            logger.info("Scheduled job: %s next run at %s", name, trigger)
+            while True:
+                remaining = (trigger - datetime.now()).total_seconds()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, self.MAX_SLEEP_SECONDS))
+            await self._run_job(name, func, trigger, semaphore)
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        await asyncio.gather(*(self._job_loop(name, at, func, semaphore) for name, (at, func) in self.jobs.items()))
+
+
+def run_scheduler(config: ConfigManager):
+    curator_job = DataCuratorJob(config)
+    scheduler_settings = config.get_setting("scheduler", {}) or {}
+    job_times = scheduler_settings.get("jobs", {}) or {}
+
+    scheduler = AsyncScheduler(
+        max_concurrent_jobs=scheduler_settings.get("max_concurrent_jobs", 2),
+        state_file=config.base_path / scheduler_settings.get("state_file", "state/scheduler_state.json"),
+        catch_up=scheduler_settings.get("catch_up_missed_runs", True)
+    )
+    # Indian Equity (adjust time as needed, e.g., after Indian market close)
+    scheduler.add_job("indian_equity", job_times.get("indian_equity", "15:45"), curator_job.run_daily_indian_equity_job)
+    # International Equity (adjust time, e.g., after US market close)
+    scheduler.add_job("intl_equity", job_times.get("intl_equity", "02:00"), curator_job.run_daily_international_equity_job)
+    # Indian Macro (FRED data updates at various times, daily might be fine)
+    scheduler.add_job("indian_macro", job_times.get("indian_macro", "04:00"), curator_job.run_daily_indian_macro_job)
+    # Indian intraday bars (after close, so the day's last window is complete)
+    if curator_job.intraday_enabled:
+        scheduler.add_job("indian_intraday", job_times.get("indian_intraday", "16:15"), curator_job.run_intraday_equity_job)
+
+    logger.info("Scheduler started with %d jobs (max %d concurrent). Waiting for scheduled jobs...",
+                len(scheduler.jobs), scheduler.max_concurrent_jobs)
+    try:
+        asyncio.run(scheduler.run())
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped by user.")
+    except Exception as e:
+        logger.critical("A critical error occurred in the scheduler loop: %s", e, exc_info=True)
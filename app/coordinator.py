@@ -0,0 +1,200 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("LocalQuantAgent")
+
+class ShardLease:
+    """
+    A claimed shard. 'token' is the fencing token: it increases with every claim of the
+    shard, so a worker whose lease expired and was re-claimed can no longer write or complete.
+    """
+    def __init__(self, run_id: str, shard: int, tickers: list, owner: str, token: int, attempt: int):
+        self.run_id = run_id
+        self.shard = shard
+        self.tickers = tickers
+        self.owner = owner
+        self.token = token
+        self.attempt = attempt
+
+    def __repr__(self):
+        return f"ShardLease({self.run_id} #{self.shard}, {len(self.tickers)} tickers, token {self.token})"
+
+
+class ShardCoordinator:
+    """
+    Distributes the tickers of a job run over worker processes through a SQLite database
+    (on one box, or on a shared filesystem with working file locks).
+
+    - plan() splits a run into fixed shards; every worker may call it, only the first inserts.
+    - claim() leases the next pending shard, or one whose lease expired (abandoned by a
+      crashed worker), for 'lease_seconds'. keep_alive() renews the lease while working.
+    - is_current() is the fencing check made before every write; complete()/fail() only
+      succeed for the current lease. Failed shards are retried up to 'max_attempts' claims.
+      The store itself cannot check a token, so the check demands a safety margin of lease
+      time: a write started with 'margin' seconds left finishes before anyone can reclaim the
+      shard, provided it takes less than that (and clocks agree to within it).
+    """
+    def __init__(self, db_path, lease_seconds: float = 300, max_attempts: int = 3):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = max(1, int(max_attempts))
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS shards ("
+            "run_id TEXT, shard INTEGER, tickers TEXT, state TEXT, owner TEXT, token INTEGER, "
+            "attempts INTEGER, lease_expires REAL, error TEXT, updated REAL, PRIMARY KEY (run_id, shard))"
+        )
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent claims serialize
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def plan(self, run_id: str, tickers: list, shard_size: int) -> int:
+        """
+        Splits 'tickers' into shards of 'shard_size' for 'run_id' unless the run already
+        exists. Returns the number of shards of the run.
+        """
+        shard_size = max(1, int(shard_size))
+        now = time.time()
+        with self._transaction() as db:
+            existing = db.execute("SELECT COUNT(*) FROM shards WHERE run_id = ?", (run_id,)).fetchone()[0]
+            if existing:
+                return existing
+            shards = [tickers[i:i + shard_size] for i in range(0, len(tickers), shard_size)]
+            db.executemany(
+                "INSERT INTO shards (run_id, shard, tickers, state, owner, token, attempts, lease_expires, error, updated) "
+                "VALUES (?, ?, ?, 'pending', NULL, 0, 0, NULL, NULL, ?)",
+                [(run_id, i, json.dumps(shard), now) for i, shard in enumerate(shards)]
+            )
+        logger.info(f"Planned run {run_id}: {len(tickers)} tickers in {len(shards)} shards of up to {shard_size}.")
+        return len(shards)
+
+    def claim(self, run_id: str, owner: str):
+        """
+        Leases the lowest pending (or abandoned) shard of 'run_id' to 'owner'.
+        Returns a ShardLease, or None if no shard is claimable.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            while True:
+                row = db.execute(
+                    "SELECT shard, tickers, state, owner, token, attempts FROM shards WHERE run_id = ? "
+                    "AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) ORDER BY shard LIMIT 1",
+                    (run_id, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                shard, tickers, state, previous_owner, token, attempts = row
+                if state == 'pending' or attempts < self.max_attempts:
+                    break
+                # Abandoned on its last attempt: give up on it and look for another shard
+                db.execute("UPDATE shards SET state = 'failed', error = 'lease expired', updated = ? "
+                           "WHERE run_id = ? AND shard = ?", (now, run_id, shard))
+                logger.error(f"Shard {run_id} #{shard} abandoned by {previous_owner} on its last attempt. Marked failed.")
+            if state == 'leased':
+                logger.warning(f"Reclaiming shard {run_id} #{shard}: lease of {previous_owner} expired.")
+            db.execute(
+                "UPDATE shards SET state = 'leased', owner = ?, token = ?, attempts = ?, lease_expires = ?, updated = ? "
+                "WHERE run_id = ? AND shard = ?",
+                (owner, token + 1, attempts + 1, now + self.lease_seconds, now, run_id, shard)
+            )
+        return ShardLease(run_id, shard, json.loads(tickers), owner, token + 1, attempts + 1)
+
+    def renew(self, lease: ShardLease) -> bool:
+        """
+        Extends the lease by 'lease_seconds'. Returns False if it is no longer current.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE shards SET lease_expires = ?, updated = ? WHERE run_id = ? AND shard = ? "
+                "AND state = 'leased' AND token = ? AND lease_expires >= ?",
+                (now + self.lease_seconds, now, lease.run_id, lease.shard, lease.token, now)
+            )
+            return cursor.rowcount == 1
+
+    def is_current(self, lease: ShardLease, margin: float = 0.0) -> bool:
+        """
+        Fencing check: True while this lease still owns its shard and has more than 'margin'
+        seconds left before it expires.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state, token, lease_expires FROM shards WHERE run_id = ? AND shard = ?",
+                (lease.run_id, lease.shard)
+            ).fetchone()
+        return row is not None and row[0] == 'leased' and row[1] == lease.token and row[2] >= time.time() + margin
+
+    def _finish(self, lease: ShardLease, state: str, error: str = None):
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE shards SET state = ?, error = ?, lease_expires = NULL, updated = ? "
+                "WHERE run_id = ? AND shard = ? AND state = 'leased' AND token = ?",
+                (state, error, now, lease.run_id, lease.shard, lease.token)
+            )
+            accepted = cursor.rowcount == 1
+            open_shards = db.execute(
+                "SELECT COUNT(*) FROM shards WHERE run_id = ? AND state IN ('pending', 'leased')", (lease.run_id,)
+            ).fetchone()[0]
+        return accepted, accepted and open_shards == 0
+
+    def complete(self, lease: ShardLease):
+        """
+        Marks the shard done. Returns (accepted, run_finished): 'accepted' is False for a stale
+        lease; 'run_finished' is True for exactly one call, the one that closed the last shard.
+        """
+        return self._finish(lease, 'done')
+
+    def fail(self, lease: ShardLease, error: str):
+        """
+        Releases the shard after an error: back to pending, or failed after 'max_attempts'.
+        Returns (accepted, run_finished) like complete().
+        """
+        return self._finish(lease, 'failed' if lease.attempt >= self.max_attempts else 'pending', str(error)[:500])
+
+    def progress(self, run_id: str) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM shards WHERE run_id = ? GROUP BY state", (run_id,)).fetchall()
+        return dict(rows)
+
+    @contextmanager
+    def keep_alive(self, lease: ShardLease):
+        """
+        Renews 'lease' on a background thread every third of 'lease_seconds' while the block runs.
+        """
+        stop = threading.Event()
+
+        def renew_loop():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.renew(lease):
+                    logger.warning(f"Lost the lease on {lease}. Its remaining writes will be skipped.")
+                    return
+
+        thread = threading.Thread(target=renew_loop, name=f"lease-{lease.shard}", daemon=True)
+        thread.start()
+        try:
+            yield lease
+        finally:
+            stop.set()
+            thread.join()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
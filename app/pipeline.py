@@ -0,0 +1,93 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger("LocalQuantAgent")
+
+_STOP = object() # Queue sentinel
+
+def run_pipeline(units: list, fetch, process, save, fetch_workers: int = 4, queue_size: int = 16) -> dict:
+    """
+    Runs a bounded fetch -> process -> save pipeline.
+
+    - 'units' are work items handed to 'fetch' (e.g. a chunk of tickers or one series ID).
+    - fetch(unit) returns an iterable of (key, raw_df) pairs. Runs on 'fetch_workers' threads.
+    - process(key, raw_df) returns a cleaned DataFrame, or None to drop the item. Runs on the fetch threads.
+    - save(key, df) persists one item. Runs on a single writer thread, so writes never race.
+
+    Both stage queues are bounded by 'queue_size', so fast fetchers block instead of
+    piling up frames in memory when the writer falls behind.
+    Returns counts of fetched, saved, skipped and failed items.
+    """
+    fetch_workers = max(1, int(fetch_workers))
+    queue_size = max(1, int(queue_size))
+    work_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    stats = {"fetched": 0, "saved": 0, "skipped": 0, "failed": 0}
+    stats_lock = threading.Lock()
+
+    def count(key, n=1):
+        with stats_lock:
+            stats[key] += n
+
+    def feeder():
+        for unit in units:
+            work_queue.put(unit)
+        for _ in range(fetch_workers):
+            work_queue.put(_STOP)
+
+    def fetch_worker():
+        while True:
+            unit = work_queue.get()
+            if unit is _STOP:
+                break
+            try:
+                items = fetch(unit)
+            except Exception as e:
+                logger.error(f"Pipeline fetch failed for {unit}: {e}", exc_info=True)
+                count("failed")
+                continue
+            for key, raw_df in items:
+                count("fetched")
+                try:
+                    cleaned = process(key, raw_df)
+                except Exception as e:
+                    logger.error(f"Pipeline processing failed for {key}: {e}", exc_info=True)
+                    count("failed")
+                    continue
+                if cleaned is None:
+                    count("skipped")
+                    continue
+                write_queue.put((key, cleaned))
+
+    def writer():
+        while True:
+            item = write_queue.get()
+            if item is _STOP:
+                break
+            key, df = item
+            try:
+                save(key, df)
+                count("saved")
+            except Exception as e:
+                logger.error(f"Pipeline save failed for {key}: {e}", exc_info=True)
+                count("failed")
+
+    writer_thread = threading.Thread(target=writer, name="pipeline-writer", daemon=True)
+    writer_thread.start()
+    fetch_threads = [
+        threading.Thread(target=fetch_worker, name=f"pipeline-fetch-{i}", daemon=True)
+        for i in range(fetch_workers)
+    ]
+    for t in fetch_threads:
+        t.start()
+
+    feeder()
+    for t in fetch_threads:
+        t.join()
+    write_queue.put(_STOP)
+    writer_thread.join()
+
+    logger.info(f"Pipeline finished: {stats['fetched']} fetched, {stats['saved']} saved, "
+                f"{stats['skipped']} skipped, {stats['failed']} failed ({fetch_workers} fetch workers).")
+    return stats
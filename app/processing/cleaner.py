@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import logging
 
@@ -8,14 +9,14 @@ def clean_stock_data(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
         logger.warning(f"DataFrame for {ticker} is empty. Skipping cleaning.")
         return df
 
-    logger.debug(f"Cleaning stock data for {ticker}. Initial rows: {len(df)}")
+    logger.debug("Cleaning stock data for %s. Initial rows: %d", ticker, len(df))
 
     critical_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
     original_rows = len(df)
     df_cleaned = df.dropna(subset=critical_cols)
 
     if len(df_cleaned) < original_rows:
-        logger.info(f"Dropped {original_rows - len(df_cleaned)} rows with NaNs in critical columns for {ticker}.")
+        logger.debug("Dropped %d rows with NaNs in critical columns for %s.", original_rows - len(df_cleaned), ticker)
 
     if isinstance(df_cleaned.index, pd.DatetimeIndex):
         df_cleaned = df_cleaned.reset_index()
@@ -36,7 +37,7 @@ def clean_stock_data(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
     if 'Ticker' not in df_cleaned.columns:
         df_cleaned['Ticker'] = ticker
 
-    logger.debug(f"Finished cleaning stock data for {ticker}. Final rows: {len(df_cleaned)}")
+    logger.debug("Finished cleaning stock data for %s. Final rows: %d", ticker, len(df_cleaned))
     return df_cleaned
 
 def clean_macro_data(df: pd.DataFrame, series_id: str) -> pd.DataFrame:
@@ -47,7 +48,7 @@ def clean_macro_data(df: pd.DataFrame, series_id: str) -> pd.DataFrame:
         logger.warning(f"DataFrame for {series_id} is empty. Skipping macro cleaning.")
         return df
 
-    logger.debug(f"Cleaning macro data for {series_id}. Initial rows: {len(df)}")
+    logger.debug("Cleaning macro data for %s. Initial rows: %d", series_id, len(df))
 
     # Ensure 'Date' and 'Value' columns exist
     if not all(col in df.columns for col in ['Date', 'Value']):
@@ -58,7 +59,7 @@ def clean_macro_data(df: pd.DataFrame, series_id: str) -> pd.DataFrame:
     original_rows = len(df)
     df_cleaned = df.dropna(subset=['Value'])
     if len(df_cleaned) < original_rows:
-        logger.info(f"Dropped {original_rows - len(df_cleaned)} rows with NaN 'Value' for {series_id}.")
+        logger.debug("Dropped %d rows with NaN 'Value' for %s.", original_rows - len(df_cleaned), series_id)
 
     # Ensure Date is datetime (FRED usually provides this)
     if not pd.api.types.is_datetime64_any_dtype(df_cleaned['Date']):
@@ -77,5 +78,157 @@ def clean_macro_data(df: pd.DataFrame, series_id: str) -> pd.DataFrame:
     if 'SeriesID' not in df_cleaned.columns:
         df_cleaned['SeriesID'] = series_id
 
-    logger.debug(f"Finished cleaning macro data for {series_id}. Final rows: {len(df_cleaned)}")
-    return df_cleaned
\ No newline at end of file
+    logger.debug("Finished cleaning macro data for %s. Final rows: %d", series_id, len(df_cleaned))
+    return df_cleaned
+
+def combine_ticker_frames(frames: dict, id_column: str = 'Ticker') -> pd.DataFrame:
+    """
+    Concatenates per-ticker frames (as returned by fetch_stock_data_batch) into one
+    long-format frame with an '<id_column>' categorical column. Empty frames are skipped.
+    """
+    non_empty = {key: df for key, df in frames.items() if df is not None and not df.empty}
+    if not non_empty:
+        return pd.DataFrame()
+
+    keys = list(non_empty)
+    lengths = [len(non_empty[key]) for key in keys]
+    combined = pd.concat(non_empty.values())
+    # Build the identifier column directly as codes, instead of repeating strings per row
+    codes = np.repeat(np.arange(len(keys), dtype=np.int32), lengths)
+    combined[id_column] = pd.Categorical.from_codes(codes, categories=keys)
+    return combined
+
+
+def split_universe(df: pd.DataFrame, id_column: str = 'Ticker') -> dict:
+    """
+    Splits a long-format frame back into a dict of identifier -> frame.
+    The identifier column of each frame is a plain string column, as from the per-ticker
+    cleaners: a categorical would carry the whole batch's categories into every saved file.
+    """
+    if df.empty:
+        return {}
+    return {str(key): group.assign(**{id_column: str(key)})
+            for key, group in df.groupby(id_column, observed=True, sort=False)}
+
+
+def _float_decimals(atol: float) -> int:
+    # Decimal places a downcast value is rounded back to, e.g. 5e-5 -> 4
+    return max(0, int(np.floor(-np.log10(2 * atol) + 1e-9)))
+
+
+def _downcast_floats(df: pd.DataFrame, columns: list, atol: float):
+    """
+    Converts float64 columns to float32 in place where restore_floats() gives every value back
+    exactly: each has at most the decimal places 'atol' keeps (5e-5 -> 4) and float32 holds it
+    within 'atol'. Large values such as index levels stay float64.
+    """
+    decimals = _float_decimals(atol)
+    for col in columns:
+        if col not in df.columns or df[col].dtype != np.float64:
+            continue
+        values = df[col].to_numpy()
+        as_float32 = values.astype(np.float32)
+        restored = np.round(as_float32.astype(np.float64), decimals)
+        if np.all((restored == values) | np.isnan(values)):
+            df[col] = as_float32
+
+
+def restore_floats(df: pd.DataFrame, float_atol: float = 5e-5) -> pd.DataFrame:
+    """
+    Undoes the float32 downcast of the universe cleaners (given the same 'float_atol'): float32
+    columns come back as the exact float64 values that were cleaned. Frames are restored before
+    they are merged or saved, so stored values never depend on how a batch was held in memory.
+    """
+    decimals = _float_decimals(float_atol)
+    restored = {col: np.round(df[col].to_numpy(dtype=np.float64), decimals)
+                for col, dtype in df.dtypes.items() if dtype == np.float32}
+    return df.assign(**restored) if restored else df
+
+
+def _normalize_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Moves a DatetimeIndex into a 'Date' column (handling yfinance's 'Datetime'/'index' names)
+    and makes 'Date' timezone-naive.
+    """
+    if isinstance(df.index, pd.DatetimeIndex):
+        df = df.reset_index()
+        if 'Datetime' in df.columns and 'Date' not in df.columns:
+            df = df.rename(columns={'Datetime': 'Date'})
+        elif 'index' in df.columns and 'Date' not in df.columns:
+            df = df.rename(columns={'index': 'Date'})
+
+    if 'Date' in df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            df['Date'] = pd.to_datetime(df['Date'])
+        if df['Date'].dt.tz is not None:
+            df['Date'] = df['Date'].dt.tz_localize(None)
+    return df
+
+
+def clean_stock_universe(df: pd.DataFrame, downcast: bool = True, float_atol: float = 5e-5) -> pd.DataFrame:
+    """
+    Cleans one long-format frame holding many tickers (a 'Ticker' column plus a Date index
+    or column) in a single vectorized pass: drops rows with NaNs in critical columns,
+    moves/normalizes dates once, holds Ticker as a categorical and, with 'downcast', holds a
+    price column as float32 if that keeps every value within 'float_atol'. The downcast only
+    saves memory in flight: restore_floats() gives back the exact values before saving.
+    """
+    if df.empty:
+        logger.warning("Universe DataFrame is empty. Skipping cleaning.")
+        return df
+    if 'Ticker' not in df.columns:
+        logger.error("Universe DataFrame has no 'Ticker' column. Use clean_stock_data for single tickers.")
+        return pd.DataFrame()
+
+    critical_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+    original_rows = len(df)
+    df_cleaned = df.dropna(subset=critical_cols)
+    dropped = original_rows - len(df_cleaned)
+    if dropped:
+        logger.info("Dropped %d rows with NaNs in critical columns across the universe.", dropped)
+
+    df_cleaned = _normalize_dates(df_cleaned)
+
+    if not isinstance(df_cleaned['Ticker'].dtype, pd.CategoricalDtype):
+        df_cleaned['Ticker'] = df_cleaned['Ticker'].astype('category')
+
+    if downcast:
+        _downcast_floats(df_cleaned, ['Open', 'High', 'Low', 'Close', 'Dividends', 'Stock Splits'], float_atol)
+        df_cleaned['Volume'] = pd.to_numeric(df_cleaned['Volume'], downcast='integer')
+
+    logger.debug("Finished cleaning universe of %d tickers. Final rows: %d", df_cleaned['Ticker'].nunique(), len(df_cleaned))
+    return df_cleaned
+
+
+def clean_macro_universe(df: pd.DataFrame, downcast: bool = True, float_atol: float = 5e-5) -> pd.DataFrame:
+    """
+    Vectorized counterpart of clean_macro_data for one long-format frame holding many
+    series (a 'SeriesID' column): drops NaN values, normalizes dates once, stores SeriesID
+    as a categorical and, with 'downcast', Value as float32 where precision allows.
+    """
+    if df.empty:
+        logger.warning("Macro universe DataFrame is empty. Skipping cleaning.")
+        return df
+    if not all(col in df.columns for col in ['Date', 'Value', 'SeriesID']):
+        logger.error("Macro universe DataFrame missing 'Date', 'Value' or 'SeriesID' column.")
+        return pd.DataFrame()
+
+    original_rows = len(df)
+    df_cleaned = df.dropna(subset=['Value'])
+    dropped = original_rows - len(df_cleaned)
+    if dropped:
+        logger.info("Dropped %d rows with NaN 'Value' across macro series.", dropped)
+
+    try:
+        df_cleaned = _normalize_dates(df_cleaned)
+    except Exception as e:
+        logger.error(f"Could not convert 'Date' column to datetime for macro universe: {e}")
+        return pd.DataFrame()
+
+    if not isinstance(df_cleaned['SeriesID'].dtype, pd.CategoricalDtype):
+        df_cleaned['SeriesID'] = df_cleaned['SeriesID'].astype('category')
+    if downcast:
+        _downcast_floats(df_cleaned, ['Value'], float_atol)
+
+    logger.debug("Finished cleaning %d macro series. Final rows: %d", df_cleaned['SeriesID'].nunique(), len(df_cleaned))
+    return df_cleaned
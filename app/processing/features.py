@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("LocalQuantAgent")
+
+DEFAULT_SMA_WINDOWS = (20, 50)
+DEFAULT_VOLATILITY_WINDOWS = (20,)
+DEFAULT_ATR_WINDOWS = (14,)
+
+def feature_lookback(sma_windows=DEFAULT_SMA_WINDOWS, volatility_windows=DEFAULT_VOLATILITY_WINDOWS,
+                     atr_windows=DEFAULT_ATR_WINDOWS) -> int:
+    """
+    Bars of history needed before the first updated bar to recompute every feature exactly:
+    the longest window plus one bar for the previous close.
+    """
+    return max([1, *sma_windows, *volatility_windows, *atr_windows]) + 1
+
+
+def _segment_positions(codes: np.ndarray):
+    """
+    For rows sorted by identifier: (first-row-of-identifier mask, position within the identifier).
+    """
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(first)
+    position = np.arange(len(codes)) - starts[np.cumsum(first) - 1]
+    return first, position
+
+
+def _rolling(values: np.ndarray, position: np.ndarray, window: int, how: str) -> np.ndarray:
+    # Rolls over the whole universe at once; windows reaching into the previous identifier are masked
+    rolled = getattr(pd.Series(values).rolling(window, min_periods=window), how)().to_numpy(copy=True)
+    rolled[position < window - 1] = np.nan
+    return rolled
+
+
+def compute_features(df: pd.DataFrame, returns: bool = True, log_returns: bool = True,
+                     sma_windows=DEFAULT_SMA_WINDOWS, volatility_windows=DEFAULT_VOLATILITY_WINDOWS,
+                     atr_windows=DEFAULT_ATR_WINDOWS, id_column: str = 'Ticker') -> pd.DataFrame:
+    """
+    Computes technical features for a long-format frame of cleaned bars (Date, <id_column>,
+    Open/High/Low/Close) in one vectorized pass over the whole universe:
+    - return_1d, log_return_1d: close-to-close returns.
+    - sma_<n>: simple moving average of Close.
+    - volatility_<n>: rolling standard deviation of daily log returns (not annualized).
+    - atr_<n>: average true range, as a simple moving average of the true range.
+    Features that need more history than an identifier has are NaN.
+    Returns (Date, <id_column>, features...) sorted by identifier and date.
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    df = df.sort_values([id_column, 'Date'], kind='stable')
+    ids = df[id_column]
+    codes = ids.cat.codes.to_numpy() if isinstance(ids.dtype, pd.CategoricalDtype) else pd.factorize(ids)[0]
+    first, position = _segment_positions(codes)
+
+    close = df['Close'].to_numpy(dtype=np.float64)
+    prev_close = np.empty(len(close))
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    prev_close[first] = np.nan
+
+    features = {'Date': df['Date'].to_numpy(), id_column: ids.to_numpy()}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        simple_return = close / prev_close - 1
+        log_return = np.log(close / prev_close)
+    if returns:
+        features['return_1d'] = simple_return
+    if log_returns:
+        features['log_return_1d'] = log_return
+    for window in sma_windows:
+        features[f'sma_{window}'] = _rolling(close, position, window, 'mean')
+    for window in volatility_windows:
+        # The first bar has no return, so a full window starts one bar later
+        volatility = _rolling(log_return, position, window, 'std')
+        volatility[position < window] = np.nan
+        features[f'volatility_{window}'] = volatility
+    if atr_windows:
+        high = df['High'].to_numpy(dtype=np.float64)
+        low = df['Low'].to_numpy(dtype=np.float64)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        for window in atr_windows:
+            features[f'atr_{window}'] = _rolling(true_range, position, window, 'mean')
+
+    result = pd.DataFrame(features)
+    if isinstance(ids.dtype, pd.CategoricalDtype):
+        result[id_column] = pd.Categorical(result[id_column], categories=ids.cat.categories)
+    return result
+
+
+def feature_columns(returns: bool = True, log_returns: bool = True, sma_windows=DEFAULT_SMA_WINDOWS,
+                    volatility_windows=DEFAULT_VOLATILITY_WINDOWS, atr_windows=DEFAULT_ATR_WINDOWS) -> list:
+    """
+    Names of the columns compute_features produces for these settings (besides Date and the identifier).
+    """
+    return ((['return_1d'] if returns else []) + (['log_return_1d'] if log_returns else [])
+            + [f'sma_{w}' for w in sma_windows] + [f'volatility_{w}' for w in volatility_windows]
+            + [f'atr_{w}' for w in atr_windows])
+
+
+def on_or_after(df: pd.DataFrame, from_dates: dict, id_column: str = 'Ticker') -> np.ndarray:
+    """
+    Boolean mask of rows dated on or after their identifier's entry in 'from_dates'
+    (None: every row). Rows of identifiers missing from 'from_dates' are False.
+    """
+    cutoff = pd.Series({key: pd.Timestamp(value) if value is not None else pd.Timestamp.min
+                        for key, value in from_dates.items()}, dtype="datetime64[ns]")
+    row_cutoff = df[id_column].astype(str).map(cutoff).to_numpy(dtype="datetime64[ns]")
+    return df['Date'].to_numpy(dtype="datetime64[ns]") >= row_cutoff
+
+
+def update_features(bars: pd.DataFrame, from_dates: dict, id_column: str = 'Ticker', **feature_kwargs) -> pd.DataFrame:
+    """
+    Incremental feature update. 'bars' holds each identifier's stored bars from at least
+    feature_lookback() bars before its first updated bar; 'from_dates' maps identifier ->
+    first updated Date (None: keep every row, e.g. after a full refetch).
+    Returns only the feature rows on or after each identifier's from-date.
+    """
+    features = compute_features(bars, id_column=id_column, **feature_kwargs)
+    if features.empty:
+        return features
+    return features[on_or_after(features, from_dates, id_column)].reset_index(drop=True)
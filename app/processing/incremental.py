@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("LocalQuantAgent")
+
+PRICE_COLS = ['Open', 'High', 'Low', 'Close']
+ACTION_COLS = ['Dividends', 'Stock Splits']
+
+def merge_incremental(existing: pd.DataFrame, new: pd.DataFrame, key_cols: list = None) -> pd.DataFrame:
+    """
+    Merges newly fetched rows into stored rows. Rows sharing the same key (default: 'Date')
+    are taken from 'new', and the result is sorted by key.
+    """
+    key_cols = key_cols or ['Date']
+    if existing is None or existing.empty:
+        return new
+    if new is None or new.empty:
+        return existing
+
+    merged = pd.concat([existing, new], ignore_index=True)
+    merged = merged.drop_duplicates(subset=key_cols, keep='last')
+    return merged.sort_values(key_cols).reset_index(drop=True)
+
+
+def changed_rows(existing: pd.DataFrame, new: pd.DataFrame, value_cols: list, key_cols: list = None) -> pd.DataFrame:
+    """
+    The rows of 'new' that are not stored as they are: keys missing from 'existing', or keys
+    whose 'value_cols' differ from the last stored row for the key (e.g. a revised observation).
+    """
+    key_cols = key_cols or ['Date']
+    if existing is None or existing.empty or new is None or new.empty:
+        return new
+    stored = existing.drop_duplicates(subset=key_cols, keep='last')[key_cols + value_cols]
+    joined = new[key_cols + value_cols].merge(stored, on=key_cols, how='left', suffixes=('', '_stored'), indicator=True)
+    changed = joined['_merge'] == 'left_only'
+    for col in value_cols:
+        new_values, old_values = joined[col], joined[f"{col}_stored"]
+        changed |= (new_values != old_values) & ~(new_values.isna() & old_values.isna())
+    return new[changed.to_numpy()]
+
+
+def detect_restatement(existing: pd.DataFrame, new: pd.DataFrame, identifier: str, tolerance: float = 1e-4) -> bool:
+    """
+    Returns True if the stored history for an equity is no longer valid and must be refetched:
+    - a split or dividend appears in the newly fetched rows after the last stored date, or
+    - adjusted prices on overlapping dates differ by more than 'tolerance' (relative).
+    """
+    if existing is None or existing.empty or new is None or new.empty:
+        return False
+
+    # Plain numpy arrays: this runs once per ticker, so per-call pandas overhead matters
+    existing_dates = existing['Date'].to_numpy(dtype='datetime64[ns]')
+    new_dates = new['Date'].to_numpy(dtype='datetime64[ns]')
+    after_stored = new_dates > existing_dates.max()
+    for col in ACTION_COLS:
+        if col in new.columns and (np.nan_to_num(new[col].to_numpy(dtype=float)[after_stored]) != 0).any():
+            logger.info("%s found in new rows for %s. Stored history needs a full refetch.", col, identifier)
+            return True
+
+    price_cols = [col for col in PRICE_COLS if col in existing.columns and col in new.columns]
+    if not price_cols:
+        return False
+    # Flat files appended to before de-duplication can repeat a Date; compare the last row
+    # per Date on each side (the one merge_incremental and the loaders keep)
+    old_dates, old_rows = _last_row_per_date(existing_dates)
+    new_dates, new_rows = _last_row_per_date(new_dates)
+    _, old_idx, new_idx = np.intersect1d(old_dates, new_dates, assume_unique=True, return_indices=True)
+    if not len(old_idx):
+        return False
+
+    old_prices = existing[price_cols].to_numpy(dtype=float)[old_rows[old_idx]]
+    new_prices = new[price_cols].to_numpy(dtype=float)[new_rows[new_idx]]
+    rel_diff = np.abs(new_prices - old_prices) / np.abs(old_prices).clip(min=1e-12)
+    if (rel_diff > tolerance).any():
+        logger.info("Overlapping prices for %s differ by up to %.2f%%. Stored history needs a full refetch.",
+                    identifier, 100 * np.nanmax(rel_diff))
+        return True
+    return False
+
+
+def _last_row_per_date(dates: np.ndarray):
+    """
+    Distinct dates (sorted) and the position of the last row holding each of them.
+    """
+    reversed_unique, reversed_first = np.unique(dates[::-1], return_index=True)
+    return reversed_unique, len(dates) - 1 - reversed_first
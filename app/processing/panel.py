@@ -0,0 +1,88 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("LocalQuantAgent")
+
+def asof_align(calendar: pd.DatetimeIndex, dates, values, lag_days: float = 0) -> np.ndarray:
+    """
+    For every calendar day, the latest value whose observation 'Date' + 'lag_days' (its
+    release date) is on or before that day; NaN before the first release.
+    """
+    available = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]") + np.timedelta64(int(round(lag_days * 86400)), 's')
+    order = np.argsort(available, kind='stable')
+    available = available[order]
+    values = np.asarray(values, dtype=np.float64)[order]
+    idx = np.searchsorted(available, calendar.to_numpy(dtype="datetime64[ns]"), side='right') - 1
+    aligned = np.full(len(calendar), np.nan)
+    known = idx >= 0
+    aligned[known] = values[idx[known]]
+    return aligned
+
+
+def fingerprint(df: pd.DataFrame, columns: list = None) -> str:
+    """
+    Content hash of a frame's values (independent of file format or write time).
+    """
+    if df is None or df.empty:
+        return ""
+    data = df[columns] if columns else df
+    row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def build_macro_panel(calendar: pd.DatetimeIndex, series: dict, release_lags: dict = None, default_lag_days: float = 1,
+                      stored_panel: pd.DataFrame = None, stored_inputs: dict = None):
+    """
+    As-of joins macro series onto a trading calendar: one row per calendar day, one column per
+    series holding the latest value released by that day (observation Date + release lag, in
+    calendar days, from 'release_lags' or 'default_lag_days'). Values are the latest stored
+    vintage, so revisions are not point-in-time; the lag only prevents look-ahead on release.
+
+    'series' maps series ID -> frame with Date and Value columns. With 'stored_panel' and the
+    'stored_inputs' fingerprints it was built from, work is limited to what changed:
+    - nothing changed: (stored_panel, inputs, False) is returned as is;
+    - a series (or its lag) changed: only its column is recomputed;
+    - the calendar only gained days at the end: unchanged columns are extended for those days.
+    Returns (panel, inputs, rebuilt) where 'inputs' are the fingerprints to store alongside.
+    """
+    release_lags = release_lags or {}
+    stored_inputs = stored_inputs or {}
+    calendar = pd.DatetimeIndex(calendar).sort_values().unique()
+    inputs = {
+        "calendar": fingerprint(pd.DataFrame({"Date": calendar})),
+        "calendar_end": calendar[-1].isoformat() if len(calendar) else None,
+        "calendar_rows": len(calendar),
+        "series": {sid: {"data": fingerprint(df, ['Date', 'Value']),
+                         "lag_days": release_lags.get(sid, default_lag_days)} for sid, df in series.items()},
+    }
+
+    reuse = stored_panel is not None and not stored_panel.empty and stored_inputs.get("series") is not None
+    if reuse and inputs == stored_inputs:
+        return stored_panel, inputs, False
+
+    # Rows already in the stored panel can be kept only if the stored calendar is a prefix of this one
+    kept_rows = 0
+    if reuse:
+        stored_dates = pd.DatetimeIndex(stored_panel['Date'])
+        if len(stored_dates) <= len(calendar) and calendar[:len(stored_dates)].equals(stored_dates):
+            kept_rows = len(stored_dates)
+
+    columns = {'Date': calendar}
+    recomputed = []
+    for sid, df in series.items():
+        lag = inputs["series"][sid]["lag_days"]
+        unchanged = kept_rows and stored_inputs["series"].get(sid) == inputs["series"][sid] and sid in stored_panel.columns
+        if unchanged:
+            head = stored_panel[sid].to_numpy(dtype=np.float64)[:kept_rows]
+            tail = asof_align(calendar[kept_rows:], df['Date'], df['Value'], lag)
+            columns[sid] = np.concatenate([head, tail])
+        else:
+            columns[sid] = asof_align(calendar, df['Date'], df['Value'], lag)
+            recomputed.append(sid)
+
+    panel = pd.DataFrame(columns)
+    logger.info(f"Macro panel rebuilt: {len(panel)} days x {len(series)} series "
+                f"(recomputed: {recomputed or 'none'}; {len(calendar) - kept_rows} new days).")
+    return panel, inputs, True
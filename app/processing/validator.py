@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger("LocalQuantAgent")
+
+# Row-level checks, in report column order
+ROW_CHECKS = ['ohlc_inconsistent', 'non_positive_price', 'zero_volume', 'stale_close', 'price_jump', 'non_trading_day']
+
+def build_trading_calendar(start, end, holidays: list = None, weekmask: str = "Mon Tue Wed Thu Fri") -> pd.DatetimeIndex:
+    """
+    Exchange trading days between 'start' and 'end': every 'weekmask' day except 'holidays'.
+    """
+    holidays = pd.to_datetime(holidays or [])
+    return pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(),
+                          freq="C", weekmask=weekmask, holidays=list(holidays))
+
+
+def flag_universe(df: pd.DataFrame, calendar: pd.DatetimeIndex = None, stale_run: int = 5,
+                  jump_threshold: float = 0.4, zero_volume_exempt_prefixes: tuple = ("^",)) -> pd.DataFrame:
+    """
+    Runs every row-level check over a cleaned long-format frame (Date, Ticker, OHLCV, ...) in one
+    vectorized pass. Returns a boolean frame (one column per check in ROW_CHECKS) aligned to df.
+    - ohlc_inconsistent: High below Open/Close/Low, or Low above Open/Close.
+    - non_positive_price: any OHLC value <= 0.
+    - zero_volume: Volume == 0 on a trading day (tickers starting with an exempt prefix,
+      e.g. indices, are skipped).
+    - stale_close: Close unchanged for at least 'stale_run' consecutive bars.
+    - price_jump: |log return| above 'jump_threshold' without a recorded split on that bar
+      (an unadjusted split or a bad print).
+    - non_trading_day: bar dated on a day missing from 'calendar' (weekend/holiday).
+    """
+    flags = pd.DataFrame(False, index=df.index, columns=ROW_CHECKS)
+    if df.empty:
+        return flags
+
+    open_, high, low, close = (df[col].to_numpy(dtype=np.float64) for col in ('Open', 'High', 'Low', 'Close'))
+    flags['ohlc_inconsistent'] = (high < np.maximum.reduce([open_, close, low])) | (low > np.minimum(open_, close))
+    flags['non_positive_price'] = (open_ <= 0) | (high <= 0) | (low <= 0) | (close <= 0)
+
+    dates = df['Date'].dt.normalize()
+    on_calendar = dates.isin(calendar) if calendar is not None else pd.Series(True, index=df.index)
+    flags['non_trading_day'] = ~on_calendar.to_numpy()
+
+    tickers = df['Ticker'].astype(str)
+    exempt = np.zeros(len(df), dtype=bool)
+    for prefix in zero_volume_exempt_prefixes or ():
+        exempt |= tickers.str.startswith(prefix).to_numpy()
+    flags['zero_volume'] = (df['Volume'].to_numpy() == 0) & on_calendar.to_numpy() & ~exempt
+
+    # Per-ticker previous close, with rows in (Ticker, Date) order
+    order = np.lexsort((df['Date'].to_numpy(), df['Ticker'].cat.codes.to_numpy()
+                        if isinstance(df['Ticker'].dtype, pd.CategoricalDtype) else tickers.to_numpy()))
+    sorted_close = close[order]
+    sorted_ticker = tickers.to_numpy()[order]
+    new_ticker = np.ones(len(order), dtype=bool)
+    new_ticker[1:] = sorted_ticker[1:] != sorted_ticker[:-1]
+    prev_close = np.empty(len(order))
+    prev_close[0] = np.nan
+    prev_close[1:] = sorted_close[:-1]
+    prev_close[new_ticker] = np.nan
+
+    # Stale closes: length of the current run of unchanged closes
+    unchanged = sorted_close == prev_close
+    run_id = np.cumsum(~unchanged)
+    run_start = np.flatnonzero(~unchanged)
+    run_position = np.arange(len(order)) - run_start[run_id - 1] + 1
+    stale = np.zeros(len(df), dtype=bool)
+    stale[order] = unchanged & (run_position >= stale_run)
+    flags['stale_close'] = stale
+
+    # Jumps not explained by a split on the same bar
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_return = np.abs(np.log(sorted_close / prev_close))
+    jump = np.zeros(len(df), dtype=bool)
+    jump[order] = np.nan_to_num(log_return, nan=0.0, posinf=0.0) > jump_threshold
+    if 'Stock Splits' in df.columns:
+        jump &= df['Stock Splits'].fillna(0).to_numpy() == 0
+    flags['price_jump'] = jump
+    return flags
+
+
+def _with_context(df: pd.DataFrame, context: pd.DataFrame):
+    """
+    Stored rows of df's tickers (minus the bars df refetched) followed by df, with a string
+    Ticker column; and a mask marking df's rows.
+    """
+    tickers = df['Ticker'].astype(str)
+    context_tickers = context['Ticker'].astype(str)
+    new_keys = pd.MultiIndex.from_arrays([tickers, df['Date']])
+    keep = (context_tickers.isin(set(tickers)).to_numpy()
+            & ~pd.MultiIndex.from_arrays([context_tickers, context['Date']]).isin(new_keys))
+    context = context[keep]
+    checked = pd.concat([context.assign(Ticker=context_tickers[keep]), df.assign(Ticker=tickers)], ignore_index=True)
+    checked['Ticker'] = checked['Ticker'].astype('category')
+    is_new = np.concatenate([np.zeros(len(context), dtype=bool), np.ones(len(df), dtype=bool)])
+    return checked, is_new
+
+
+def validate_universe(df: pd.DataFrame, calendar: pd.DatetimeIndex = None, quarantine: bool = False,
+                      stale_run: int = 5, jump_threshold: float = 0.4,
+                      zero_volume_exempt_prefixes: tuple = ("^",), context: pd.DataFrame = None):
+    """
+    Validates a cleaned long-format frame against 'calendar' (see flag_universe for the checks).
+    Returns (valid_df, report, quarantined_df):
+    - report: one row per ticker with row count, date range, per-check counts, 'missing_days'
+      (calendar days between the ticker's first, or last stored, and last bar with no bar) and
+      'flagged_rows'.
+    - with 'quarantine', flagged rows are removed from valid_df and returned in quarantined_df
+      (with a 'QualityFlags' column naming the failed checks); otherwise valid_df is df unchanged.
+    'context' (optional) holds stored rows preceding df, e.g. each ticker's last stored bars
+    when df is an incremental fetch. They are checked together with df, so stale runs and jumps
+    across the boundary are found and 'missing_days' counts from the last stored bar, but only
+    df's rows are reported, quarantined or returned. 'calendar' must cover the context rows.
+    """
+    if df.empty:
+        return df, pd.DataFrame(), pd.DataFrame()
+
+    checked, is_new = df, None
+    if context is not None and not context.empty:
+        checked, is_new = _with_context(df, context)
+    flags = flag_universe(checked, calendar, stale_run=stale_run, jump_threshold=jump_threshold,
+                          zero_volume_exempt_prefixes=zero_volume_exempt_prefixes)
+    if is_new is not None:
+        flags = flags[is_new].set_axis(df.index)
+    any_flag = flags.to_numpy().any(axis=1)
+
+    grouped_flags = flags.groupby(df['Ticker'], observed=True, sort=True)
+    report = grouped_flags.sum().astype("int64")
+    report['flagged_rows'] = pd.Series(any_flag, index=df.index).groupby(df['Ticker'], observed=True, sort=True).sum()
+    dates = df.groupby('Ticker', observed=True, sort=True)['Date'].agg(['size', 'min', 'max'])
+    report.insert(0, 'rows', dates['size'])
+    report.insert(1, 'first_date', dates['min'])
+    report.insert(2, 'last_date', dates['max'])
+
+    if calendar is not None and len(calendar):
+        span_start = dates['min'].dt.normalize().to_numpy()
+        on_calendar_rows = (~flags['non_trading_day']).groupby(df['Ticker'], observed=True, sort=True).sum().to_numpy()
+        if is_new is not None:
+            # Count from each ticker's last stored bar, so a gap before df's first bar shows up
+            last_stored = checked[~is_new].groupby('Ticker', observed=True)['Date'].max().dt.normalize()
+            last_stored.index = last_stored.index.astype(str)
+            last_stored = last_stored.reindex(dates.index.astype(str)).to_numpy()
+            has_stored = ~pd.isna(last_stored)
+            span_start = np.where(has_stored, np.minimum(last_stored, span_start), span_start)
+            on_calendar_rows = on_calendar_rows + (has_stored & pd.DatetimeIndex(last_stored).isin(calendar))
+        expected = (calendar.searchsorted(dates['max'].dt.normalize().to_numpy(), side='right')
+                    - calendar.searchsorted(span_start, side='left'))
+        report['missing_days'] = np.maximum(expected - on_calendar_rows, 0)
+    else:
+        report['missing_days'] = 0
+    report.index.name = 'Ticker'
+    report = report.reset_index()
+
+    flagged_tickers = int((report['flagged_rows'] > 0).sum())
+    logger.info("Data quality: %d flagged rows across %d of %d tickers (%s).", any_flag.sum(), flagged_tickers,
+                len(report), ", ".join(f"{check}={flags[check].sum()}" for check in ROW_CHECKS))
+
+    if not quarantine or not any_flag.any():
+        return df, report, pd.DataFrame()
+
+    quarantined = df[any_flag].copy()
+    flagged = flags[any_flag]
+    quarantined['QualityFlags'] = [",".join(np.array(ROW_CHECKS)[row]) for row in flagged.to_numpy()]
+    logger.info("Quarantined %d rows.", len(quarantined))
+    return df[~any_flag], report, quarantined
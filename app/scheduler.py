@@ -1,52 +1,637 @@
-import schedule
-import time
 import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from pathlib import Path
 import pandas as pd
 
 from .config_manager import ConfigManager
-from .acquisition.yfinance_fetcher import fetch_stock_data
+from .acquisition.yfinance_fetcher import fetch_stock_data_batch
 from .acquisition.fred_fetcher import fetch_fred_series # New
-from .processing.cleaner import clean_stock_data, clean_macro_data # Updated
-from .storage.file_handler import save_data # Updated
+from .acquisition.cache import build_fetch_cache
+from .acquisition.intraday import intraday_windows
+from .processing.cleaner import clean_stock_data, clean_macro_data, clean_stock_universe, combine_ticker_frames, split_universe, restore_floats # Updated
+from .processing.incremental import merge_incremental, detect_restatement, changed_rows
+from .processing.validator import build_trading_calendar, validate_universe
+from .storage.file_handler import save_data, read_saved_data, get_last_saved_date, safe_filename # Updated
+from .storage.dataset_store import DatasetStore
+from .storage.intraday_store import IntradayStore
+from .storage.loader import load_files, load_dataset
+from .storage.manifest import DatasetManifest
+from .pipeline import run_pipeline
+from .stages.features import FeatureStage
+from .stages.panel import MacroPanelStage
+from .stages.snapshot import SnapshotStage
+from .utils.rate_limiter import build_rate_limiters
+from .utils.metrics import MetricsRecorder, frame_bytes, profiled, write_run_summary
 
 logger = logging.getLogger("LocalQuantAgent")
 
+# Stored equity columns published to the Arrow snapshot
+EQUITY_SNAPSHOT_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+def job_failed(result: dict) -> bool:
+    """
+    Whether the counts returned by a job method describe a failed run: a unit raised or could
+    not be written, or nothing was stored because every fetch came back empty.
+    None (nothing to do, e.g. no tickers configured) is not a failure.
+    """
+    if not result:
+        return False
+    stored = result.get("saved", 0) + result.get("unchanged", 0)
+    return bool(result.get("errors")) or (result.get("no_data", 0) > 0 and stored == 0)
+
+
 class DataCuratorJob:
-    def __init__(self, config: ConfigManager):
+    # Jobs that app/worker.py can split into ticker shards: job -> (tickers category, data dir under data_path)
+    SHARDED_JOBS = {
+        "indian_equity": ("indian_equity", ("indian", "equity", "daily")),
+        "intl_equity": ("international_equity", ("international", "equity", "daily")),
+        "indian_intraday": ("indian_equity", ("indian", "equity", "intraday")),
+    }
+
+    def __init__(self, config: ConfigManager, stock_backend=None, fred_backend=None, worker_id: str = None):
         self.config = config
+        self.stock_backend = stock_backend # None -> yfinance batch download
+        self.fred_backend = fred_backend # None -> fredapi
+        self.worker_id = worker_id # Set in worker processes; keeps their report/metrics file names apart
         self.yfinance_settings = self.config.get_setting("yfinance", {})
         self.storage_settings = self.config.get_setting("storage", {})
+        self.pipeline_settings = self.config.get_setting("pipeline", {}) or {}
+        self.incremental_settings = self.config.get_setting("incremental", {}) or {}
+        self.validation_settings = self.config.get_setting("validation", {}) or {}
+        self.processing_settings = self.config.get_setting("processing", {}) or {}
 
         self.yfin_default_period = self.yfinance_settings.get("default_period", "1y")
         self.yfin_default_interval = self.yfinance_settings.get("default_interval", "1d")
         self.yfin_intl_period = self.yfinance_settings.get("international_equity_period", "1y")
+        self.yfin_batch_size = self.yfinance_settings.get("batch_size", 100)
+        self.yfin_retries = self.yfinance_settings.get("retries", 3)
+        self.yfin_retry_delay = self.yfinance_settings.get("retry_delay", 5)
 
         self.default_file_format = self.storage_settings.get("default_format", "csv")
 
+        # "dataset" format: partitioned Parquet store instead of one flat file per ticker
+        self.dataset_store = None
+        if self.default_file_format == "dataset":
+            dataset_settings = self.storage_settings.get("dataset", {}) or {}
+            self.dataset_store = DatasetStore(
+                self.config.get_data_path() / dataset_settings.get("root", "datasets"),
+                compression=dataset_settings.get("compression", "zstd"),
+                compact_min_fragments=dataset_settings.get("compact_min_fragments", 8),
+                unpartitioned=dataset_settings.get("unpartitioned", ["indian_macro"]) or ()
+            )
+            self.background_compaction = dataset_settings.get("background_compaction", True)
+            self._compaction_threads = {} # dataset -> background compaction thread
+
+        # Flat files: skip writes whose content hash matches the directory's _manifest.json
+        self.skip_unchanged = self.storage_settings.get("skip_unchanged", True) and self.dataset_store is None
+        self._manifests = {} # directory -> DatasetManifest, flushed at the end of each job
+        self._manifests_lock = threading.Lock()
+
         self.fred_api_key = self.config.get_setting("fred_api_key") # Will check .env then settings.yaml
 
+        self.pipeline_enabled = self.pipeline_settings.get("enabled", False)
+        self.pipeline_fetch_workers = self.pipeline_settings.get("fetch_workers", 4)
+        self.pipeline_queue_size = self.pipeline_settings.get("queue_size", 16)
+
+        # Clean each fetched batch as one long-format frame instead of ticker by ticker
+        self.batch_clean = self.processing_settings.get("batch_clean", True)
+        self.downcast_floats = self.processing_settings.get("downcast_floats", True)
+        self.downcast_atol = self.processing_settings.get("downcast_atol", 5e-5)
+
+        # Data-quality checks run on each batch-cleaned unit (requires batch_clean)
+        self.validation_enabled = self.validation_settings.get("enabled", False) and self.batch_clean
+        self.quarantine_enabled = self.validation_settings.get("quarantine", False)
+
+        # Technical features recomputed for every saved ticker, from just the lookback it needs
+        self.features = FeatureStage(self, self.config.get_setting("features", {}) or {})
+
+        # Macro series as-of joined onto the equity trading calendar, rebuilt when an input changes
+        self.panel = MacroPanelStage(self, self.config.get_setting("panel", {}) or {})
 
-    def _process_and_save_equity(self, ticker: str, data: pd.DataFrame, output_dir: Path, data_type: str):
+        # Arrow IPC snapshot of the latest curated data, republished after each job
+        snapshot_settings = self.config.get_setting("snapshot", {}) or {}
+        self.snapshot = SnapshotStage(self, snapshot_settings,
+                                      self.config.get_data_path() / snapshot_settings.get("dir", "snapshot"))
+
+        # Intraday bars, fetched in (ticker batch, day window) units and written per day
+        self.intraday_settings = self.config.get_setting("intraday", {}) or {}
+        self.intraday_enabled = self.intraday_settings.get("enabled", False)
+
+        self.incremental_enabled = self.incremental_settings.get("enabled", False)
+        self.restatement_tolerance = self.incremental_settings.get("restatement_tolerance", 1e-4)
+
+        # One limiter per provider, shared by every job (and pipeline worker) of this instance
+        self.rate_limiters = build_rate_limiters(self.config.get_setting("rate_limits", {}))
+
+        # Optional on-disk cache of provider results (None when disabled)
+        self.fetch_cache = build_fetch_cache(self.config.get_setting("cache", {}), self.config.base_path)
+
+        # Per-stage timings and counts, labelled by dataset; exported after every job run
+        self.metrics = MetricsRecorder()
+        metrics_settings = self.config.get_setting("metrics", {}) or {}
+        self.metrics_enabled = metrics_settings.get("enabled", True)
+        self.metrics_dir = self.config.base_path / metrics_settings.get("dir", "metrics")
+        self.metrics_textfile = self.metrics_dir / metrics_settings.get("textfile", "localquant.prom")
+        if self.worker_id:
+            self.metrics_textfile = self.metrics_textfile.with_name(f"{self.metrics_textfile.stem}_{self.worker_id}.prom")
+        self.profile_dataset = metrics_settings.get("profile_dataset") # cProfile the next run of this dataset
+
+
+    def _clean_equity(self, ticker: str, data: pd.DataFrame, data_type: str, already_cleaned: bool = False):
         if data.empty:
-            logger.warning(f"No data fetched for {ticker} ({data_type}). Skipping processing and saving.")
-            return
+            logger.debug("No data fetched for %s (%s). Skipping processing and saving.", ticker, data_type)
+            return None
 
-        cleaned_data = clean_stock_data(data, ticker)
+        cleaned_data = data if already_cleaned else clean_stock_data(data, ticker)
 
         if cleaned_data.empty:
-            logger.warning(f"Data for {ticker} ({data_type}) became empty after cleaning. Skipping saving.")
+            logger.debug("Data for %s (%s) became empty after cleaning. Skipping saving.", ticker, data_type)
+            return None
+        return cleaned_data
+
+
+    def _equity_file_path(self, ticker: str, output_dir: Path) -> Path:
+        file_name = f"{safe_filename(ticker)}.{self.default_file_format}"
+        return output_dir / file_name
+
+
+    def _dataset_name(self, output_dir: Path) -> str:
+        # e.g. data/indian/equity/daily -> "indian_equity_daily"
+        return "_".join(output_dir.relative_to(self.config.get_data_path()).parts)
+
+
+    def _last_stored_date(self, key: str, output_dir: Path, file_path: Path):
+        if self.dataset_store is not None:
+            return self.dataset_store.last_date(self._dataset_name(output_dir), key)
+        manifest = self._manifest(output_dir)
+        entry = manifest.entry(file_path) if manifest is not None else None
+        if entry is not None and entry.get("end"):
+            return pd.Timestamp(entry["end"]) # From the manifest, without opening the file
+        return get_last_saved_date(str(file_path), self.default_file_format)
+
+
+    def _read_stored(self, key: str, output_dir: Path, file_path: Path, latest_only: bool = False) -> pd.DataFrame:
+        if self.dataset_store is not None:
+            dataset = self._dataset_name(output_dir)
+            if latest_only:
+                return self.dataset_store.read_latest(dataset, key)
+            return self.dataset_store.read(dataset, key)
+        return read_saved_data(str(file_path), self.default_file_format)
+
+
+    def _write_stored(self, key: str, df: pd.DataFrame, output_dir: Path, file_path: Path, append: bool = False):
+        """
+        Flat formats rewrite the file with 'df', unless the manifest shows it already holds
+        exactly 'df' (then False is returned; None if the write failed). The dataset store
+        appends 'df' as a new fragment, or replaces the key's partitions when not appending;
+        an empty 'df' (nothing new to store) returns False.
+        """
+        if self.dataset_store is not None:
+            if df.empty:
+                return False
+            dataset = self._dataset_name(output_dir)
+            if append:
+                self.dataset_store.append(df, dataset, key)
+            else:
+                self.dataset_store.replace(df, dataset, key)
+            return True
+        return save_data(df, str(file_path), key, file_format=self.default_file_format,
+                         manifest=self._manifest(output_dir))
+
+
+    def _manifest(self, output_dir: Path):
+        if not self.skip_unchanged:
+            return None
+        with self._manifests_lock:
+            manifest = self._manifests.get(output_dir)
+            if manifest is None:
+                manifest = self._manifests[output_dir] = DatasetManifest(output_dir)
+            return manifest
+
+
+    def _flush_manifests(self):
+        with self._manifests_lock:
+            manifests = list(self._manifests.values())
+        for manifest in manifests:
+            manifest.flush()
+
+
+    def _file_suffix(self) -> str:
+        return f"_{self.worker_id}" if self.worker_id else ""
+
+
+    def _log_cache_stats(self):
+        if self.fetch_cache is not None:
+            logger.info("Fetch cache: %s", self.fetch_cache.stats())
+
+
+    def _compact_dataset(self, output_dir: Path):
+        if self.dataset_store is None:
             return
+        if self.background_compaction:
+            dataset = self._dataset_name(output_dir)
+            self._compaction_threads[dataset] = self.dataset_store.compact_in_background(dataset)
+        else:
+            self.dataset_store.compact(self._dataset_name(output_dir))
 
-        safe_ticker_filename = ticker.replace(":", "_").replace("^", "_") # Sanitize more
-        file_name = f"{safe_ticker_filename}.{self.default_file_format}"
-        file_path = output_dir / file_name
-        save_data(cleaned_data, str(file_path), ticker, file_format=self.default_file_format)
 
+    def _wait_for_compaction(self, dataset: str):
+        if self.dataset_store is None:
+            return
+        thread = self._compaction_threads.pop(dataset, None)
+        if thread is not None:
+            thread.join()
+
+
+    def wait_for_background_work(self):
+        """
+        Joins background compactions; a one-shot process must not exit in the middle of one.
+        """
+        if self.dataset_store is None:
+            return
+        while self._compaction_threads:
+            _, thread = self._compaction_threads.popitem()
+            thread.join()
+
+
+    def _save_equity(self, ticker: str, cleaned_data: pd.DataFrame, output_dir: Path, append: bool = False):
+        file_path = self._equity_file_path(ticker, output_dir)
+        return self._write_stored(ticker, cleaned_data, output_dir, file_path, append=append)
+
+
+    def _merge_equity(self, ticker: str, cleaned_data: pd.DataFrame, output_dir: Path, restated: list):
+        """
+        Merges freshly fetched rows with the stored data. If the stored history was restated
+        (split/dividend), the ticker is added to 'restated' and None is returned.
+        With the dataset store only the rows after the last stored date are returned (to append).
+        """
+        file_path = self._equity_file_path(ticker, output_dir)
+        existing = self._read_stored(ticker, output_dir, file_path, latest_only=self.dataset_store is not None)
+        if existing.empty:
+            return cleaned_data
+        if detect_restatement(existing, cleaned_data, ticker, self.restatement_tolerance):
+            restated.append(ticker)
+            return None
+        if self.dataset_store is not None:
+            new_rows = cleaned_data[cleaned_data['Date'] > existing['Date'].max()]
+            if new_rows.empty:
+                logger.debug("No new rows for %s. Nothing to append.", ticker)
+                return None
+            return new_rows
+        return merge_incremental(existing, cleaned_data)
+
+
+    def _fetch_equity_batch(self, tickers: list, period: str, start=None, metrics=None) -> dict:
+        return fetch_stock_data_batch(
+            tickers,
+            period=period,
+            interval=self.yfin_default_interval,
+            chunk_size=self.yfin_batch_size,
+            retries=self.yfin_retries,
+            delay=self.yfin_retry_delay,
+            backend=self.stock_backend,
+            rate_limiter=self.rate_limiters.get("yfinance"),
+            start=start,
+            cache=self.fetch_cache,
+            metrics=metrics
+        )
+
+
+    def _load_long(self, tickers: list, output_dir: Path, columns: list, start=None, id_column: str = 'Ticker') -> pd.DataFrame:
+        """
+        Loads stored rows of many tickers (or series) as one long frame (parallel, projected reads).
+        """
+        if self.dataset_store is not None:
+            dataset = self._dataset_name(output_dir)
+            if not (self.dataset_store.root / f"dataset={DatasetStore.safe_name(dataset)}").is_dir():
+                return pd.DataFrame()
+            return load_dataset(self.dataset_store.root, dataset, tickers, start=start, columns=columns, id_column=id_column)
+        # New tickers have no file yet; skip them rather than warn about each one
+        tickers = [ticker for ticker in tickers if self._equity_file_path(ticker, output_dir).exists()]
+        if not tickers:
+            return pd.DataFrame()
+        return load_files(output_dir, tickers, start=start, columns=columns, file_format=self.default_file_format,
+                          id_column=id_column)
+
+
+    def _validation_context(self, universe: pd.DataFrame, output_dir: Path, start, stale_run: int) -> pd.DataFrame:
+        """
+        The last 'stale_run' stored bars of each ticker in an incremental unit fetched from
+        'start', so checks that need history (stale runs, jumps, gaps) see across the boundary.
+        Tickers whose refetched bar at 'start' differs from the stored one (restated history,
+        handled by the merge step) get no context: their old prices would look like a jump.
+        """
+        start = pd.Timestamp(start)
+        tickers = list(universe['Ticker'].astype(str).unique())
+        # Calendar slack for weekends and holidays on top of the bars needed
+        since = start - pd.offsets.BDay(int(stale_run * 1.5) + 10)
+        stored = self._load_long(tickers, output_dir, ['Open', 'High', 'Low', 'Close', 'Volume', 'Stock Splits'], start=since)
+        if stored.empty:
+            return stored
+        stored['Ticker'] = stored['Ticker'].astype(str)
+        overlap = stored.loc[stored['Date'] == start, ['Ticker', 'Close']].merge(
+            universe.loc[universe['Date'] == start, ['Ticker', 'Close']].astype({'Ticker': str}),
+            on='Ticker', suffixes=('_stored', '_fetched'))
+        change = (overlap['Close_fetched'].astype(float) / overlap['Close_stored'].astype(float) - 1).abs()
+        restated = set(overlap.loc[~(change <= self.restatement_tolerance), 'Ticker'])
+        stored = stored[(stored['Date'] < start) & ~stored['Ticker'].isin(restated)]
+        return stored.groupby('Ticker', sort=False).tail(stale_run)
+
+
+    def _validate_equity(self, universe: pd.DataFrame, output_dir: Path, quality_reports: list, start=None) -> pd.DataFrame:
+        """
+        Runs the data-quality checks on a cleaned unit against the market's trading calendar.
+        For an incremental unit (fetched from 'start'), the tickers' last stored bars are
+        checked along with it, but only the fetched rows are reported or quarantined.
+        The per-ticker report is appended to 'quality_reports'; with quarantine enabled,
+        flagged rows are written under data/quarantine/ and dropped from the returned frame.
+        """
+        if universe.empty:
+            return universe
+        dataset = self._dataset_name(output_dir)
+        market = output_dir.relative_to(self.config.get_data_path()).parts[0] # e.g. "indian"
+        holidays = (self.validation_settings.get("holidays", {}) or {}).get(market, [])
+        stale_run = self.validation_settings.get("stale_run", 5)
+        context = self._validation_context(universe, output_dir, start, stale_run) if start is not None else None
+        first_date = universe['Date'].min()
+        if context is not None and not context.empty:
+            first_date = min(first_date, context['Date'].min())
+        calendar = build_trading_calendar(first_date, universe['Date'].max(), holidays=holidays)
+
+        valid, report, quarantined = validate_universe(
+            universe,
+            calendar=calendar,
+            quarantine=self.quarantine_enabled,
+            stale_run=stale_run,
+            jump_threshold=self.validation_settings.get("jump_threshold", 0.4),
+            zero_volume_exempt_prefixes=tuple(self.validation_settings.get("zero_volume_exempt_prefixes", ["^"])),
+            context=context
+        )
+        quality_reports.append(report)
+        if not quarantined.empty:
+            file_path = (self.config.get_data_path() / "quarantine" / dataset /
+                         f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.csv")
+            save_data(quarantined, str(file_path), f"{dataset} quarantine", file_format="csv")
+        return valid
+
+
+    def _save_quality_report(self, quality_reports: list, output_dir: Path):
+        reports = [report for report in quality_reports if not report.empty]
+        if not reports:
+            return
+        dataset = self._dataset_name(output_dir)
+        file_path = self.config.get_data_path() / "quality" / dataset / f"report_{datetime.now():%Y%m%d_%H%M%S}{self._file_suffix()}.csv"
+        save_data(pd.concat(reports, ignore_index=True), str(file_path), f"{dataset} quality report", file_format="csv")
+
+
+    def _fetch_equity_unit(self, unit: tuple, period: str, output_dir: Path, quality_reports: list) -> list:
+        """
+        Fetches one (start, tickers) unit. With batch cleaning, the whole unit is cleaned (and
+        validated) in one vectorized pass here, and the returned frames are already clean
+        (empty if nothing survived).
+        """
+        start, tickers = unit
+        dataset = self._dataset_name(output_dir)
+        with self.metrics.stage("fetch", dataset=dataset) as stage:
+            raw_frames = self._fetch_equity_batch(tickers, period, start=start, metrics=self.metrics.bind(dataset=dataset))
+            stage.rows = sum(len(df) for df in raw_frames.values())
+            stage.bytes = sum(frame_bytes(df) for df in raw_frames.values())
+        if not self.batch_clean:
+            return list(raw_frames.items())
+
+        with self.metrics.stage("clean", dataset=dataset) as stage:
+            universe = clean_stock_universe(combine_ticker_frames(raw_frames), downcast=self.downcast_floats,
+                                            float_atol=self.downcast_atol)
+            del raw_frames
+            if self.validation_enabled:
+                universe = self._validate_equity(universe, output_dir, quality_reports, start=start)
+            cleaned_frames = split_universe(restore_floats(universe, self.downcast_atol))
+            stage.rows = len(universe)
+            stage.bytes = frame_bytes(universe)
+        return [(ticker, cleaned_frames.get(ticker, pd.DataFrame())) for ticker in tickers]
+
+
+    def _plan_incremental_equity(self, tickers: list, output_dir: Path) -> list:
+        """
+        Groups tickers by the date to fetch from (their last stored date, inclusive, so the
+        overlapping bar can be checked for restatements). Tickers without stored data get
+        start None, i.e. a full-period fetch.
+        Returns a list of (start, tickers) groups.
+        """
+        groups = {}
+        for ticker in tickers:
+            last_date = self._last_stored_date(ticker, output_dir, self._equity_file_path(ticker, output_dir))
+            start = last_date.strftime("%Y-%m-%d") if last_date is not None else None
+            groups.setdefault(start, []).append(ticker)
+        logger.info("Incremental plan: %d tickers in %d start-date groups.", len(tickers), len(groups))
+        for start, group in groups.items():
+            logger.debug("Incremental plan: %d tickers from %s.", len(group), start or "full period")
+        return list(groups.items())
+
+
+    @contextmanager
+    def _job_metrics(self, output_dir: Path):
+        """
+        Wraps one job run: times it as the 'job' stage, cProfiles it if it is the configured
+        profile_dataset (once), and afterwards exports the Prometheus textfile and writes a
+        JSON summary of this run to <metrics dir>/runs/.
+        Yields a dict that is filled with the run's counts on exit (see _export_metrics()).
+        """
+        dataset = self._dataset_name(output_dir)
+        snapshot = self.metrics.snapshot()
+        cache_before = self.fetch_cache.stats() if self.fetch_cache is not None else None
+        started = datetime.now()
+
+        profile_path = None
+        if self.profile_dataset == dataset:
+            self.profile_dataset = None # Single run only
+            profile_path = self.metrics_dir / "profiles" / f"{dataset}_{started:%Y%m%d_%H%M%S}{self._file_suffix()}.prof"
+        result = {}
+        try:
+            with profiled(profile_path), self.metrics.stage("job", dataset=dataset):
+                yield result
+        finally:
+            self._flush_manifests()
+            result.update(self._export_metrics(dataset, started, snapshot, cache_before))
+
+
+    def _export_metrics(self, dataset: str, started: datetime, snapshot: dict, cache_before: dict) -> dict:
+        """
+        Logs and exports the run's metrics. Returns its counts: saved, unchanged, no_data and errors.
+        """
+        summary = self.metrics.summary(since=snapshot, dataset=dataset)
+        # One aggregated line per run instead of a line per ticker
+        stages = summary["stages"]
+        stage_desc = ", ".join(f"{stage} {s['seconds']:.2f}s ({s['rows']} rows)"
+                               for stage, s in stages.items() if stage != "job")
+        skipped = summary["counters"].get("skipped_total", {})
+        skipped_desc = ", ".join(f"{reason.split('=', 1)[1]}={int(n)}" for reason, n in skipped.items()) or "none"
+        errors = summary["counters"].get("errors_total", {})
+        failed_saves = int(summary["counters"].get("stage_errors_total", {}).get("stage=save", 0) + errors.get("reason=write_failed", 0))
+        result = {
+            "saved": stages.get('save', {}).get('calls', 0) - int(skipped.get("reason=unchanged", 0)) - failed_saves,
+            "unchanged": int(skipped.get("reason=unchanged", 0)),
+            "no_data": int(skipped.get("reason=no_data", 0)),
+            "errors": int(sum(errors.values())),
+        }
+        errors = result["errors"]
+        log = logger.error if errors else logger.info
+        log("Job summary for %s: %.1fs, %d saved, %d errors, skipped: %s | %s", dataset,
+            stages.get('job', {}).get('seconds', 0), result['saved'], errors, skipped_desc, stage_desc)
+        if not self.metrics_enabled:
+            return result
+
+        if self.fetch_cache is not None:
+            cache_stats = self.fetch_cache.stats()
+            for key, value in cache_stats.items():
+                self.metrics.set_gauge(f"cache_{key}", value)
+            summary["cache"] = {key: value - cache_before.get(key, 0) if key != "size_bytes" else value
+                                for key, value in cache_stats.items()}
+        summary = {"dataset": dataset, "started": started.isoformat(), "finished": datetime.now().isoformat(), **summary}
+        try:
+            self.metrics.write_textfile(self.metrics_textfile)
+            write_run_summary(self.metrics_dir / "runs" / f"{dataset}_{started:%Y%m%d_%H%M%S}{self._file_suffix()}.json", summary)
+        except OSError as e:
+            logger.error("Could not write metrics for %s: %s", dataset, e)
+        return result
+
+
+    def _run_stages(self, units: list, fetch, process, save, dataset: str):
+        """
+        Runs fetch -> process -> save over work units, through the concurrent pipeline
+        if enabled, otherwise sequentially in the calling thread. The pipeline logs and
+        counts (errors_total) a failed unit and carries on; sequentially, the error is raised.
+        """
+        if self.pipeline_enabled:
+            stats = run_pipeline(
+                units, fetch=fetch, process=process, save=save,
+                fetch_workers=self.pipeline_fetch_workers,
+                queue_size=self.pipeline_queue_size
+            )
+            if stats["failed"]:
+                self.metrics.inc("errors_total", stats["failed"], dataset=dataset, reason="unit_failed")
+            return
 
-    def run_daily_indian_equity_job(self):
+        for unit in units:
+            for key, raw_data in fetch(unit):
+                logger.debug("Processing: %s...", key)
+                cleaned_data = process(key, raw_data)
+                if cleaned_data is not None:
+                    save(key, cleaned_data)
+
+
+    def _fetch_clean_save_equity(self, groups: list, output_dir: Path, data_type: str, period: str, merge: bool,
+                                 quality_reports: list, updated: dict, fence=None) -> list:
+        """
+        Fetches, cleans and saves each (start, tickers) group. With 'merge', new rows are merged
+        into the stored files. Data-quality reports are appended to 'quality_reports', and every
+        saved ticker is recorded in 'updated' with its first fetched Date (None when saved in full).
+        'fence' (optional callable) is checked before every save; once it returns False (the
+        worker lost its shard lease) the remaining saves are skipped.
+        Returns the tickers whose stored history was restated.
+        """
+        restated = []
+        fetched_from = {}
+        units = []
+        for start, group in groups:
+            if self.pipeline_enabled:
+                # Each work unit is one batch request; cleaning overlaps with other fetches
+                units.extend((start, group[i:i + self.yfin_batch_size]) for i in range(0, len(group), self.yfin_batch_size))
+            else:
+                units.append((start, group))
+
+        dataset = self._dataset_name(output_dir)
+
+        def process(ticker, raw_data):
+            if self.batch_clean:
+                cleaned_data = self._clean_equity(ticker, raw_data, data_type, already_cleaned=True)
+            else:
+                with self.metrics.stage("clean", dataset=dataset) as stage:
+                    cleaned_data = self._clean_equity(ticker, raw_data, data_type)
+                    stage.rows = len(cleaned_data) if cleaned_data is not None else 0
+            if cleaned_data is None:
+                self.metrics.inc("skipped_total", dataset=dataset, reason="no_data" if raw_data.empty else "empty_after_clean")
+                return None
+            if not merge:
+                return cleaned_data
+            fetched_from[ticker] = cleaned_data['Date'].min()
+            with self.metrics.stage("merge", dataset=dataset) as stage:
+                merged = self._merge_equity(ticker, cleaned_data, output_dir, restated)
+                stage.rows = len(merged) if merged is not None else 0
+            return merged
+
+        def save(ticker, cleaned_data):
+            if fence is not None and not fence():
+                self.metrics.inc("skipped_total", dataset=dataset, reason="lease_lost")
+                return
+            with self.metrics.stage("save", dataset=dataset) as stage:
+                written = self._save_equity(ticker, cleaned_data, output_dir, append=merge)
+                if written:
+                    stage.rows = len(cleaned_data)
+                    stage.bytes = frame_bytes(cleaned_data)
+            if written is None: # save_data() logged the error
+                self.metrics.inc("errors_total", dataset=dataset, reason="write_failed")
+                return
+            if written is False:
+                # Same content as stored: its features are unchanged too
+                self.metrics.inc("skipped_total", dataset=dataset, reason="unchanged")
+                return
+            updated[ticker] = fetched_from.get(ticker) if merge else None
+
+        self._run_stages(
+            units,
+            fetch=lambda unit: self._fetch_equity_unit(unit, period, output_dir, quality_reports),
+            process=process,
+            save=save,
+            dataset=dataset
+        )
+        return restated
+
+
+    def _run_equity_job(self, tickers: list, output_dir: Path, data_type: str, period: str, fence=None,
+                        compact: bool = True, saved: set = None) -> dict:
+        """
+        Fetches, validates and saves 'tickers' under 'output_dir', then updates their features.
+        The tickers whose bars were written are added to 'saved' (optional set).
+        Returns the run's counts (see _export_metrics()).
+        """
+        with self._job_metrics(output_dir) as result:
+            quality_reports = []
+            updated = {}
+            if not self.incremental_enabled:
+                self._fetch_clean_save_equity([(None, tickers)], output_dir, data_type, period, merge=False,
+                                              quality_reports=quality_reports, updated=updated, fence=fence)
+            else:
+                groups = self._plan_incremental_equity(tickers, output_dir)
+                restated = self._fetch_clean_save_equity(groups, output_dir, data_type, period, merge=True,
+                                                         quality_reports=quality_reports, updated=updated, fence=fence)
+                if restated:
+                    self.metrics.inc("restated_tickers_total", len(restated), dataset=self._dataset_name(output_dir))
+                    logger.info("Full refetch of %d %s tickers with restated history: %s", len(restated), data_type, restated)
+                    self._fetch_clean_save_equity([(None, restated)], output_dir, data_type, period, merge=False,
+                                                  quality_reports=quality_reports, updated=updated, fence=fence)
+            if saved is not None:
+                saved.update(updated)
+            if self.features.enabled and (fence is None or fence()):
+                updated.update(self.features.lagging(tickers, output_dir, updated))
+                self.features.update(updated, output_dir, fence=fence)
+            self._save_quality_report(quality_reports, output_dir)
+            if compact:
+                self._compact_dataset(output_dir)
+            self._log_cache_stats()
+        return result
+
+
+    def run_daily_indian_equity_job(self, tickers: list = None):
+        """
+        Fetches the configured Indian equity universe, or only 'tickers' if given.
+        Returns the run's counts (see job_failed()).
+        """
         logger.info("Starting daily Indian equity data collection job...")
-        tickers = self.config.get_tickers("indian_equity")
+        tickers = tickers or self.config.get_tickers("indian_equity")
         if not tickers:
             logger.warning("No Indian equity tickers configured. Skipping job.")
             return
@@ -54,20 +639,23 @@ class DataCuratorJob:
         base_data_path = self.config.get_data_path()
         output_dir = base_data_path / "indian" / "equity" / "daily"
 
-        for ticker in tickers:
-            logger.info(f"Processing Indian Equity: {ticker}...")
-            raw_data = fetch_stock_data(
-                ticker,
-                period=self.yfin_default_period,
-                interval=self.yfin_default_interval
-            )
-            self._process_and_save_equity(ticker, raw_data, output_dir, "Indian Equity")
+        saved = set()
+        result = self._run_equity_job(tickers, output_dir, "Indian Equity", self.yfin_default_period, saved=saved)
+        if self.panel.enabled:
+            self.build_indian_panel()
+        if saved:
+            self.snapshot.publish(output_dir, self.config.get_tickers("indian_equity"), EQUITY_SNAPSHOT_COLUMNS, saved=saved)
         logger.info("Daily Indian equity data collection job finished.")
+        return result
 
 
-    def run_daily_international_equity_job(self):
+    def run_daily_international_equity_job(self, tickers: list = None):
+        """
+        Fetches the configured international equity universe, or only 'tickers' if given.
+        Returns the run's counts (see job_failed()).
+        """
         logger.info("Starting daily International equity data collection job...")
-        tickers = self.config.get_tickers("international_equity")
+        tickers = tickers or self.config.get_tickers("international_equity")
         if not tickers:
             logger.warning("No International equity tickers configured. Skipping job.")
             return
@@ -75,81 +663,265 @@ class DataCuratorJob:
         base_data_path = self.config.get_data_path()
         output_dir = base_data_path / "international" / "equity" / "daily"
 
-        for ticker in tickers:
-            logger.info(f"Processing International Equity: {ticker}...")
-            raw_data = fetch_stock_data(
-                ticker,
-                period=self.yfin_intl_period, # Use specific period for intl if defined
-                interval=self.yfin_default_interval
-            )
-            self._process_and_save_equity(ticker, raw_data, output_dir, "International Equity")
+        # Use specific period for intl if defined
+        saved = set()
+        result = self._run_equity_job(tickers, output_dir, "International Equity", self.yfin_intl_period, saved=saved)
+        if saved:
+            self.snapshot.publish(output_dir, self.config.get_tickers("international_equity"), EQUITY_SNAPSHOT_COLUMNS,
+                                   saved=saved)
         logger.info("Daily International equity data collection job finished.")
+        return result
+
+
+    def _plan_intraday(self, tickers: list, store: IntradayStore, interval: str, holidays: set) -> list:
+        """
+        Splits the intraday job into (batch, batch_id, start, end) units: ticker batches of
+        intraday.batch_size times request windows of intraday.chunk_days. A unit is skipped when
+        every weekday of its window (except listed holidays) is before today and already stored
+        complete for its batch, so reruns only fetch today's window, gaps and days some of the
+        batch's tickers were missing from.
+        """
+        windows = intraday_windows(interval, self.intraday_settings.get("lookback_days", 30),
+                                   self.intraday_settings.get("chunk_days", 5))
+        batch_size = max(1, int(self.intraday_settings.get("batch_size", 50)))
+        today = date.today()
+        units = []
+        complete = 0
+        for offset in range(0, len(tickers), batch_size):
+            batch = tickers[offset:offset + batch_size]
+            batch_id = store.batch_id(batch)
+            for start, end in windows:
+                days = [day for day in pd.bdate_range(start, end - timedelta(days=1)) if day.strftime("%Y-%m-%d") not in holidays]
+                if days and all(day.date() < today and store.has_day(interval, day, batch_id) for day in days):
+                    complete += 1
+                    continue
+                units.append((batch, batch_id, start, end))
+        logger.info("Intraday plan (%s): %d (batch, window) units to fetch, %d already stored.", interval, len(units), complete)
+        return units
+
+
+    def _run_intraday_job(self, tickers: list, output_dir: Path, market: str, fence=None):
+        """
+        Streams intraday bars into an IntradayStore under 'output_dir': each unit is fetched
+        (one request per batch and window), cleaned and written as one file per day before the
+        next is held, so peak memory is bounded by batch_size x chunk_days, not the lookback.
+        Saves are skipped once 'fence' (optional callable) returns False.
+        Returns the run's counts (see _export_metrics()).
+        """
+        interval = self.intraday_settings.get("interval", "5m")
+        store = IntradayStore(output_dir, compression=self.intraday_settings.get("compression", "zstd"))
+        dataset = self._dataset_name(output_dir)
+        holidays = set(((self.validation_settings.get("holidays", {}) or {}).get(market, []) or []))
+
+        def fetch(unit):
+            batch, batch_id, start, end = unit
+            with self.metrics.stage("fetch", dataset=dataset) as stage:
+                raw_frames = fetch_stock_data_batch(
+                    batch,
+                    interval=interval,
+                    chunk_size=len(batch),
+                    retries=self.yfin_retries,
+                    delay=self.yfin_retry_delay,
+                    backend=self.stock_backend,
+                    rate_limiter=self.rate_limiters.get("yfinance"),
+                    start=start.isoformat(),
+                    end=end.isoformat(),
+                    cache=None, # The stored day files already make reruns incremental
+                    metrics=self.metrics.bind(dataset=dataset)
+                )
+                raw = combine_ticker_frames(raw_frames)
+                del raw_frames
+                stage.rows = len(raw)
+                stage.bytes = frame_bytes(raw)
+            return [((batch_id, start), raw)]
+
+        def process(key, raw):
+            if raw.empty:
+                self.metrics.inc("skipped_total", dataset=dataset, reason="no_data")
+                return None
+            with self.metrics.stage("clean", dataset=dataset) as stage:
+                cleaned = clean_stock_universe(raw, downcast=self.downcast_floats, float_atol=self.downcast_atol)
+                stage.rows = len(cleaned)
+            return cleaned if not cleaned.empty else None
+
+        def save(key, cleaned):
+            batch_id, _ = key
+            if fence is not None and not fence():
+                self.metrics.inc("skipped_total", dataset=dataset, reason="lease_lost")
+                return
+            with self.metrics.stage("save", dataset=dataset) as stage:
+                stage.rows = store.write_chunk(restore_floats(cleaned, self.downcast_atol), interval, batch_id,
+                                               tickers=batches[batch_id])
+                stage.bytes = frame_bytes(cleaned)
+
+        with self._job_metrics(output_dir) as result:
+            units = self._plan_intraday(tickers, store, interval, holidays)
+            batches = {batch_id: batch for batch, batch_id, _, _ in units}
+            self._run_stages(units, fetch=fetch, process=process, save=save, dataset=dataset)
+        return result
+
+
+    def run_intraday_equity_job(self, market: str = "indian", tickers: list = None):
+        """
+        Fetches intraday bars for the market's configured equity universe, or only 'tickers' if given.
+        Returns the run's counts (see job_failed()).
+        """
+        logger.info("Starting %s intraday equity data collection job...", market)
+        tickers = tickers or self.config.get_tickers(f"{market}_equity")
+        if not tickers:
+            logger.warning("No %s equity tickers configured. Skipping intraday job.", market)
+            return
 
+        output_dir = self.config.get_data_path() / market / "equity" / "intraday"
+        result = self._run_intraday_job(tickers, output_dir, market)
+        logger.info("%s intraday equity data collection job finished.", market.capitalize())
+        return result
 
-    def run_daily_indian_macro_job(self):
-        logger.info("Starting daily Indian macro data collection job (via FRED)...")
-        series_ids = self.config.get_tickers("indian_macro_fred")
-
-        if not self.fred_api_key:
-            logger.error("FRED API key not found. Skipping Indian macro data job.")
-            return
-        if not series_ids:
-            logger.warning("No Indian macro FRED series IDs configured. Skipping job.")
-            return
 
-        base_data_path = self.config.get_data_path()
-        output_dir = base_data_path / "indian" / "macro" # Path for macro data
+    def _macro_file_path(self, series_id: str, output_dir: Path) -> Path:
+        file_name = f"{safe_filename(series_id)}.{self.default_file_format}"
+        return output_dir / file_name
 
-        for series_id in series_ids:
-            logger.info(f"Processing Indian Macro (FRED): {series_id}...")
-            # For FRED, you might not need period/interval like yfinance,
-            # it fetches all available historical data by default.
-            # You can pass start_date if needed.
-            raw_data = fetch_fred_series(series_id, self.fred_api_key)
 
-            if raw_data.empty:
-                logger.warning(f"No data fetched for FRED series {series_id}. Skipping.")
-                continue
+    def _fetch_macro(self, series_id: str, output_dir: Path) -> pd.DataFrame:
+        dataset = self._dataset_name(output_dir)
+        with self.metrics.stage("fetch", dataset=dataset) as stage:
+            raw_data = self._fetch_macro_series(series_id, output_dir, self.metrics.bind(dataset=dataset))
+            stage.rows = len(raw_data)
+            stage.bytes = frame_bytes(raw_data)
+        return raw_data
 
-            cleaned_data = clean_macro_data(raw_data, series_id)
 
-            if cleaned_data.empty:
-                logger.warning(f"Data for FRED series {series_id} became empty after cleaning. Skipping.")
-                continue
+    def _fetch_macro_series(self, series_id: str, output_dir: Path, metrics=None) -> pd.DataFrame:
+        # FRED returns all available history by default. In incremental mode only
+        # observations from the last stored date onwards are requested.
+        start_date = None
+        if self.incremental_enabled:
+            start_date = self._last_stored_date(series_id, output_dir, self._macro_file_path(series_id, output_dir))
+        return fetch_fred_series(series_id, self.fred_api_key, start_date=start_date,
+                                 rate_limiter=self.rate_limiters.get("fred"), cache=self.fetch_cache,
+                                 backend=self.fred_backend, metrics=metrics)
 
-            file_name = f"{series_id.replace(':', '_')}.{self.default_file_format}"
-            file_path = output_dir / file_name
-            save_data(cleaned_data, str(file_path), series_id, file_format=self.default_file_format)
-        logger.info("Daily Indian macro data collection job (via FRED) finished.")
 
+    def _clean_macro(self, series_id: str, raw_data: pd.DataFrame, output_dir: Path):
+        with self.metrics.stage("clean", dataset=self._dataset_name(output_dir)) as stage:
+            cleaned_data = self._clean_macro_series(series_id, raw_data, output_dir)
+            stage.rows = len(cleaned_data) if cleaned_data is not None else 0
+        if cleaned_data is None:
+            self.metrics.inc("skipped_total", dataset=self._dataset_name(output_dir),
+                             reason="no_data" if raw_data.empty else "empty_after_clean")
+        return cleaned_data
 
-def run_scheduler(config: ConfigManager):
-    curator_job = DataCuratorJob(config)
 
-    # Schedule jobs
-    # Indian Equity (adjust time as needed, e.g., after Indian market close)
-    schedule.every().day.at("15:45").do(curator_job.run_daily_indian_equity_job).tag("indian_equity")
-    # International Equity (adjust time, e.g., after US market close)
-    schedule.every().day.at("02:00").do(curator_job.run_daily_international_equity_job).tag("intl_equity") # e.g., 2 AM local time
-    # Indian Macro (FRED data updates at various times, daily might be fine)
-    schedule.every().day.at("04:00").do(curator_job.run_daily_indian_macro_job).tag("indian_macro")
+    def _clean_macro_series(self, series_id: str, raw_data: pd.DataFrame, output_dir: Path):
+        if raw_data.empty:
+            logger.debug("No data fetched for FRED series %s. Skipping.", series_id)
+            return None
 
-    # For testing - run immediately and then schedule
-    # curator_job.run_daily_indian_equity_job()
-    # curator_job.run_daily_international_equity_job()
-    # curator_job.run_daily_indian_macro_job()
+        cleaned_data = clean_macro_data(raw_data, series_id)
 
+        if cleaned_data.empty:
+            logger.debug("Data for FRED series %s became empty after cleaning. Skipping.", series_id)
+            return None
+
+        if self.dataset_store is not None:
+            # Appended (incremental) or replaced as a whole: either way only worth a write if
+            # an observation is new or revised. Appended fragments win over older ones.
+            existing = self._read_stored(series_id, output_dir, self._macro_file_path(series_id, output_dir))
+            changed = changed_rows(existing, cleaned_data, ['Value'])
+            if self.incremental_enabled or (changed.empty and len(existing) == len(cleaned_data)):
+                return changed # Empty: _save_macro() counts it as unchanged
+        elif self.incremental_enabled:
+            # Overlapping observations take the newly fetched (possibly revised) values
+            existing = self._read_stored(series_id, output_dir, self._macro_file_path(series_id, output_dir))
+            cleaned_data = merge_incremental(existing, cleaned_data)
+        return cleaned_data
+
+
+    def _save_macro(self, series_id: str, cleaned_data: pd.DataFrame, output_dir: Path, saved: set = None):
+        file_path = self._macro_file_path(series_id, output_dir)
+        dataset = self._dataset_name(output_dir)
+        with self.metrics.stage("save", dataset=dataset) as stage:
+            written = self._write_stored(series_id, cleaned_data, output_dir, file_path, append=self.incremental_enabled)
+            if written:
+                stage.rows = len(cleaned_data)
+                stage.bytes = frame_bytes(cleaned_data)
+        if written is None: # save_data() logged the error
+            self.metrics.inc("errors_total", dataset=dataset, reason="write_failed")
+        elif written is False:
+            self.metrics.inc("skipped_total", dataset=dataset, reason="unchanged")
+        elif saved is not None:
+            saved.add(series_id)
+
+
+    def run_daily_indian_macro_job(self, tickers: list = None):
+        """
+        Fetches the configured FRED series, or only the series IDs in 'tickers' if given.
+        Returns the run's counts (see job_failed()).
+        """
+        logger.info("Starting daily Indian macro data collection job (via FRED)...")
+        series_ids = tickers or self.config.get_tickers("indian_macro_fred")
 
-    logger.info("Scheduler started. Waiting for scheduled jobs...")
-    for job in schedule.jobs:
-        logger.info(f"Scheduled job: {job.tags} next run at {job.next_run}")
+        if not self.fred_api_key:
+            logger.error("FRED API key not found. Skipping Indian macro data job.")
+            return {"errors": 1}
+        if not series_ids:
+            logger.warning("No Indian macro FRED series IDs configured. Skipping job.")
+            return
 
+        base_data_path = self.config.get_data_path()
+        output_dir = base_data_path / "indian" / "macro" # Path for macro data
 
-    try:
-        while True:
-            schedule.run_pending()
-            time.sleep(30) # Check every 30 seconds
-    except KeyboardInterrupt:
-        logger.info("Scheduler stopped by user.")
-    except Exception as e:
-        logger.critical(f"A critical error occurred in the scheduler loop: {e}", exc_info=True)
\ No newline at end of file
+        saved = set()
+        with self._job_metrics(output_dir) as result:
+            self._run_stages(
+                series_ids,
+                fetch=lambda series_id: [(series_id, self._fetch_macro(series_id, output_dir))],
+                process=lambda series_id, raw_data: self._clean_macro(series_id, raw_data, output_dir),
+                save=lambda series_id, cleaned_data: self._save_macro(series_id, cleaned_data, output_dir, saved),
+                dataset=self._dataset_name(output_dir)
+            )
+            self._compact_dataset(output_dir)
+            self._log_cache_stats()
+        if self.panel.enabled:
+            self.build_indian_panel()
+        if saved:
+            self.snapshot.publish(output_dir, self.config.get_tickers("indian_macro_fred"), ['Value'], id_column='SeriesID',
+                                   saved=saved)
+        logger.info("Daily Indian macro data collection job (via FRED) finished.")
+        return result
+
+
+    def build_indian_panel(self):
+        self.panel.build("indian", self.config.get_tickers("indian_macro_fred"))
+
+
+    def run_shard(self, job: str, tickers: list, fence=None):
+        """
+        Runs one ticker shard of a SHARDED_JOBS job (see app/worker.py). Writes stop once
+        'fence' returns False; dataset compaction and the macro panel are left to finish_sharded_run().
+        Returns the shard's counts (see _export_metrics()).
+        """
+        _, parts = self.SHARDED_JOBS[job]
+        output_dir = self.config.get_data_path().joinpath(*parts)
+        if job == "indian_intraday":
+            return self._run_intraday_job(tickers, output_dir, "indian", fence=fence)
+        if job == "indian_equity":
+            return self._run_equity_job(tickers, output_dir, "Indian Equity", self.yfin_default_period, fence=fence, compact=False)
+        return self._run_equity_job(tickers, output_dir, "International Equity", self.yfin_intl_period, fence=fence, compact=False)
+
+
+    def finish_sharded_run(self, job: str):
+        """
+        Run-level steps after the last shard of a job run, done once by the worker that finished it.
+        """
+        category, parts = self.SHARDED_JOBS[job]
+        if job == "indian_intraday":
+            return
+        output_dir = self.config.get_data_path().joinpath(*parts)
+        if self.dataset_store is not None:
+            # In the foreground: the worker process may exit right after
+            self.dataset_store.compact(self._dataset_name(output_dir))
+        if job == "indian_equity" and self.panel.enabled:
+            self.build_indian_panel()
+        self.snapshot.publish(output_dir, self.config.get_tickers(category), EQUITY_SNAPSHOT_COLUMNS)
@@ -0,0 +1,116 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from ..processing.cleaner import split_universe
+from ..processing.features import feature_columns, feature_lookback, on_or_after, update_features
+from ..utils.metrics import frame_bytes
+
+logger = logging.getLogger("LocalQuantAgent")
+
+
+class FeatureStage:
+    """
+    Technical features of a DataCuratorJob's equity tickers, stored next to their bars
+    (e.g. equity/daily -> equity/features) through the job's storage methods.
+    """
+    def __init__(self, job, settings: dict):
+        self.job = job
+        self.enabled = settings.get("enabled", False)
+        self.kwargs = {
+            "returns": settings.get("returns", True),
+            "log_returns": settings.get("log_returns", True),
+            "sma_windows": tuple(settings.get("sma_windows", [20, 50])),
+            "volatility_windows": tuple(settings.get("volatility_windows", [20])),
+            "atr_windows": tuple(settings.get("atr_windows", [14])),
+        }
+        self.lookback = feature_lookback(self.kwargs["sma_windows"], self.kwargs["volatility_windows"],
+                                         self.kwargs["atr_windows"])
+
+    def lagging(self, tickers: list, output_dir: Path, updated: dict) -> dict:
+        """
+        Tickers not saved in this run whose stored features end before their stored bars, e.g.
+        bars saved by a worker that crashed or lost its shard lease before the feature step.
+        Returns ticker -> last bar date, in the form update() takes.
+        """
+        job = self.job
+        features_dir = output_dir.parent / "features"
+        lagging = {}
+        for ticker in tickers:
+            if ticker in updated:
+                continue
+            last_bar = job._last_stored_date(ticker, output_dir, job._equity_file_path(ticker, output_dir))
+            if last_bar is None:
+                continue
+            last_feature = job._last_stored_date(ticker, features_dir, job._equity_file_path(ticker, features_dir))
+            if last_feature is None or last_feature < last_bar:
+                lagging[ticker] = last_bar
+        if lagging:
+            logger.info("Features of %d tickers lag their stored bars. Catching up.", len(lagging))
+            logger.debug("Lagging features: %s", sorted(lagging))
+        return lagging
+
+    def update(self, updated: dict, output_dir: Path, fence=None):
+        """
+        Recomputes technical features for the tickers saved in this run ('updated': ticker ->
+        first new Date, or None). Features are recomputed from the earlier of that date and the
+        day after the last stored feature row, using only bars from the lookback before it;
+        new or fully refetched tickers are recomputed in full. Everything is read, computed and
+        merged as one universe-wide frame; only the final writes are per ticker. Each write is
+        skipped once 'fence' (optional callable) returns False, as for the bars.
+        """
+        if not updated:
+            return
+        job = self.job
+        features_dir = output_dir.parent / "features"
+        columns = feature_columns(**self.kwargs)
+
+        dataset = job._dataset_name(output_dir)
+        with job.metrics.stage("features", dataset=dataset) as stage:
+            # Flat files are rewritten whole, so their stored features are needed; the dataset store only appends
+            stored = job._load_long(list(updated), features_dir, columns if job.dataset_store is None else columns[:1])
+            last_feature = stored.groupby('Ticker', observed=True)['Date'].max() if not stored.empty else pd.Series(dtype=object)
+            last_feature.index = last_feature.index.astype(str)
+            from_dates = {}
+            for ticker, from_date in updated.items():
+                last_date = last_feature.get(ticker)
+                if from_date is None or last_date is None or pd.isna(last_date):
+                    from_dates[ticker] = None
+                else:
+                    from_dates[ticker] = min(pd.Timestamp(from_date), last_date + pd.Timedelta(days=1))
+
+            frames = []
+            full = [ticker for ticker, from_date in from_dates.items() if from_date is None]
+            if full:
+                frames.append(job._load_long(full, output_dir, ['Open', 'High', 'Low', 'Close']))
+            incremental = [ticker for ticker, from_date in from_dates.items() if from_date is not None]
+            by_from_date = {}
+            for ticker in incremental:
+                by_from_date.setdefault(from_dates[ticker], []).append(ticker)
+            for from_date, group in by_from_date.items():
+                # One read per from-date, so a ticker lagging far behind does not widen the others' reads
+                # (calendar slack for weekends and holidays on top of the lookback in bars)
+                start = from_date - pd.offsets.BDay(int(self.lookback * 1.1) + 10)
+                frames.append(job._load_long(group, output_dir, ['Open', 'High', 'Low', 'Close'], start=start))
+            frames = [frame for frame in frames if not frame.empty]
+            if not frames:
+                return
+            features = update_features(pd.concat(frames, ignore_index=True), from_dates, **self.kwargs)
+            stage.rows = len(features)
+            stage.bytes = frame_bytes(features)
+
+            if job.dataset_store is None and not stored.empty:
+                # Stored rows before each ticker's from-date are kept; the rest are replaced
+                kept = stored[~on_or_after(stored, from_dates) & stored['Ticker'].astype(str).isin(incremental).to_numpy()]
+                features = pd.concat([kept.astype({'Ticker': str}), features.astype({'Ticker': str})], ignore_index=True)
+                features = features.sort_values(['Ticker', 'Date'], kind='stable')
+
+            for ticker, ticker_features in split_universe(features).items():
+                if fence is not None and not fence():
+                    job.metrics.inc("skipped_total", dataset=dataset, reason="lease_lost")
+                    continue
+                file_path = job._equity_file_path(ticker, features_dir)
+                append = job.dataset_store is not None and from_dates[ticker] is not None
+                job._write_stored(ticker, ticker_features.reset_index(drop=True), features_dir, file_path, append=append)
+        logger.info("Features updated for %d tickers (%d in full) in %s.", len(from_dates), len(full), features_dir)
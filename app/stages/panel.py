@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from ..processing.panel import build_macro_panel
+from ..storage.file_handler import read_saved_data, save_data
+
+logger = logging.getLogger("LocalQuantAgent")
+
+
+class MacroPanelStage:
+    """
+    Macro series of a DataCuratorJob as-of joined onto the equity trading calendar, rebuilt
+    when an input changes.
+    """
+    def __init__(self, job, settings: dict):
+        self.job = job
+        self.settings = settings
+        self.enabled = settings.get("enabled", False)
+        self._lock = threading.Lock() # Equity and macro jobs may both trigger a rebuild
+
+    def build(self, market: str, series_ids: list):
+        """
+        Rebuilds data/<market>/panel/macro_panel.<format> from the stored macro series and the
+        trading days of the 'calendar_ticker' bars. A sidecar JSON keeps the fingerprints of the
+        inputs the panel was built from, so unchanged inputs cost only a read and a hash.
+        """
+        job = self.job
+        base_dir = job.config.get_data_path() / market
+        panel_dir = base_dir / "panel"
+        file_format = "parquet" if job.dataset_store is not None else job.default_file_format
+        panel_path = panel_dir / f"macro_panel.{file_format}"
+        inputs_path = panel_dir / "macro_panel.inputs.json"
+
+        with self._lock, job.metrics.stage("panel", dataset=f"{market}_panel") as stage:
+            calendar_ticker = self.settings.get("calendar_ticker", "^NSEI")
+            bars = job._load_long([calendar_ticker], base_dir / "equity" / "daily", ['Close'])
+            if bars.empty:
+                logger.warning("No stored bars for calendar ticker %s. Skipping %s macro panel.", calendar_ticker, market)
+                return
+            macro_dir = base_dir / "macro"
+            series = {}
+            for series_id in series_ids:
+                df = job._read_stored(series_id, macro_dir, job._macro_file_path(series_id, macro_dir))
+                if not df.empty:
+                    series[series_id] = df[['Date', 'Value']]
+            if not series:
+                logger.warning("No stored macro series for %s. Skipping macro panel.", market)
+                return
+
+            stored_inputs = {}
+            if inputs_path.exists():
+                try:
+                    with open(inputs_path, 'r') as f:
+                        stored_inputs = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning("Could not read %s, rebuilding the panel: %s", inputs_path, e)
+            stored_panel = read_saved_data(str(panel_path), file_format) if stored_inputs else None
+
+            panel, inputs, rebuilt = build_macro_panel(
+                pd.DatetimeIndex(bars['Date']),
+                series,
+                release_lags=self.settings.get("release_lags_days", {}) or {},
+                default_lag_days=self.settings.get("default_release_lag_days", 1),
+                stored_panel=stored_panel,
+                stored_inputs=stored_inputs
+            )
+            if not rebuilt:
+                logger.info("Inputs of the %s macro panel are unchanged. Skipping rebuild.", market)
+                return
+            save_data(panel, str(panel_path), f"{market} macro panel", file_format=file_format,
+                      manifest=job._manifest(panel_dir))
+            job._flush_manifests()
+            # Written after the panel: a crash in between only causes one extra rebuild
+            tmp_path = inputs_path.with_name(f".{inputs_path.name}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(inputs, f, indent=2)
+            os.replace(tmp_path, inputs_path)
+            stage.rows = len(panel)
@@ -0,0 +1,72 @@
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from ..storage.snapshot import open_snapshot, publish_snapshot
+from ..utils.metrics import frame_bytes
+
+logger = logging.getLogger("LocalQuantAgent")
+
+
+class SnapshotStage:
+    """
+    Arrow IPC snapshot of a DataCuratorJob's latest curated data, republished after each job
+    that saved something: one table per dataset (e.g. "indian_equity_daily").
+    """
+    def __init__(self, job, settings: dict, root: Path):
+        self.job = job
+        self.enabled = settings.get("enabled", False)
+        self.root = root
+        self.keep_versions = settings.get("keep_versions", 3)
+
+    def publish(self, output_dir: Path, keys: list, columns: list, id_column: str = 'Ticker', saved: set = None):
+        """
+        Republishes the dataset under 'output_dir' (all stored rows of 'keys') as one table of
+        the shared snapshot. With 'saved' (the keys this run wrote), only those and keys missing
+        from the published table are read from storage; every other key's rows are carried over
+        from the current snapshot version. Without it, everything is read.
+        """
+        if not self.enabled:
+            return
+        job = self.job
+        dataset = job._dataset_name(output_dir)
+        job._wait_for_compaction(dataset) # Compaction removes the fragments it merges
+        with job.metrics.stage("snapshot", dataset=dataset) as stage:
+            carried = self._published_rows(dataset, keys, columns, id_column) if saved is not None else None
+            if carried is None:
+                df = job._load_long(keys, output_dir, columns, id_column=id_column)
+            else:
+                present = set(carried[id_column].astype(str).unique())
+                reload = [key for key in keys if key in saved or key not in present]
+                carried = carried[~carried[id_column].astype(str).isin(reload)]
+                fresh = job._load_long(reload, output_dir, columns, id_column=id_column) if reload else pd.DataFrame()
+                frames = [frame for frame in (carried, fresh) if not frame.empty]
+                df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                if not df.empty:
+                    df[id_column] = df[id_column].astype(str).astype('category')
+                    df = df.sort_values([id_column, 'Date'], kind='stable').reset_index(drop=True)
+                logger.debug("Snapshot of %s: %d keys read from storage, %d carried over.",
+                             dataset, len(reload), len(present - set(reload)))
+            if df.empty:
+                logger.warning("No stored data for %s. Not publishing it to the snapshot.", dataset)
+                return
+            version = publish_snapshot(self.root, {dataset: df}, keep_versions=self.keep_versions)
+            stage.rows = len(df)
+            stage.bytes = frame_bytes(df)
+        logger.info("Published %s (%d rows) as snapshot version %s.", dataset, len(df), version)
+
+    def _published_rows(self, dataset: str, keys: list, columns: list, id_column: str):
+        """
+        Rows of 'keys' in the current snapshot table for 'dataset', or None if there is no such
+        table or it was published with other columns.
+        """
+        try:
+            table = open_snapshot(self.root, dataset)
+        except (FileNotFoundError, OSError):
+            return None
+        expected = ['Date', id_column] + [col for col in columns if col not in ('Date', id_column)]
+        if table.schema.names != expected:
+            return None
+        df = table.to_pandas()
+        return df[df[id_column].astype(str).isin(set(map(str, keys)))]
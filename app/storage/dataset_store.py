@@ -0,0 +1,287 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .schema import storage_frame
+
+logger = logging.getLogger("LocalQuantAgent")
+
+class DatasetStore:
+    """
+    Partitioned Parquet store laid out as
+
+        <root>/dataset=<name>/ticker=<ticker>/year=<yyyy>/part-<time_ns>-<id>.parquet
+
+    Datasets named in 'unpartitioned' (sparse series such as monthly macro data, where a year
+    holds a handful of rows) keep their fragments directly in the ticker directory.
+    - Appends write new fragments only (O(new rows)), never rewrite history.
+    - Every file is written to a dot-prefixed temp file in the target directory and
+      renamed into place, so readers never see a partially written fragment.
+      (Dot/underscore-prefixed files are ignored by pyarrow.dataset readers.)
+    - Fragment names sort by write time; when fragments overlap on 'Date', the newest wins.
+    - compact() merges small fragments of a partition into one file.
+    - replace() swaps a ticker's directory with two renames; a crash between them leaves the
+      old data in a hidden .trash- directory, which recover() (run on open and before each
+      compaction) moves back.
+    """
+    def __init__(self, root, compression: str = "zstd", compact_min_fragments: int = 8,
+                 recover_after: float = 600, unpartitioned=()):
+        self.root = Path(root)
+        self.unpartitioned = {self.safe_name(dataset) for dataset in unpartitioned}
+        self.compression = compression
+        self.compact_min_fragments = max(2, int(compact_min_fragments))
+        self.recover_after = recover_after
+        self._compaction_lock = threading.Lock()
+        self.recover()
+
+    # --- Paths ---------------------------------------------------------------------
+
+    @staticmethod
+    def safe_name(value: str) -> str:
+        return str(value).replace("/", "_").replace(":", "_").replace("^", "_").replace("=", "_")
+
+    def ticker_dir(self, dataset: str, ticker: str) -> Path:
+        return self.root / f"dataset={self.safe_name(dataset)}" / f"ticker={self.safe_name(ticker)}"
+
+    def partition_dir(self, dataset: str, ticker: str, year: int) -> Path:
+        return self.ticker_dir(dataset, ticker) / f"year={int(year)}"
+
+    @staticmethod
+    def _fragments(partition_dir: Path) -> list:
+        if not partition_dir.is_dir():
+            return []
+        return sorted(p for p in partition_dir.glob("part-*.parquet"))
+
+    def _year_dirs(self, dataset: str, ticker: str) -> list:
+        ticker_dir = self.ticker_dir(dataset, ticker)
+        if not ticker_dir.is_dir():
+            return []
+        return sorted((p for p in ticker_dir.glob("year=*") if p.is_dir()), key=lambda p: int(p.name.split("=", 1)[1]))
+
+    def by_year(self, dataset: str) -> bool:
+        return self.safe_name(dataset) not in self.unpartitioned
+
+    # --- Writing -------------------------------------------------------------------
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> pa.Table:
+        """
+        Converts a frame to an Arrow table with stable column types (see storage_frame()).
+        """
+        df = storage_frame(df).copy()
+        df['Date'] = pd.to_datetime(df['Date']).astype("datetime64[ns]")
+        if 'Volume' in df.columns:
+            df['Volume'] = df['Volume'].fillna(0).astype("int64")
+        for col in ('Ticker', 'SeriesID'):
+            if col in df.columns:
+                df[col] = df[col].astype(str)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def _write_fragment(self, table: pa.Table, partition_dir: Path, suffix: str = None, time_ns: int = None) -> Path:
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        name = f"part-{time_ns or time.time_ns():020d}-{suffix or uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = partition_dir / f".tmp-{uuid.uuid4().hex}.parquet"
+        final_path = partition_dir / name
+        try:
+            pq.write_table(table, tmp_path, compression=self.compression)
+            os.replace(tmp_path, final_path) # Atomic on POSIX and Windows
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return final_path
+
+    def _write_by_year(self, df: pd.DataFrame, dataset: str, ticker: str, base_dir: Path = None) -> int:
+        if not self.by_year(dataset):
+            self._write_fragment(self._to_table(df), base_dir or self.ticker_dir(dataset, ticker))
+            return len(df)
+        years = pd.to_datetime(df['Date']).dt.year
+        for year, year_df in df.groupby(years.to_numpy(), sort=True):
+            if base_dir is None:
+                partition_dir = self.partition_dir(dataset, ticker, year)
+            else:
+                partition_dir = base_dir / f"year={int(year)}"
+            self._write_fragment(self._to_table(year_df), partition_dir)
+        return len(df)
+
+    def append(self, df: pd.DataFrame, dataset: str, ticker: str) -> int:
+        """
+        Appends rows as new fragments (one per year touched, or a single one for an unpartitioned
+        dataset). Returns the number of rows written.
+        """
+        if df is None or df.empty:
+            logger.warning(f"No rows to append for {ticker} in dataset '{dataset}'.")
+            return 0
+        rows = self._write_by_year(df, dataset, ticker)
+        logger.debug("Appended %d rows for %s to dataset '%s'.", rows, ticker, dataset)
+        return rows
+
+    def replace(self, df: pd.DataFrame, dataset: str, ticker: str) -> int:
+        """
+        Replaces all stored data for a ticker (e.g. after a split restatement).
+        The new partitions are staged in a hidden directory and swapped in with renames.
+        """
+        if df is None or df.empty:
+            logger.warning(f"No rows to write for {ticker} in dataset '{dataset}'.")
+            return 0
+        ticker_dir = self.ticker_dir(dataset, ticker)
+        staging_dir = ticker_dir.parent / f".staging-{ticker_dir.name}-{uuid.uuid4().hex[:8]}"
+        trash_dir = ticker_dir.parent / f".trash-{ticker_dir.name}-{uuid.uuid4().hex[:8]}"
+        try:
+            rows = self._write_by_year(df, dataset, ticker, base_dir=staging_dir)
+            if ticker_dir.exists():
+                os.replace(ticker_dir, trash_dir)
+            os.replace(staging_dir, ticker_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            shutil.rmtree(trash_dir, ignore_errors=True)
+        logger.debug("Replaced stored data for %s in dataset '%s' with %d rows.", ticker, dataset, rows)
+        return rows
+
+    def recover(self) -> int:
+        """
+        Cleans up after replace() calls interrupted by a crash: an orphaned .trash- directory
+        is moved back if its ticker has no directory (the crash hit between the two renames),
+        otherwise removed; orphaned .staging- directories are removed. Only directories older
+        than 'recover_after' seconds are touched, so a replace() in progress in another
+        process is left alone. Returns the number of tickers restored.
+        """
+        restored = 0
+        now = time.time()
+        for hidden_dir in sorted(self.root.glob("dataset=*/.*-ticker=*")):
+            try:
+                if not hidden_dir.is_dir() or now - hidden_dir.stat().st_mtime < self.recover_after:
+                    continue
+                kind, _, rest = hidden_dir.name[1:].partition("-")
+                ticker_dir = hidden_dir.parent / rest.rsplit("-", 1)[0]
+                if kind == "trash" and not ticker_dir.exists():
+                    os.replace(hidden_dir, ticker_dir)
+                    restored += 1
+                    logger.warning(f"Restored {ticker_dir} from {hidden_dir.name} left by an interrupted replace.")
+                elif kind in ("trash", "staging"):
+                    shutil.rmtree(hidden_dir, ignore_errors=True)
+            except OSError as e:
+                logger.error(f"Could not recover {hidden_dir}: {e}")
+        return restored
+
+    # --- Reading -------------------------------------------------------------------
+
+    @staticmethod
+    def _read_fragments(paths: list, columns: list = None) -> pd.DataFrame:
+        if not paths:
+            return pd.DataFrame()
+        frames = []
+        for path in paths:
+            try:
+                frames.append(pq.read_table(path, columns=columns, memory_map=True).to_pandas())
+            except FileNotFoundError:
+                continue # Removed by a concurrent compaction; its rows live in the compacted file
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        if 'Date' in df.columns:
+            # Later fragments win on overlapping dates
+            df = df.drop_duplicates(subset=['Date'], keep='last').sort_values('Date').reset_index(drop=True)
+        return df
+
+    def read(self, dataset: str, ticker: str, columns: list = None, years: list = None) -> pd.DataFrame:
+        """
+        Reads a ticker's rows (optionally only some 'years' and 'columns'), de-duplicated by Date.
+        """
+        if columns is not None and 'Date' not in columns:
+            columns = ['Date'] + list(columns)
+        if not self.by_year(dataset):
+            df = self._read_fragments(self._fragments(self.ticker_dir(dataset, ticker)), columns)
+            if years is not None and not df.empty:
+                df = df[df['Date'].dt.year.isin(years)].reset_index(drop=True)
+            return df
+        paths = []
+        for year_dir in self._year_dirs(dataset, ticker):
+            if years is not None and int(year_dir.name.split("=", 1)[1]) not in years:
+                continue
+            paths.extend(self._fragments(year_dir))
+        return self._read_fragments(paths, columns)
+
+    def read_latest(self, dataset: str, ticker: str, columns: list = None) -> pd.DataFrame:
+        """
+        Reads only the most recent year partition, which is enough to find the last stored bar
+        (everything, for an unpartitioned dataset).
+        """
+        if not self.by_year(dataset):
+            return self.read(dataset, ticker, columns)
+        year_dirs = self._year_dirs(dataset, ticker)
+        if not year_dirs:
+            return pd.DataFrame()
+        if columns is not None and 'Date' not in columns:
+            columns = ['Date'] + list(columns)
+        return self._read_fragments(self._fragments(year_dirs[-1]), columns)
+
+    def last_date(self, dataset: str, ticker: str):
+        df = self.read_latest(dataset, ticker, columns=['Date'])
+        if df.empty:
+            return None
+        last_date = df['Date'].max()
+        return None if pd.isna(last_date) else last_date
+
+    # --- Compaction ----------------------------------------------------------------
+
+    def _compact_partition(self, partition_dir: Path) -> bool:
+        fragments = self._fragments(partition_dir)
+        if len(fragments) < self.compact_min_fragments:
+            return False
+
+        df = self._read_fragments(fragments)
+        if df.empty:
+            return False
+        # Name the compacted file after the newest fragment it replaces, so fragments
+        # appended while compacting still sort (and win) after it.
+        newest_time_ns = int(fragments[-1].name.split("-")[1])
+        self._write_fragment(self._to_table(df), partition_dir, suffix=f"compacted{uuid.uuid4().hex[:8]}",
+                             time_ns=newest_time_ns)
+        for fragment in fragments:
+            fragment.unlink(missing_ok=True)
+        logger.debug("Compacted %d fragments in %s.", len(fragments), partition_dir)
+        return True
+
+    def compact(self, dataset: str = None) -> int:
+        """
+        Merges partitions with at least 'compact_min_fragments' fragments into single files.
+        Returns the number of partitions compacted.
+        """
+        if not self._compaction_lock.acquire(blocking=False):
+            logger.info("Compaction already running. Skipping.")
+            return 0
+        try:
+            self.recover()
+            pattern = f"dataset={self.safe_name(dataset)}" if dataset else "dataset=*"
+            partition_dirs = []
+            for dataset_dir in sorted(self.root.glob(pattern)):
+                unpartitioned = dataset_dir.name.split("=", 1)[1] in self.unpartitioned
+                partition_dirs.extend(sorted(dataset_dir.glob("ticker=*" if unpartitioned else "ticker=*/year=*")))
+            compacted = 0
+            for partition_dir in partition_dirs:
+                try:
+                    if self._compact_partition(partition_dir):
+                        compacted += 1
+                except Exception as e:
+                    logger.error(f"Error compacting {partition_dir}: {e}")
+            logger.info(f"Compaction finished: {compacted} partitions compacted under {self.root}.")
+            return compacted
+        finally:
+            self._compaction_lock.release()
+
+    def compact_in_background(self, dataset: str = None) -> threading.Thread:
+        """
+        Runs compact() on a daemon thread and returns the thread. Short-lived processes must
+        join it before exiting (see DataCuratorJob.wait_for_background_work).
+        """
+        thread = threading.Thread(target=self.compact, args=(dataset,), name="dataset-compaction", daemon=True)
+        thread.start()
+        return thread
@@ -3,34 +3,103 @@ from pathlib import Path
 import logging
 import os
 
+from .manifest import frame_digest
+from .schema import storage_frame
+
 logger = logging.getLogger("LocalQuantAgent")
 
-def save_data(df: pd.DataFrame, file_path_str: str, identifier: str, file_format: str = "csv"):
+def safe_filename(identifier: str) -> str:
+    """
+    File-name stem for a ticker or series ID (e.g. '^NSEI' -> '_NSEI').
+    """
+    return identifier.replace(":", "_").replace("^", "_")
+
+def save_data(df: pd.DataFrame, file_path_str: str, identifier: str, file_format: str = "csv", manifest=None):
     """
     Saves a DataFrame to a specified file format (csv or parquet).
     'identifier' is used for logging (e.g., ticker or series_id).
+    With a DatasetManifest of the file's directory, the write is skipped if the file already
+    holds this content (same hash), and the manifest entry is updated after a write.
+    Returns True if the file was written, False if skipped as unchanged, None otherwise.
     """
     if df.empty:
         logger.warning(f"DataFrame for {identifier} is empty. Skipping save to {file_path_str} (format: {file_format}).")
-        return
+        return None
+    df = storage_frame(df) # Same column types whichever batch the rows came from
 
     file_path = Path(file_path_str)
+    digest = None
+    if manifest is not None:
+        digest = frame_digest(df)
+        if manifest.unchanged(file_path, digest):
+            logger.debug("Data for %s is unchanged. Skipping write to %s.", identifier, file_path)
+            return False
+
+    # Write to a temp file in the same directory and rename it into place,
+    # so readers never see a partially written file.
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
     try:
         file_path.parent.mkdir(parents=True, exist_ok=True) # Ensure directory exists
 
         if file_format == "csv":
-            df.to_csv(file_path, index=False)
-            logger.info(f"Successfully saved data for {identifier} to CSV: {file_path}")
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, file_path)
+            logger.debug("Successfully saved data for %s to CSV: %s", identifier, file_path)
         elif file_format == "parquet":
-            df.to_parquet(file_path, index=False, engine='pyarrow') # or 'fastparquet'
-            logger.info(f"Successfully saved data for {identifier} to Parquet: {file_path}")
+            df.to_parquet(tmp_path, index=False, engine='pyarrow') # or 'fastparquet'
+            os.replace(tmp_path, file_path)
+            logger.debug("Successfully saved data for %s to Parquet: %s", identifier, file_path)
         else:
             logger.error(f"Unsupported file format '{file_format}' for {identifier}. Cannot save.")
-            return
+            return None
 
+        if manifest is not None:
+            manifest.record(file_path, df, digest, identifier)
+        return True
     except Exception as e:
         logger.error(f"Error saving data for {identifier} to {file_path} (format: {file_format}): {e}")
+        return None
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
 
 # Keep save_to_csv for backward compatibility or specific use if needed, but prefer save_data
 def save_to_csv(df: pd.DataFrame, file_path_str: str, ticker: str):
-    save_data(df, file_path_str, ticker, file_format="csv")
\ No newline at end of file
+    save_data(df, file_path_str, ticker, file_format="csv")
+
+def read_saved_data(file_path_str: str, file_format: str = "csv", columns: list = None) -> pd.DataFrame:
+    """
+    Reads a file previously written by save_data. Returns an empty DataFrame if it does not exist
+    or cannot be read. 'columns' limits the read to those columns (e.g. ['Date']).
+    """
+    file_path = Path(file_path_str)
+    if not file_path.exists():
+        return pd.DataFrame()
+
+    try:
+        if file_format == "csv":
+            df = pd.read_csv(file_path, usecols=columns)
+        elif file_format == "parquet":
+            df = pd.read_parquet(file_path, columns=columns, engine='pyarrow')
+        else:
+            logger.error(f"Unsupported file format '{file_format}'. Cannot read {file_path}.")
+            return pd.DataFrame()
+    except Exception as e:
+        logger.error(f"Error reading {file_path} (format: {file_format}): {e}")
+        return pd.DataFrame()
+
+    if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+def get_last_saved_date(file_path_str: str, file_format: str = "csv"):
+    """
+    Returns the latest 'Date' stored in a saved file, or None if there is no usable file.
+    Only the Date column is read.
+    """
+    df = read_saved_data(file_path_str, file_format, columns=['Date'])
+    if df.empty or 'Date' not in df.columns:
+        return None
+    last_date = df['Date'].max()
+    return None if pd.isna(last_date) else last_date
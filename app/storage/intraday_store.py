@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .schema import storage_frame
+
+logger = logging.getLogger("LocalQuantAgent")
+
+class IntradayStore:
+    """
+    Day-partitioned, zstd-compressed Parquet store for intraday bars:
+
+        <root>/interval=<interval>/date=<YYYY-MM-DD>/part-<batch>.parquet
+
+    Each file holds one fetch batch of tickers for one exchange-local day, sorted by
+    (Ticker, Date). Files are named after the batch, so re-fetching a day for the same
+    batch atomically replaces the file instead of adding duplicates.
+    A day for which some of the batch's tickers returned nothing is stored as
+    part-<batch>.partial.parquet: readable, but not counted by has_day(), so it is fetched again.
+    """
+    def __init__(self, root, compression: str = "zstd", row_group_size: int = 64 * 1024):
+        self.root = Path(root)
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+    @staticmethod
+    def batch_id(tickers: list) -> str:
+        return hashlib.sha1("\n".join(sorted(tickers)).encode("utf-8")).hexdigest()[:12]
+
+    def day_path(self, interval: str, day, batch: str, partial: bool = False) -> Path:
+        name = f"part-{batch}.partial.parquet" if partial else f"part-{batch}.parquet"
+        return self.root / f"interval={interval}" / f"date={pd.Timestamp(day):%Y-%m-%d}" / name
+
+    def has_day(self, interval: str, day, batch: str) -> bool:
+        return self.day_path(interval, day, batch).exists()
+
+    @staticmethod
+    def _to_table(df: pd.DataFrame) -> pa.Table:
+        df = storage_frame(df).copy()
+        df['Date'] = pd.to_datetime(df['Date']).astype("datetime64[ns]")
+        df['Ticker'] = df['Ticker'].astype(str)
+        if 'Volume' in df.columns:
+            df['Volume'] = df['Volume'].fillna(0).astype("int64")
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def write_chunk(self, df: pd.DataFrame, interval: str, batch: str, tickers: list = None) -> int:
+        """
+        Writes a cleaned chunk of bars (Date, Ticker, OHLCV...) as one file per day it covers.
+        'tickers' are the batch's tickers: if any of them has no bars in the chunk (its fetch
+        failed), the days are written as partial files, which has_day() ignores, and a day
+        already stored complete is left as it is. Returns the number of rows written.
+        """
+        if df is None or df.empty:
+            return 0
+        missing = set(tickers or ()) - set(df['Ticker'].astype(str).unique())
+        if missing:
+            logger.warning(f"Intraday batch {batch} ({interval}) has no bars for {len(missing)} tickers: "
+                           f"{sorted(missing)}. Its days are stored as partial and fetched again.")
+        rows = 0
+        days = df['Date'].dt.normalize()
+        for day, day_df in df.groupby(days, sort=True):
+            complete_path = self.day_path(interval, day, batch)
+            if missing and complete_path.exists():
+                continue # Keep the complete file over a fetch with fewer tickers
+            path = self.day_path(interval, day, batch, partial=bool(missing))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+            try:
+                table = self._to_table(day_df.sort_values(['Ticker', 'Date'], kind='stable'))
+                pq.write_table(table, tmp_path, compression=self.compression, row_group_size=self.row_group_size)
+                os.replace(tmp_path, path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            if not missing:
+                self.day_path(interval, day, batch, partial=True).unlink(missing_ok=True)
+            rows += len(day_df)
+        logger.debug("Wrote %d intraday rows for batch %s (%s).", rows, batch, interval)
+        return rows
+
+    def read(self, interval: str, tickers: list = None, start=None, end=None, columns: list = None) -> pd.DataFrame:
+        """
+        Reads bars for 'interval', opening only the date partitions in [start, end] (dates,
+        inclusive) and pushing the ticker filter down to row groups. Each file is read with its
+        own types (promoted when joined). A bar stored twice (a partial and a complete file, or
+        a ticker fetched in two batches after the universe changed) is taken from the complete
+        file, then from the file that sorts last by path.
+        """
+        interval_dir = self.root / f"interval={interval}"
+        if not interval_dir.is_dir():
+            return pd.DataFrame()
+        partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+        dataset = ds.dataset(str(interval_dir), format="parquet", partitioning=partitioning, exclude_invalid_files=False)
+
+        date_filter = None
+        if start is not None:
+            date_filter = ds.field('date') >= f"{pd.Timestamp(start):%Y-%m-%d}"
+        if end is not None:
+            end_filter = ds.field('date') <= f"{pd.Timestamp(end):%Y-%m-%d}"
+            date_filter = end_filter if date_filter is None else date_filter & end_filter
+        ticker_filter = ds.field('Ticker').isin(list(tickers)) if tickers is not None else None
+
+        if columns is not None:
+            columns = ['Date', 'Ticker'] + [c for c in columns if c not in ('Date', 'Ticker')]
+        else:
+            columns = [c for c in dataset.schema.names if c != 'date']
+        fragments = sorted(dataset.get_fragments(filter=date_filter), key=lambda f: f.path)
+        tables = []
+        for order, fragment in enumerate(fragments):
+            names = fragment.physical_schema.names
+            table = fragment.to_table(columns=[c for c in columns if c in names], filter=ticker_filter)
+            if table.num_rows:
+                # Complete files rank above every partial one; path order breaks ties
+                rank = order + (len(fragments) if not fragment.path.endswith(".partial.parquet") else 0)
+                tables.append(table.append_column('_rank', pa.array(np.full(table.num_rows, rank, dtype=np.int64))))
+        if not tables:
+            return pd.DataFrame(columns=columns)
+        df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+        df = df.sort_values(['Ticker', 'Date', '_rank'], kind='stable')
+        df = df.drop_duplicates(subset=['Ticker', 'Date'], keep='last').drop(columns='_rank')
+        return df.reset_index(drop=True)
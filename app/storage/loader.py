@@ -0,0 +1,152 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .dataset_store import DatasetStore
+from .file_handler import safe_filename
+
+logger = logging.getLogger("LocalQuantAgent")
+
+# Memory-mapped local filesystem: Parquet pages are read straight from the page cache
+_MMAP_FS = pa.fs.LocalFileSystem(use_mmap=True)
+
+def _date_filter(start=None, end=None):
+    expr = None
+    if start is not None:
+        expr = ds.field('Date') >= pa.scalar(pd.Timestamp(start).to_pydatetime())
+    if end is not None:
+        end_expr = ds.field('Date') <= pa.scalar(pd.Timestamp(end).to_pydatetime())
+        expr = end_expr if expr is None else expr & end_expr
+    return expr
+
+
+def _read_fragments(dataset: ds.Dataset, columns: list, row_filter, partition_filter=None, max_workers: int = 8) -> pa.Table:
+    """
+    Reads matching fragments in path order (so later fragments come last) on a thread pool.
+    Partition values are used to skip whole files; 'row_filter' is pushed down to row groups.
+    Each file is read with its own types and the tables are joined with type promotion
+    (e.g. float32 and float64 -> float64), rather than cast to the first file's types.
+    """
+    prune = row_filter if partition_filter is None else (partition_filter if row_filter is None else partition_filter & row_filter)
+    fragments = sorted(dataset.get_fragments(filter=prune), key=lambda f: f.path)
+    if not fragments:
+        return None
+
+    def read(fragment):
+        names = fragment.physical_schema.names
+        return fragment.to_table(columns=[col for col in columns if col in names], filter=row_filter)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        tables = [t for t in pool.map(read, fragments) if t.num_rows]
+    if not tables:
+        return None
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def _finalize(table: pa.Table, columns: list, id_column: str, wide: bool) -> pd.DataFrame:
+    if table is None:
+        value_columns = [c for c in columns if c not in ('Date', id_column)]
+        empty = pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), id_column: pd.Series(dtype=object),
+                              **{c: pd.Series(dtype=float) for c in value_columns}})
+        # Same shape as a non-empty result: wide callers get a Date index and identifier columns
+        return to_wide(empty, id_column=id_column) if wide and value_columns else empty
+
+    if id_column in table.column_names:
+        # Identifiers come back as a pandas categorical instead of repeated strings
+        table = table.set_column(table.column_names.index(id_column), id_column,
+                                 pc.dictionary_encode(table[id_column].cast(pa.string())))
+    df = table.to_pandas()
+    ordered = ['Date', id_column] + [c for c in columns if c not in ('Date', id_column) and c in df.columns]
+    df = df[[c for c in ordered if c in df.columns]]
+    # Overlapping fragments: keep the last (newest) row per identifier and date
+    df = df.drop_duplicates(subset=['Date', id_column], keep='last')
+    df = df.sort_values([id_column, 'Date'], kind='stable').reset_index(drop=True)
+    return to_wide(df, id_column=id_column) if wide else df
+
+
+def to_wide(df: pd.DataFrame, id_column: str = 'Ticker') -> pd.DataFrame:
+    """
+    Pivots a long frame (Date, <id_column>, values...) to Date rows and one column per identifier.
+    With several value columns the result has (field, identifier) MultiIndex columns.
+    """
+    value_columns = [c for c in df.columns if c not in ('Date', id_column)]
+    values = value_columns[0] if len(value_columns) == 1 else value_columns
+    wide = df.pivot(index='Date', columns=id_column, values=values)
+    wide.columns = wide.columns.remove_unused_levels() if isinstance(wide.columns, pd.MultiIndex) else wide.columns.astype(str)
+    return wide.sort_index()
+
+
+def load_files(data_dir, tickers: list, start=None, end=None, columns: list = None, file_format: str = "parquet",
+               id_column: str = 'Ticker', wide: bool = False) -> pd.DataFrame:
+    """
+    Loads flat per-ticker files written by save_data (e.g. data/indian/equity/daily/<ticker>.parquet).
+    Parquet files are memory-mapped and read with column projection and Date predicate pushdown;
+    CSV files can only be projected (usecols) and are filtered after reading.
+    Returns a long frame (Date, <id_column>, columns...) or, with 'wide', a Date x ticker panel.
+    """
+    data_dir = Path(data_dir)
+    columns = list(columns) if columns else ['Open', 'High', 'Low', 'Close', 'Volume']
+    paths = [data_dir / f"{safe_filename(t)}.{file_format}" for t in tickers]
+    missing = [str(p) for p in paths if not p.exists()]
+    if missing:
+        logger.warning(f"{len(missing)} requested files do not exist and were skipped: {missing[:5]}")
+    paths = [str(p) for p in paths if p.exists()]
+
+    if file_format == "parquet":
+        table = None
+        if paths:
+            dataset = ds.dataset(paths, format="parquet", filesystem=_MMAP_FS)
+            table = _read_fragments(dataset, ['Date', id_column] + columns, _date_filter(start, end))
+        return _finalize(table, columns, id_column, wide)
+
+    if file_format == "csv":
+        frames = []
+        for path in paths:
+            df = pd.read_csv(path, usecols=lambda c: c in set(['Date', id_column] + columns), parse_dates=['Date'])
+            if start is not None:
+                df = df[df['Date'] >= pd.Timestamp(start)]
+            if end is not None:
+                df = df[df['Date'] <= pd.Timestamp(end)]
+            frames.append(df)
+        table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False) if frames else None
+        return _finalize(table, columns, id_column, wide)
+
+    logger.error(f"Unsupported file format '{file_format}'. Cannot load from {data_dir}.")
+    return pd.DataFrame()
+
+
+def load_dataset(store_root, dataset: str, tickers: list = None, start=None, end=None, columns: list = None,
+                 id_column: str = 'Ticker', wide: bool = False) -> pd.DataFrame:
+    """
+    Loads from a DatasetStore (dataset=<name>/ticker=<ticker>/year=<yyyy>/, or without the year
+    level for an unpartitioned dataset). Ticker and year partitions outside the request are never opened; the Date range is pushed
+    down to Parquet row-group statistics, and only the requested columns are read (memory-mapped).
+    Returns a long frame (Date, <id_column>, columns...) or, with 'wide', a Date x ticker panel.
+    """
+    columns = list(columns) if columns else ['Open', 'High', 'Low', 'Close', 'Volume']
+    dataset_dir = Path(store_root) / f"dataset={DatasetStore.safe_name(dataset)}"
+    if not dataset_dir.is_dir():
+        logger.warning(f"Dataset '{dataset}' not found under {store_root}.")
+        return _finalize(None, columns, id_column, wide)
+
+    partitioning = ds.partitioning(pa.schema([("ticker", pa.string()), ("year", pa.int32())]), flavor="hive")
+    arrow_dataset = ds.dataset(str(dataset_dir), format="parquet", partitioning=partitioning,
+                               filesystem=_MMAP_FS, exclude_invalid_files=False)
+
+    partition_filter = None
+    if tickers is not None:
+        partition_filter = ds.field('ticker').isin([DatasetStore.safe_name(t) for t in tickers])
+    if start is not None:
+        year_filter = ds.field('year') >= pd.Timestamp(start).year
+        partition_filter = year_filter if partition_filter is None else partition_filter & year_filter
+    if end is not None:
+        year_filter = ds.field('year') <= pd.Timestamp(end).year
+        partition_filter = year_filter if partition_filter is None else partition_filter & year_filter
+
+    table = _read_fragments(arrow_dataset, ['Date', id_column] + columns, _date_filter(start, end), partition_filter)
+    return _finalize(table, columns, id_column, wide)
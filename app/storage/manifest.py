@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from ..utils.file_lock import exclusive_lock
+from .schema import storage_frame
+
+logger = logging.getLogger("LocalQuantAgent")
+
+MANIFEST_FILE = "_manifest.json"
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame: its column names and values (not the index or dtypes).
+    Values are hashed in their stored types (see storage_frame()), so a frame read back from
+    a file (e.g. int64 Volume from CSV) hashes like the frame that was written.
+    Hashes the values in memory, so no serialized copy of the frame is made.
+    """
+    df = storage_frame(df)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([str(column) for column in df.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def frame_schema(df: pd.DataFrame) -> dict:
+    return {str(column): str(dtype) for column, dtype in df.dtypes.items()}
+
+
+def _date_range(df: pd.DataFrame):
+    if 'Date' not in df.columns or df.empty:
+        return None, None
+    dates = pd.to_datetime(df['Date'])
+    start, end = dates.min(), dates.max()
+    return (None if pd.isna(start) else start.isoformat()), (None if pd.isna(end) else end.isoformat())
+
+
+def read_manifest(directory) -> dict:
+    """
+    Index of the files save_data() wrote to 'directory': file name -> {identifier, hash, rows,
+    start, end, columns, size, mtime_ns, updated}. One small JSON read, without listing or
+    opening the data files. Returns {} if there is no (readable) manifest.
+    """
+    path = Path(directory) / MANIFEST_FILE
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get("files", {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Could not read manifest {path}. Treating every file as new: {e}")
+        return {}
+
+
+class DatasetManifest:
+    """
+    Per-directory manifest (<directory>/_manifest.json) used by save_data() to skip writes whose
+    content is already on disk. Entries are recorded in memory and written by flush(), which
+    merges them into the manifest on disk under a lock file, so workers writing different files
+    of the same directory keep each other's entries.
+    An entry only counts while the file's size and mtime still match it: a file changed by
+    anything else (or written before a crash, without a flush) is simply rewritten.
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_FILE
+        self._entries = read_manifest(self.directory)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def entry(self, file_path):
+        """
+        The manifest entry of 'file_path' if it still describes the file on disk, else None.
+        """
+        file_path = Path(file_path)
+        with self._lock:
+            entry = self._entries.get(file_path.name)
+        if entry is None:
+            return None
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return None
+        if stat.st_size != entry.get("size") or stat.st_mtime_ns != entry.get("mtime_ns"):
+            return None
+        return entry
+
+    def unchanged(self, file_path, digest: str) -> bool:
+        entry = self.entry(file_path)
+        return entry is not None and entry.get("hash") == digest
+
+    def record(self, file_path, df: pd.DataFrame, digest: str, identifier: str):
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        start, end = _date_range(df)
+        entry = {
+            "identifier": identifier,
+            "hash": digest,
+            "rows": len(df),
+            "start": start,
+            "end": end,
+            "columns": frame_schema(df),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self._entries[file_path.name] = entry
+            self._pending[file_path.name] = entry
+
+    def flush(self):
+        """
+        Writes the entries recorded since the last flush (atomically, via a temp file).
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with exclusive_lock(self.directory / ".manifest.lock"):
+                entries = read_manifest(self.directory)
+                entries.update(pending)
+                tmp_path = self.path.with_name(f".{MANIFEST_FILE}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump({"files": dict(sorted(entries.items()))}, f, indent=1)
+                os.replace(tmp_path, self.path)
+        except (OSError, TimeoutError) as e:
+            logger.error(f"Could not write manifest {self.path}: {e}")
+            return
+        with self._lock:
+            self._entries = {**entries, **self._entries}
+        logger.debug("Manifest %s: %d entries updated.", self.path, len(pending))
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+def storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The frame with the fixed column types every file is written with: float64 floats, int64
+    integers (and Volume), datetime64[ns] dates. The cleaners may hold a batch as float32/int32
+    in memory; converting on write keeps the stored types of a ticker, and of every file and
+    fragment of a dataset, independent of the batch a row arrived in.
+    Returns 'df' itself if it already has these types.
+    """
+    casts = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, (pd.DatetimeTZDtype, pd.api.extensions.ExtensionDtype)) or pd.api.types.is_bool_dtype(dtype):
+            continue
+        if pd.api.types.is_datetime64_dtype(dtype):
+            target = "datetime64[ns]"
+        elif col == 'Volume' and pd.api.types.is_numeric_dtype(dtype) and not df[col].isna().any():
+            target = "int64"
+        elif pd.api.types.is_float_dtype(dtype):
+            target = "float64"
+        elif pd.api.types.is_signed_integer_dtype(dtype) or dtype in (np.uint8, np.uint16, np.uint32):
+            target = "int64"
+        else:
+            continue
+        if dtype != np.dtype(target):
+            casts[col] = target
+    return df.astype(casts) if casts else df
@@ -0,0 +1,99 @@
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+
+from ..utils.file_lock import exclusive_lock
+
+logger = logging.getLogger("LocalQuantAgent")
+
+CURRENT_FILE = "CURRENT"
+
+def current_version(root) -> str:
+    """
+    Name of the published snapshot version, or None if nothing was published yet.
+    """
+    try:
+        version = (Path(root) / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def _table_path(root: Path, version: str, name: str) -> Path:
+    return root / version / f"{name}.arrow"
+
+
+def publish_snapshot(root, tables: dict, keep_versions: int = 3) -> str:
+    """
+    Publishes a new snapshot version holding 'tables' (name -> DataFrame or pyarrow Table) as
+    uncompressed Arrow IPC files under <root>/<version>/<name>.arrow, which readers can
+    memory-map without deserializing. Tables of the current version that are not in 'tables'
+    are carried over by hard link (no copy). The version directory is complete before CURRENT
+    is atomically switched to it; afterwards all but the newest 'keep_versions' are removed
+    (readers that still map a removed file keep their view on POSIX systems).
+    Returns the new version name.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    # Concurrent publishers (e.g. the equity and macro jobs, or two workers) must not lose each other's tables
+    with exclusive_lock(root / ".publish.lock"):
+        previous = current_version(root)
+        version = f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        staging_dir = root / f".staging-{version}"
+        staging_dir.mkdir()
+        try:
+            for name, data in tables.items():
+                table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+                with pa.OSFile(str(staging_dir / f"{name}.arrow"), "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            if previous is not None and (root / previous).is_dir():
+                for path in (root / previous).glob("*.arrow"):
+                    if path.stem not in tables:
+                        try:
+                            os.link(path, staging_dir / path.name)
+                        except OSError: # No hard links on this filesystem
+                            shutil.copy2(path, staging_dir / path.name)
+            os.replace(staging_dir, root / version)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        tmp_path = root / f".{CURRENT_FILE}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, root / CURRENT_FILE)
+
+        versions = sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+        for old in versions[:-max(1, int(keep_versions))]:
+            shutil.rmtree(root / old, ignore_errors=True)
+    logger.debug("Published snapshot %s with %s.", version, sorted(tables))
+    return version
+
+
+def snapshot_tables(root, version: str = None) -> list:
+    """
+    Names of the tables in 'version' (default: the current one).
+    """
+    root = Path(root)
+    version = version or current_version(root)
+    if version is None:
+        return []
+    return sorted(p.stem for p in (root / version).glob("*.arrow"))
+
+
+def open_snapshot(root, name: str, version: str = None) -> pa.Table:
+    """
+    Opens table 'name' of the current (or given) snapshot version memory-mapped: the buffers
+    of the returned Arrow table point into the page cache, shared by every process reading
+    the same version. Use .to_pandas() only when a copy is acceptable.
+    """
+    root = Path(root)
+    version = version or current_version(root)
+    if version is None:
+        raise FileNotFoundError(f"No snapshot has been published under {root}.")
+    source = pa.memory_map(str(_table_path(root, version, name)), "r")
+    return pa.ipc.open_file(source).read_all()
@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("LocalQuantAgent")
+
+def _lock_owner(lock_path: Path) -> str:
+    """
+    Owner token written into a lock file ('<pid> <token>'), or None if it is gone or not written yet.
+    """
+    try:
+        content = lock_path.read_text().split()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+    return content[-1] if content else None
+
+
+def _remove_if_stale(lock_path: Path, stale_after: float, token: str) -> bool:
+    """
+    Removes 'lock_path' if it has not been touched for 'stale_after' seconds (its holder
+    crashed). The file is first renamed aside, which only one contender can do, and checked
+    again: a fresh lock created in the meantime by another contender is put back.
+    Returns True if the lock file is gone (acquiring may be retried right away).
+    """
+    try:
+        if time.time() - lock_path.stat().st_mtime <= stale_after:
+            return False
+    except FileNotFoundError:
+        return True
+    moved_path = lock_path.with_name(f"{lock_path.name}.{token}.stale")
+    try:
+        os.rename(lock_path, moved_path)
+    except FileNotFoundError:
+        return True # Another contender took it over first
+    try:
+        if time.time() - moved_path.stat().st_mtime <= stale_after:
+            try:
+                os.link(moved_path, lock_path)
+            except OSError as e:
+                logger.error(f"Could not restore lock {lock_path} moved aside while held: {e}")
+            return False
+        logger.warning(f"Removing stale lock {lock_path} (owner {_lock_owner(moved_path)}).")
+        return True
+    finally:
+        moved_path.unlink(missing_ok=True)
+
+
+def _keep_fresh(lock_path: Path, token: str, interval: float, stop: threading.Event):
+    # Touches the lock file while it is held, so a live holder's lock never looks stale
+    while not stop.wait(interval):
+        if _lock_owner(lock_path) == token:
+            try:
+                os.utime(lock_path)
+            except FileNotFoundError: # Moved aside by a contender, which puts it back
+                pass
+
+
+@contextmanager
+def exclusive_lock(lock_path, timeout: float = 120, stale_after: float = 600):
+    """
+    Cross-process exclusive lock: a lock file created with O_EXCL (works on shared filesystems
+    without fcntl support) holding the owner's pid and a random token. While held, its mtime is
+    refreshed every 'stale_after' / 4 seconds, so only a lock file left by a crashed holder goes
+    'stale_after' seconds untouched and is taken over. On release the file is only removed if
+    it still holds our token. Raises TimeoutError after 'timeout' seconds.
+    """
+    lock_path = Path(lock_path)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if _remove_if_stale(lock_path, stale_after, token):
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not acquire {lock_path} within {timeout}s.")
+            time.sleep(0.05)
+    try:
+        os.write(fd, f"{os.getpid()} {token}".encode("ascii"))
+    finally:
+        os.close(fd)
+
+    stop = threading.Event()
+    keeper = threading.Thread(target=_keep_fresh, args=(lock_path, token, stale_after / 4, stop),
+                              name="lock-keeper", daemon=True)
+    keeper.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        keeper.join()
+        if _lock_owner(lock_path) == token:
+            lock_path.unlink(missing_ok=True)
+        else:
+            logger.warning(f"Lock {lock_path} was taken over while held. Leaving it to its new owner.")
@@ -1,8 +1,59 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 
-def setup_logging(log_file_path_str: str, level: str = "INFO"):
+_listener = None # Active QueueListener in queue mode
+_EXC_FORMATTER = logging.Formatter()
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One compact JSON object per line: ts, level, module, thread, msg (and exc on exceptions).
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "module": record.module,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text: # Formatted in the caller thread by _ExcKeepingQueueHandler
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ExcKeepingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler whose prepare() leaves the formatting to the listener thread: the stock
+    version formats the record in the caller (folding the traceback into 'msg'). Here msg and
+    args stay as logged (the queue is in-process, nothing is pickled), and only a traceback is
+    formatted up front, into record.exc_text, which logging.Formatter appends to the message
+    and JsonLinesFormatter emits as "exc". Arguments are read when the listener writes the record.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXC_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None # Tracebacks hold frames: not kept alive on the queue
+        return record
+
+
+def setup_logging(log_file_path_str: str, level: str = "INFO", use_queue: bool = False, json_format: bool = False,
+                  max_bytes: int = 0, backup_count: int = 5):
+    """
+    Configures the "LocalQuantAgent" logger with a console and a file handler.
+    - use_queue: callers only put records on an in-memory queue; a background QueueListener
+      thread does the formatting and writing (stop_logging() flushes it, also run at exit).
+    - json_format: the log file is written as JSON lines (the console stays human-readable).
+    - max_bytes > 0: the log file is rotated at that size, keeping 'backup_count' old files.
+    """
     log_file_path = Path(log_file_path_str)
     log_file_path.parent.mkdir(parents=True, exist_ok=True) # Ensure log directory exists
 
@@ -12,6 +63,7 @@ def setup_logging(log_file_path_str: str, level: str = "INFO"):
     logger.setLevel(log_level)
 
     # Prevent duplicate handlers if called multiple times (e.g., in testing)
+    stop_logging()
     if logger.hasHandlers():
         logger.handlers.clear()
 
@@ -20,18 +72,41 @@ def setup_logging(log_file_path_str: str, level: str = "INFO"):
     ch.setLevel(log_level)
 
     # File Handler
-    fh = logging.FileHandler(log_file_path)
+    if max_bytes > 0:
+        fh = logging.handlers.RotatingFileHandler(log_file_path, maxBytes=int(max_bytes), backupCount=int(backup_count))
+    else:
+        fh = logging.FileHandler(log_file_path)
     fh.setLevel(log_level)
 
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(message)s')
     ch.setFormatter(formatter)
-    fh.setFormatter(formatter)
+    fh.setFormatter(JsonLinesFormatter() if json_format else formatter)
 
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    if use_queue:
+        global _listener
+        log_queue = queue.SimpleQueue() # Unbounded: logging never blocks the caller
+        _listener = logging.handlers.QueueListener(log_queue, ch, fh, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(_ExcKeepingQueueHandler(log_queue))
+        atexit.register(stop_logging)
+    else:
+        logger.addHandler(ch)
+        logger.addHandler(fh)
 
     return logger
 
+
+def stop_logging():
+    """
+    Stops the queue listener (if any) after it has written every queued record.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
 # Example of how to get the logger in other modules:
 # import logging
-# logger = logging.getLogger("LocalQuantAgent")
\ No newline at end of file
+# logger = logging.getLogger("LocalQuantAgent")
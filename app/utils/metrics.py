@@ -0,0 +1,258 @@
+import copy
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("LocalQuantAgent")
+
+# Histogram bucket upper bounds in seconds, from a fast per-ticker save to a slow batch fetch
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple, extra: dict = None) -> str:
+    pairs = list(label_key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def frame_bytes(df) -> int:
+    """
+    In-memory size of a DataFrame (0 for None), for StageRecord.bytes.
+    """
+    return int(df.memory_usage(index=True).sum()) if df is not None else 0
+
+
+class StageRecord:
+    """
+    Handed out by MetricsRecorder.stage(); set 'rows' and 'bytes' inside the block.
+    """
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+
+class MetricsRecorder:
+    """
+    Thread-safe in-process metrics: counters, gauges and latency histograms, each keyed by
+    name and labels. Values accumulate for the life of the process (Prometheus semantics);
+    per-run figures are taken as the difference from a snapshot() made at the start of the run.
+    """
+    def __init__(self, namespace: str = "localquant", buckets: tuple = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self.counters = {} # (name, label_key) -> value
+        self.gauges = {} # (name, label_key) -> value
+        self.histograms = {} # (name, label_key) -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += value
+            hist[-1] += 1
+
+    @contextmanager
+    def stage(self, stage: str, **labels):
+        """
+        Times a block as one call of 'stage': its latency goes to the stage_seconds histogram
+        and the rows/bytes set on the yielded StageRecord to the stage_rows/stage_bytes counters.
+        A block that raises is counted in stage_errors_total.
+        """
+        record = StageRecord()
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception:
+            self.inc("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            record.seconds = time.perf_counter() - started
+            self.observe("stage_seconds", record.seconds, stage=stage, **labels)
+            if record.rows:
+                self.inc("stage_rows_total", record.rows, stage=stage, **labels)
+            if record.bytes:
+                self.inc("stage_bytes_total", record.bytes, stage=stage, **labels)
+
+    def bind(self, **labels):
+        """
+        Returns a view that adds 'labels' to everything recorded through it.
+        """
+        return BoundMetrics(self, labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"counters": dict(self.counters), "histograms": copy.deepcopy(self.histograms)}
+
+    def to_prometheus(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = copy.deepcopy(self.histograms)
+
+        lines = []
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({name for name, _ in values}):
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full_name} {kind}")
+                for (metric, label_key), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{full_name}{_format_labels(label_key)} {value:g}")
+
+        for name in sorted({name for name, _ in histograms}):
+            full_name = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {full_name} histogram")
+            for (metric, label_key), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets, hist):
+                    cumulative += count
+                    lines.append(f"{full_name}_bucket{_format_labels(label_key, {'le': f'{bound:g}'})} {cumulative}")
+                lines.append(f"{full_name}_bucket{_format_labels(label_key, {'le': '+Inf'})} {hist[-1]}")
+                lines.append(f"{full_name}_sum{_format_labels(label_key)} {hist[-2]:g}")
+                lines.append(f"{full_name}_count{_format_labels(label_key)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """
+        Atomically writes the Prometheus textfile (e.g. for node_exporter's textfile collector).
+        """
+        _write_atomic(Path(path), self.to_prometheus())
+
+    def _quantile(self, hist: list, q: float):
+        # Upper bound of the bucket holding the q-quantile (None if it is past the last bucket)
+        target = q * hist[-1]
+        cumulative = 0
+        for bound, count in zip(self.buckets, hist):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return None
+
+    def summary(self, since: dict = None, **label_filter) -> dict:
+        """
+        Per-stage and per-counter totals recorded since the 'since' snapshot (all time if None),
+        restricted to series carrying every label in 'label_filter'.
+        """
+        since = since or {"counters": {}, "histograms": {}}
+        wanted = set(_label_key(label_filter))
+        current = self.snapshot()
+
+        counters = {}
+        for (name, label_key), value in current["counters"].items():
+            if not wanted <= set(label_key):
+                continue
+            delta = value - since["counters"].get((name, label_key), 0)
+            if delta:
+                # e.g. {"stage_rows_total": {"stage=fetch": 25200}, "fetch_retries_total": {"provider=yfinance": 3}}
+                series = ",".join(f"{k}={v}" for k, v in label_key if (k, v) not in wanted) or "total"
+                counters.setdefault(name, {})[series] = delta
+
+        stages = {}
+        for (name, label_key), hist in current["histograms"].items():
+            if name != "stage_seconds" or not wanted <= set(label_key):
+                continue
+            previous = since["histograms"].get((name, label_key), [0] * len(hist))
+            delta = [now - before for now, before in zip(hist, previous)]
+            if not delta[-1]:
+                continue
+            stage = dict(label_key).get("stage", "unknown")
+            rows = counters.get("stage_rows_total", {}).get(f"stage={stage}", 0)
+            stages[stage] = {
+                "calls": int(delta[-1]),
+                "seconds": round(delta[-2], 6),
+                "mean_seconds": round(delta[-2] / delta[-1], 6),
+                "p50_seconds_le": self._quantile(delta, 0.5),
+                "p95_seconds_le": self._quantile(delta, 0.95),
+                "rows": rows,
+                "bytes": counters.get("stage_bytes_total", {}).get(f"stage={stage}", 0),
+                "rows_per_second": round(rows / delta[-2], 1) if delta[-2] > 0 else None,
+            }
+        return {"stages": stages, "counters": counters}
+
+
+class BoundMetrics:
+    """
+    A MetricsRecorder view with fixed extra labels (see MetricsRecorder.bind).
+    """
+    def __init__(self, recorder: MetricsRecorder, labels: dict):
+        self.recorder = recorder
+        self.labels = labels
+
+    def inc(self, name: str, value: float = 1, **labels):
+        self.recorder.inc(name, value, **{**self.labels, **labels})
+
+    def set_gauge(self, name: str, value: float, **labels):
+        self.recorder.set_gauge(name, value, **{**self.labels, **labels})
+
+    def observe(self, name: str, value: float, **labels):
+        self.recorder.observe(name, value, **{**self.labels, **labels})
+
+    def stage(self, stage: str, **labels):
+        return self.recorder.stage(stage, **{**self.labels, **labels})
+
+
+def _write_atomic(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_run_summary(path, summary: dict):
+    _write_atomic(Path(path), json.dumps(summary, indent=2, default=str))
+
+
+@contextmanager
+def profiled(output_path=None):
+    """
+    Runs the block under cProfile and dumps the stats to 'output_path' (no-op if None).
+    cProfile only sees the calling thread, so pipeline worker threads are not included.
+    Inspect with: python -m pstats <output_path>
+    """
+    if output_path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(output_path))
+        logger.info(f"Profile written to {output_path}")
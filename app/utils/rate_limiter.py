@@ -0,0 +1,68 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger("LocalQuantAgent")
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    'rate' tokens are added per second, up to 'capacity' (the allowed burst).
+    """
+    def __init__(self, rate: float, capacity: float = None, name: str = ""):
+        if rate <= 0:
+            raise ValueError("Rate limiter 'rate' must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.name = name
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Blocks until 'tokens' are available. Returns the number of seconds waited.
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of capacity {self.capacity}.")
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    if waited > 0:
+                        logger.debug(f"Rate limiter '{self.name}' delayed request by {waited:.2f}s.")
+                    return waited
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+def build_rate_limiters(rate_limit_settings: dict) -> dict:
+    """
+    Builds one TokenBucket per provider from settings such as
+    {'yfinance': {'rate': 2, 'burst': 4}, 'fred': {'rate': 2, 'burst': 2}}.
+    Providers with no (or a non-positive) rate are left unlimited.
+    """
+    limiters = {}
+    for provider, limits in (rate_limit_settings or {}).items():
+        rate = (limits or {}).get("rate")
+        if not rate or rate <= 0:
+            continue
+        limiters[provider] = TokenBucket(rate, limits.get("burst"), name=provider)
+        logger.debug(f"Rate limiter for '{provider}': {rate}/s, burst {limiters[provider].capacity}.")
+    return limiters
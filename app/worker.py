@@ -0,0 +1,114 @@
+"""
+Worker process for sharded runs: several workers (on one box, or on several boxes sharing
+the project directory) split a job's tickers through the ShardCoordinator database.
+
+    python -m app.worker --jobs indian_equity intl_equity
+    python -m app.worker --jobs indian_equity --run-id 2024-06-03 --worker-id box1-a
+
+(the same as 'python -m app.agent worker ...').
+
+Workers started with the same run ID (default: today's date) share the run's shards.
+"""
+import logging
+import os
+import socket
+import sys
+import time
+from datetime import date
+from functools import partial
+
+from .config_manager import ConfigManager
+from .coordinator import ShardCoordinator
+from .scheduler import DataCuratorJob, job_failed
+
+logger = logging.getLogger("LocalQuantAgent")
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def build_coordinator(config: ConfigManager) -> ShardCoordinator:
+    worker_settings = config.get_setting("workers", {}) or {}
+    return ShardCoordinator(
+        config.base_path / worker_settings.get("coordination_db", "state/shards.sqlite"),
+        lease_seconds=worker_settings.get("lease_seconds", 300),
+        max_attempts=worker_settings.get("max_attempts", 3)
+    )
+
+
+def run_worker(config: ConfigManager, jobs: list = None, run_id: str = None, worker_id: str = None,
+               **curator_kwargs) -> dict:
+    """
+    For each job, claims and runs shards of '<job>:<run_id>' until every shard is done or
+    failed. While other workers still hold leases it polls, so shards they abandon (crash,
+    lost lease) are retried here. The worker that finishes a run's last shard runs the
+    run-level steps (compaction, macro panel).
+    'curator_kwargs' are passed to DataCuratorJob (e.g. stock_backend).
+    Returns counts of shards done, failed and lost (lease taken over by another worker).
+    """
+    worker_settings = config.get_setting("workers", {}) or {}
+    jobs = jobs or worker_settings.get("jobs", ["indian_equity", "intl_equity"])
+    run_id = run_id or date.today().isoformat()
+    worker_id = worker_id or default_worker_id()
+    shard_size = worker_settings.get("shard_size", 50)
+    poll_seconds = worker_settings.get("poll_seconds", 10)
+
+    coordinator = build_coordinator(config)
+    curator = DataCuratorJob(config, worker_id=worker_id, **curator_kwargs)
+    stats = {"done": 0, "failed": 0, "lost": 0}
+    try:
+        for job in jobs:
+            if job not in DataCuratorJob.SHARDED_JOBS:
+                logger.error(f"Job '{job}' cannot be sharded. Expected one of {sorted(DataCuratorJob.SHARDED_JOBS)}.")
+                continue
+            category, _ = DataCuratorJob.SHARDED_JOBS[job]
+            tickers = config.get_tickers(category)
+            if not tickers:
+                logger.warning(f"No {category} tickers configured. Skipping job '{job}'.")
+                continue
+
+            job_run = f"{job}:{run_id}"
+            coordinator.plan(job_run, tickers, shard_size)
+            while True:
+                lease = coordinator.claim(job_run, worker_id)
+                if lease is None:
+                    if coordinator.progress(job_run).get("leased", 0):
+                        time.sleep(poll_seconds) # Wait in case another worker abandons its shard
+                        continue
+                    break
+
+                logger.info(f"Worker {worker_id} claimed {lease} (attempt {lease.attempt}).")
+                try:
+                    with coordinator.keep_alive(lease):
+                        # keep_alive renews every third of the lease, so a healthy lease always has
+                        # more than that left; the margin leaves a write that long to finish
+                        fence = partial(coordinator.is_current, lease, margin=coordinator.lease_seconds / 4)
+                        result = curator.run_shard(job, lease.tickers, fence=fence)
+                    if job_failed(result):
+                        raise RuntimeError(f"Shard run failed: {result}")
+                except Exception as e:
+                    logger.error(f"Shard {lease} failed: {e}", exc_info=True)
+                    stats["failed"] += 1
+                    accepted, finished = coordinator.fail(lease, e)
+                else:
+                    accepted, finished = coordinator.complete(lease)
+                    stats["done" if accepted else "lost"] += 1
+                    if not accepted:
+                        logger.warning(f"Lease on {lease} was taken over before completion. Another worker redoes it.")
+                if finished:
+                    logger.info(f"Run {job_run} finished ({coordinator.progress(job_run)}). Running run-level steps.")
+                    curator.finish_sharded_run(job)
+    finally:
+        coordinator.close()
+    logger.info(f"Worker {worker_id} finished: {stats}")
+    return stats
+
+
+def main(argv=None) -> int:
+    from .agent import main as agent_main
+
+    return agent_main(["worker", *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Offline benchmark harness for the curator pipeline.
+
+Times each stage (fetch, clean, save) separately and end to end through DataCuratorJob,
+using the deterministic synthetic providers in benchmarks/synthetic.py, at several
+universe sizes. Results are written as JSON and can be compared against a stored baseline:
+
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000 --output bench_results.json
+    python -m benchmarks.run_benchmarks --output bench_results.json --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --tolerance 0.25
+
+Exits with status 1 if any stage is slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import logging
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from app.acquisition.fred_fetcher import fetch_fred_series
+from app.acquisition.yfinance_fetcher import fetch_stock_data_batch
+from app.config_manager import ConfigManager
+from app.processing.cleaner import clean_stock_data, clean_macro_data, clean_stock_universe, combine_ticker_frames
+from app.scheduler import DataCuratorJob
+from app.storage.file_handler import save_data
+
+from .synthetic import SyntheticStockBackend, SyntheticFredBackend
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+MAX_MACRO_SERIES = 1000
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _timed(func, repeat: int):
+    """
+    Runs func 'repeat' times and returns (best seconds, last result).
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _make_config(work_dir: Path, tickers: list, series_ids: list, overrides: dict = None) -> ConfigManager:
+    with open(PROJECT_ROOT / "config" / "settings.yaml", 'r') as f:
+        settings = yaml.safe_load(f)
+    settings["data_path"] = str(work_dir / "data")
+    settings["log_file_path"] = str(work_dir / "agent.log")
+    settings["fred_api_key"] = "synthetic"
+    settings["cache"] = {"enabled": False}
+    settings["rate_limits"] = {}
+    settings["metrics"] = {"enabled": False}
+    for key, value in (overrides or {}).items():
+        settings[key] = {**settings.get(key, {}), **value} if isinstance(value, dict) else value
+
+    settings_file = work_dir / "settings.yaml"
+    tickers_file = work_dir / "tickers.json"
+    with open(settings_file, 'w') as f:
+        yaml.safe_dump(settings, f)
+    with open(tickers_file, 'w') as f:
+        json.dump({"indian_equity": tickers, "indian_macro_fred": series_ids}, f)
+    return ConfigManager(settings_file=str(settings_file), tickers_file=str(tickers_file))
+
+
+def run_size(size: int, repeat: int, work_root: Path) -> list:
+    tickers = [f"SYN{i:05d}.NS" for i in range(size)]
+    series_ids = [f"SYNMACRO{i:04d}" for i in range(min(size, MAX_MACRO_SERIES))]
+    results = []
+
+    def record(stage: str, seconds: float, rows: int):
+        results.append({
+            "stage": stage, "size": size, "seconds": round(seconds, 6), "rows": int(rows),
+            "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        })
+        print(f"  {stage:<32} size={size:<6} {seconds:9.3f}s  {rows:>10} rows", flush=True)
+
+    # Fetch
+    seconds, raw_frames = _timed(lambda: fetch_stock_data_batch(
+        tickers, period="1y", chunk_size=100, delay=0, backend=SyntheticStockBackend()), repeat)
+    record("fetch_stock_batch", seconds, sum(len(df) for df in raw_frames.values()))
+
+    fred_backend = SyntheticFredBackend()
+    seconds, raw_macro = _timed(lambda: {s: fetch_fred_series(s, "synthetic", backend=fred_backend) for s in series_ids}, repeat)
+    record("fetch_fred", seconds, sum(len(df) for df in raw_macro.values()))
+
+    # Clean
+    seconds, cleaned = _timed(lambda: {t: clean_stock_data(df, t) for t, df in raw_frames.items()}, repeat)
+    record("clean_stock_data", seconds, sum(len(df) for df in cleaned.values()))
+
+    seconds, universe = _timed(lambda: clean_stock_universe(combine_ticker_frames(raw_frames)), repeat)
+    record("clean_stock_universe", seconds, len(universe))
+
+    seconds, cleaned_macro = _timed(lambda: {s: clean_macro_data(df, s) for s, df in raw_macro.items()}, repeat)
+    record("clean_macro_data", seconds, sum(len(df) for df in cleaned_macro.values()))
+
+    # Save
+    for file_format in ("csv", "parquet"):
+        out_dir = work_root / f"save_{file_format}_{size}"
+
+        def save_all():
+            for ticker, df in cleaned.items():
+                save_data(df, str(out_dir / f"{ticker}.{file_format}"), ticker, file_format=file_format)
+
+        seconds, _ = _timed(save_all, repeat)
+        record(f"save_{file_format}", seconds, sum(len(df) for df in cleaned.values()))
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    # End to end through DataCuratorJob
+    variants = {
+        "e2e_equity_csv": {"storage": {"default_format": "csv"}},
+        "e2e_equity_parquet": {"storage": {"default_format": "parquet"}},
+        "e2e_equity_parquet_pipeline": {"storage": {"default_format": "parquet"}, "pipeline": {"enabled": True}},
+    }
+    for stage, overrides in variants.items():
+        work_dir = Path(tempfile.mkdtemp(dir=work_root))
+        job = DataCuratorJob(_make_config(work_dir, tickers, series_ids, overrides),
+                             stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+        seconds, _ = _timed(job.run_daily_indian_equity_job, 1) # First run: full history
+        record(stage, seconds, size * 252)
+        if job.incremental_enabled:
+            seconds, _ = _timed(job.run_daily_indian_equity_job, repeat) # Re-run: incremental path
+            record(f"{stage}_incremental", seconds, size)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    work_dir = Path(tempfile.mkdtemp(dir=work_root))
+    job = DataCuratorJob(_make_config(work_dir, tickers, series_ids, {"storage": {"default_format": "parquet"}}),
+                         stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    seconds, _ = _timed(job.run_daily_indian_macro_job, 1)
+    record("e2e_macro_parquet", seconds, sum(len(df) for df in raw_macro.values()))
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """
+    Returns the results slower than the matching baseline entry by more than 'tolerance' (e.g. 0.25 = 25%).
+    """
+    baseline_seconds = {(r["stage"], r["size"]): r["seconds"] for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = baseline_seconds.get((result["stage"], result["size"]))
+        if not base:
+            continue
+        ratio = result["seconds"] / base
+        if ratio > 1 + tolerance:
+            regressions.append({**result, "baseline_seconds": base, "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the LocalQuant curator with synthetic providers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Universe sizes (tickers).")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetitions per stage; the best time is kept.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", help="Also write the results to this path as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs. baseline (0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    # Keep the agent's per-ticker logging out of the measurements
+    logging.getLogger("LocalQuantAgent").setLevel(logging.CRITICAL)
+
+    work_root = Path(tempfile.mkdtemp(prefix="localquant-bench-"))
+    results = []
+    try:
+        for size in args.sizes:
+            print(f"Universe size {size}:", flush=True)
+            results.extend(run_size(size, args.repeat, work_root))
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} results to {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}:")
+            for r in regressions:
+                print(f"  {r['stage']} size={r['size']}: {r['seconds']:.3f}s vs {r['baseline_seconds']:.3f}s ({r['ratio']}x)")
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
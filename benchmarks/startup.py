@@ -0,0 +1,63 @@
+"""
+Startup-time check for the one-shot CLI (cron/container use).
+
+Runs each command in a fresh interpreter several times and compares the median wall time
+against its target; also checks that provider libraries are not imported before a request:
+
+    python -m benchmarks.startup --repeat 5
+
+Exits with status 1 if a target is missed.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# (name, command, target seconds)
+TARGETS = [
+    ("cli_help", [sys.executable, "-m", "app.agent", "--help"], 0.3),
+    ("cli_jobs", [sys.executable, "-m", "app.agent", "jobs"], 0.3),
+    ("job_ready", [sys.executable, "-c", "from app.scheduler import DataCuratorJob"], 1.0),
+]
+# Must not be imported until a job actually requests data from them
+LAZY_MODULES = ["yfinance", "fredapi"]
+
+
+def _median_seconds(command: list, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_ROOT, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure LocalQuant CLI startup time against targets.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per command; the median is compared.")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for name, command, target in TARGETS:
+        seconds = _median_seconds(command, args.repeat)
+        ok = seconds <= target
+        failures += not ok
+        print(f"  {name:<12} {seconds:7.3f}s  (target {target:.2f}s) {'ok' if ok else 'SLOW'}")
+
+    check = f"import sys, app.scheduler; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    eager = subprocess.run([sys.executable, "-c", check], cwd=PROJECT_ROOT, check=True,
+                           capture_output=True, text=True).stdout.strip()
+    if eager:
+        failures += 1
+        print(f"  Imported at startup although only needed for requests: {eager}")
+    else:
+        print(f"  Not imported at startup: {', '.join(LAZY_MODULES)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
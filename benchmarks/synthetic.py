@@ -0,0 +1,139 @@
+"""
+Deterministic synthetic stand-ins for the yfinance and FRED providers.
+The same ticker/series always produces the same data, so benchmark runs are comparable.
+"""
+import time
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Trading days per yfinance-style period string
+PERIOD_BARS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520, "max": 5000}
+
+DEFAULT_END = "2024-12-31"
+
+
+def _seed(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+
+@lru_cache(maxsize=8)
+def _trading_days(end: str) -> pd.DatetimeIndex:
+    return pd.bdate_range(end=pd.Timestamp(end), periods=PERIOD_BARS["max"], name="Date")
+
+
+@lru_cache(maxsize=8)
+def _observation_dates(end: str, freq: str) -> pd.DatetimeIndex:
+    return pd.date_range(end=end, periods=600, freq=freq)
+
+
+def synthetic_ohlcv(ticker: str, period: str = "1y", start=None, end: str = DEFAULT_END) -> pd.DataFrame:
+    """
+    Geometric random-walk daily bars shaped like Ticker.history() output
+    (Date index; Open, High, Low, Close, Volume, Dividends, Stock Splits).
+    The full price path is fixed per ticker (on a calendar ending at DEFAULT_END), so a 'start'
+    fetch overlaps a 'period' fetch exactly and an earlier 'end' models an earlier run day.
+    """
+    all_dates = _trading_days(DEFAULT_END)
+    rng = np.random.default_rng(_seed(ticker))
+    returns = rng.normal(0.0003, 0.015, len(all_dates))
+    close = np.round(rng.uniform(20, 2000) * np.exp(np.cumsum(returns)), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.004, len(all_dates))), 2)
+    spread = np.abs(rng.normal(0, 0.01, len(all_dates)))
+    bars = pd.DataFrame({
+        "Open": open_,
+        "High": np.round(np.maximum(open_, close) * (1 + spread), 2),
+        "Low": np.round(np.minimum(open_, close) * (1 - spread), 2),
+        "Close": close,
+        "Volume": rng.integers(10_000, 5_000_000, len(all_dates)),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=all_dates)
+    bars = bars[bars.index <= pd.Timestamp(end)]
+
+    if start is not None:
+        return bars[bars.index >= pd.Timestamp(start)]
+    return bars.iloc[-PERIOD_BARS.get(period, 252):]
+
+
+def synthetic_intraday(ticker: str, interval: str, start, end) -> pd.DataFrame:
+    """
+    Intraday bars for the weekdays in [start, end), shaped like yfinance intraday output
+    (tz-aware Asia/Kolkata 'Datetime' index, NSE session 09:15-15:30). Each ticker/day is
+    generated independently, so any window split yields the same bars.
+    """
+    step = pd.Timedelta(interval.replace("m", "min") if interval.endswith("m") else interval)
+    frames = []
+    for day in pd.bdate_range(pd.Timestamp(start), pd.Timestamp(end) - pd.Timedelta(days=1)):
+        times = pd.date_range(day + pd.Timedelta(hours=9, minutes=15), day + pd.Timedelta(hours=15, minutes=29),
+                              freq=step, tz="Asia/Kolkata", name="Datetime")
+        rng = np.random.default_rng(_seed(f"{ticker}|{day:%Y-%m-%d}"))
+        close = np.round(rng.uniform(20, 2000) * np.exp(np.cumsum(rng.normal(0, 0.001, len(times)))), 2)
+        open_ = np.round(close * (1 + rng.normal(0, 0.0005, len(times))), 2)
+        spread = np.abs(rng.normal(0, 0.001, len(times)))
+        frames.append(pd.DataFrame({
+            "Open": open_,
+            "High": np.round(np.maximum(open_, close) * (1 + spread), 2),
+            "Low": np.round(np.minimum(open_, close) * (1 - spread), 2),
+            "Close": close,
+            "Volume": rng.integers(100, 50_000, len(times)),
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        }, index=times))
+    if not frames:
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"],
+                            index=pd.DatetimeIndex([], tz="Asia/Kolkata", name="Datetime"))
+    return pd.concat(frames)
+
+
+class SyntheticStockBackend:
+    """
+    Batch backend for fetch_stock_data_batch / DataCuratorJob(stock_backend=...).
+    'latency' seconds are slept per request to model network round trips.
+    """
+    def __init__(self, latency: float = 0.0, end: str = DEFAULT_END):
+        self.latency = latency
+        self.end = end
+        self.requests = 0
+
+    def __call__(self, tickers: list, period: str, interval: str, start=None, end=None) -> pd.DataFrame:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if interval != "1d":
+            frames = {ticker: synthetic_intraday(ticker, interval, start, end) for ticker in tickers}
+            return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+        frames = {ticker: synthetic_ohlcv(ticker, period=period, start=start, end=self.end) for ticker in tickers}
+        if end is not None:
+            frames = {ticker: df[df.index < pd.Timestamp(end)] for ticker, df in frames.items()}
+        return pd.concat(frames, axis=1, names=["Ticker", "Price"])
+
+
+def synthetic_fred_series(series_id: str, start_date=None, end: str = DEFAULT_END, freq: str = "MS") -> pd.Series:
+    """
+    Monthly (default) macro series with a slow trend, shaped like fredapi's get_series() output.
+    """
+    dates = _observation_dates("2024-12-01" if freq == "MS" else str(end), freq)
+    rng = np.random.default_rng(_seed(series_id))
+    values = np.round(100 * np.exp(np.cumsum(rng.normal(0.002, 0.01, len(dates)))), 4)
+    series = pd.Series(values, index=dates, name=series_id)
+    if start_date is not None:
+        series = series[series.index >= pd.Timestamp(start_date)]
+    return series
+
+
+class SyntheticFredBackend:
+    """
+    Backend for fetch_fred_series / DataCuratorJob(fred_backend=...).
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def __call__(self, series_id: str, api_key: str, start_date=None, end_date=None) -> pd.Series:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return synthetic_fred_series(series_id, start_date=start_date)
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from app.config_manager import ConfigManager
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def make_config(tmp_path):
+    """
+    Factory for a ConfigManager over the project's default settings, with data and logs under
+    tmp_path, no cache, rate limits or metrics files, and 'overrides' merged into the settings
+    (dict values into the section of the same name).
+    """
+    def make(tickers: list, series_ids: list = (), overrides: dict = None) -> ConfigManager:
+        with open(PROJECT_ROOT / "config" / "settings.yaml", 'r') as f:
+            settings = yaml.safe_load(f)
+        settings.update({
+            "data_path": str(tmp_path / "data"),
+            "log_file_path": str(tmp_path / "agent.log"),
+            "fred_api_key": "test",
+            "cache": {"enabled": False},
+            "rate_limits": {},
+            "metrics": {"enabled": False},
+        })
+        for key, value in (overrides or {}).items():
+            settings[key] = {**(settings.get(key) or {}), **value} if isinstance(value, dict) else value
+
+        settings_file = tmp_path / "settings.yaml"
+        tickers_file = tmp_path / "tickers.json"
+        with open(settings_file, 'w') as f:
+            yaml.safe_dump(settings, f)
+        with open(tickers_file, 'w') as f:
+            json.dump({"indian_equity": list(tickers), "indian_macro_fred": list(series_ids)}, f)
+        return ConfigManager(settings_file=str(settings_file), tickers_file=str(tickers_file))
+
+    return make
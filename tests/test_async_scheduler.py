@@ -0,0 +1,87 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from app.async_scheduler import AsyncScheduler, last_trigger, next_trigger
+
+NOW = datetime(2024, 3, 5, 10, 30)
+
+
+def test_trigger_times_around_now():
+    assert next_trigger("15:45", NOW) == datetime(2024, 3, 5, 15, 45)
+    assert next_trigger("02:00", NOW) == datetime(2024, 3, 6, 2, 0)
+    assert next_trigger("10:30", NOW) == datetime(2024, 3, 6, 10, 30) # Strictly after
+    assert last_trigger("10:30", NOW) == NOW # At or before
+    assert last_trigger("15:45", NOW) == datetime(2024, 3, 4, 15, 45)
+
+
+def scheduler_with_run(tmp_path, trigger: datetime, catch_up: bool = True) -> AsyncScheduler:
+    state_file = tmp_path / "state" / "scheduler_state.json"
+    AsyncScheduler(state_file=state_file)._record_run("indian_equity", trigger, trigger, trigger)
+    return AsyncScheduler(state_file=state_file, catch_up=catch_up) # A restart reads the state back
+
+
+def test_missed_trigger_is_caught_up_after_a_restart(tmp_path):
+    # Last ran two days ago: only the latest trigger is caught up
+    scheduler = scheduler_with_run(tmp_path, datetime(2024, 3, 3, 15, 45))
+    assert scheduler._missed_trigger("indian_equity", "15:45", NOW) == datetime(2024, 3, 4, 15, 45)
+
+
+def test_no_catch_up_after_the_latest_trigger_ran(tmp_path):
+    scheduler = scheduler_with_run(tmp_path, datetime(2024, 3, 4, 15, 45))
+    assert scheduler._missed_trigger("indian_equity", "15:45", NOW) is None
+
+
+def test_no_catch_up_without_a_recorded_run_or_when_disabled(tmp_path):
+    scheduler = scheduler_with_run(tmp_path, datetime(2024, 3, 3, 15, 45), catch_up=False)
+    assert scheduler._missed_trigger("indian_equity", "15:45", NOW) is None
+    assert AsyncScheduler(state_file=tmp_path / "missing.json")._missed_trigger("indian_equity", "15:45", NOW) is None
+
+
+def test_state_file_is_replaced_atomically(tmp_path):
+    scheduler = scheduler_with_run(tmp_path, datetime(2024, 3, 4, 15, 45))
+    scheduler._record_run("indian_macro", NOW, NOW, NOW)
+    state_dir = tmp_path / "state"
+    assert [p.name for p in state_dir.iterdir()] == ["scheduler_state.json"] # No temporary file left behind
+    state = json.loads((state_dir / "scheduler_state.json").read_text())
+    assert sorted(state) == ["indian_equity", "indian_macro"]
+    assert state["indian_macro"]["last_trigger"] == NOW.isoformat()
+
+
+def test_unreadable_state_file_starts_fresh(tmp_path):
+    state_file = tmp_path / "scheduler_state.json"
+    state_file.write_text("{not json")
+    assert AsyncScheduler(state_file=state_file).state == {}
+
+
+def test_failed_runs_are_not_recorded(tmp_path):
+    scheduler = AsyncScheduler(state_file=tmp_path / "scheduler_state.json")
+
+    def failing():
+        raise RuntimeError("boom")
+
+    asyncio.run(scheduler._run_job("indian_equity", failing, NOW, asyncio.Semaphore(1)))
+    assert scheduler.state == {} and not scheduler.state_file.exists()
+    asyncio.run(scheduler._run_job("indian_equity", lambda: None, NOW, asyncio.Semaphore(1)))
+    assert scheduler.state["indian_equity"]["last_trigger"] == NOW.isoformat()
+
+
+def test_job_loop_runs_the_missed_trigger_on_start(tmp_path):
+    scheduler = scheduler_with_run(tmp_path, datetime(2000, 1, 1, 15, 45))
+    runs = []
+
+    async def start_and_stop():
+        loop = asyncio.create_task(scheduler._job_loop("indian_equity", "15:45", lambda: runs.append(1),
+                                                       asyncio.Semaphore(1)))
+        while scheduler.state["indian_equity"]["last_trigger"].startswith("2000"):
+            await asyncio.sleep(0.01)
+        loop.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loop
+
+    asyncio.run(asyncio.wait_for(start_and_stop(), timeout=5))
+    assert runs == [1]
+    # The catch-up run is recorded against the trigger it stood in for
+    assert scheduler.state["indian_equity"]["last_trigger"] == last_trigger("15:45", datetime.now()).isoformat()
@@ -0,0 +1,134 @@
+import pytest
+
+from app import coordinator as coordinator_module
+from app.coordinator import ShardCoordinator
+
+TICKERS = [f"T{i}.NS" for i in range(5)]
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(coordinator_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def coordinator(tmp_path, clock):
+    coordinator = ShardCoordinator(tmp_path / "shards.sqlite", lease_seconds=60, max_attempts=2)
+    yield coordinator
+    coordinator.close()
+
+
+def test_plan_is_idempotent(coordinator):
+    assert coordinator.plan("run", TICKERS, shard_size=2) == 3
+    assert coordinator.plan("run", TICKERS + ["EXTRA.NS"], shard_size=1) == 3
+    assert coordinator.progress("run") == {"pending": 3}
+
+
+def test_claims_lowest_pending_shard_until_none_left(coordinator):
+    coordinator.plan("run", TICKERS, shard_size=2)
+    leases = [coordinator.claim("run", "w1") for _ in range(3)]
+    assert [lease.shard for lease in leases] == [0, 1, 2]
+    assert leases[0].tickers == TICKERS[:2] and leases[2].tickers == TICKERS[4:]
+    assert all(lease.token == 1 and lease.attempt == 1 for lease in leases)
+    assert coordinator.claim("run", "w2") is None
+    assert coordinator.progress("run") == {"leased": 3}
+
+
+def test_expired_lease_is_reclaimed_and_fenced(coordinator, clock):
+    coordinator.plan("run", TICKERS, shard_size=5)
+    stale = coordinator.claim("run", "w1")
+    assert coordinator.is_current(stale)
+    assert coordinator.claim("run", "w2") is None # Still leased
+
+    clock.now += 61
+    assert not coordinator.is_current(stale)
+    assert not coordinator.renew(stale)
+    fresh = coordinator.claim("run", "w2")
+    assert (fresh.shard, fresh.owner, fresh.token, fresh.attempt) == (0, "w2", 2, 2)
+    assert coordinator.is_current(fresh)
+    assert not coordinator.is_current(stale)
+
+
+def test_complete_is_rejected_for_a_stale_lease(coordinator, clock):
+    coordinator.plan("run", TICKERS, shard_size=5)
+    stale = coordinator.claim("run", "w1")
+    clock.now += 61
+    fresh = coordinator.claim("run", "w2")
+
+    assert coordinator.complete(stale) == (False, False)
+    assert coordinator.fail(stale, "too late") == (False, False)
+    assert coordinator.complete(fresh) == (True, True)
+    assert coordinator.progress("run") == {"done": 1}
+
+
+def test_run_finished_only_for_the_last_shard(coordinator):
+    coordinator.plan("run", TICKERS, shard_size=3)
+    first, second = coordinator.claim("run", "w1"), coordinator.claim("run", "w2")
+    assert coordinator.complete(second) == (True, False)
+    assert coordinator.complete(first) == (True, True)
+
+
+def test_renew_extends_the_lease(coordinator, clock):
+    coordinator.plan("run", TICKERS, shard_size=5)
+    lease = coordinator.claim("run", "w1")
+    clock.now += 50
+    assert coordinator.renew(lease)
+    clock.now += 50 # 100s after the claim, 50s after the renewal
+    assert coordinator.is_current(lease)
+    assert coordinator.claim("run", "w2") is None
+
+
+def test_is_current_demands_the_margin(coordinator, clock):
+    coordinator.plan("run", TICKERS, shard_size=5)
+    lease = coordinator.claim("run", "w1")
+    clock.now += 45 # 15s left
+    assert coordinator.is_current(lease, margin=10)
+    assert not coordinator.is_current(lease, margin=20)
+
+
+def test_failed_shard_is_retried_then_marked_failed(coordinator):
+    coordinator.plan("run", TICKERS, shard_size=5)
+    lease = coordinator.claim("run", "w1")
+    assert coordinator.fail(lease, RuntimeError("boom")) == (True, False)
+    assert coordinator.progress("run") == {"pending": 1}
+
+    retry = coordinator.claim("run", "w2")
+    assert (retry.token, retry.attempt) == (2, 2)
+    assert coordinator.fail(retry, RuntimeError("boom again")) == (True, True) # max_attempts reached
+    assert coordinator.progress("run") == {"failed": 1}
+    assert coordinator.claim("run", "w3") is None
+
+
+def test_shard_abandoned_on_its_last_attempt_is_marked_failed(coordinator, clock):
+    coordinator.plan("run", TICKERS, shard_size=3)
+    coordinator.claim("run", "w1") # Shard 0, attempt 1
+    clock.now += 61
+    coordinator.claim("run", "w2") # Shard 0 reclaimed, attempt 2 (the last)
+    clock.now += 61
+
+    lease = coordinator.claim("run", "w3")
+    assert lease.shard == 1 # Shard 0 is given up instead of claimed a third time
+    assert coordinator.progress("run") == {"failed": 1, "leased": 1}
+
+
+def test_workers_share_the_database(tmp_path, clock):
+    first = ShardCoordinator(tmp_path / "shards.sqlite", lease_seconds=60)
+    second = ShardCoordinator(tmp_path / "shards.sqlite", lease_seconds=60)
+    try:
+        first.plan("run", TICKERS, shard_size=3)
+        second.plan("run", TICKERS, shard_size=3)
+        leases = [first.claim("run", "w1"), second.claim("run", "w2")]
+        assert sorted(lease.shard for lease in leases) == [0, 1]
+        assert second.claim("run", "w2") is None
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,127 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from app.scheduler import DataCuratorJob
+from app.storage.dataset_store import DatasetStore
+from app.storage.loader import load_dataset
+from benchmarks.synthetic import SyntheticFredBackend, SyntheticStockBackend
+
+
+def bars(dates: list, close: float, ticker: str = "AAA.NS") -> pd.DataFrame:
+    n = len(dates)
+    return pd.DataFrame({'Date': pd.to_datetime(dates), 'Ticker': [ticker] * n, 'Close': [close] * n, 'Volume': [100] * n})
+
+
+def age(path, seconds: float = 3600):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_append_partitions_by_year_and_newer_fragments_win(tmp_path):
+    store = DatasetStore(tmp_path)
+    store.append(bars(["2023-12-29", "2024-01-02"], 10.0), "equity", "AAA.NS")
+    store.append(bars(["2024-01-02", "2024-01-03"], 11.0), "equity", "AAA.NS")
+    assert [p.name for p in store._year_dirs("equity", "AAA.NS")] == ["year=2023", "year=2024"]
+    assert store.read("equity", "AAA.NS")['Close'].tolist() == [10.0, 11.0, 11.0]
+    assert store.read_latest("equity", "AAA.NS", columns=['Close'])['Close'].tolist() == [11.0, 11.0]
+    assert store.last_date("equity", "AAA.NS") == pd.Timestamp("2024-01-03")
+
+
+def test_replace_swaps_all_partitions(tmp_path):
+    store = DatasetStore(tmp_path)
+    store.append(bars(["2023-12-29", "2024-01-02"], 10.0), "equity", "AAA.NS")
+    store.replace(bars(["2024-01-02", "2024-01-03"], 5.0), "equity", "AAA.NS")
+    assert [p.name for p in store._year_dirs("equity", "AAA.NS")] == ["year=2024"]
+    assert store.read("equity", "AAA.NS")['Close'].tolist() == [5.0, 5.0]
+    # Nothing staged or trashed is left behind
+    assert [p.name for p in (tmp_path / "dataset=equity").iterdir()] == ["ticker=AAA.NS"]
+
+
+def test_recover_restores_an_interrupted_replace(tmp_path):
+    store = DatasetStore(tmp_path)
+    store.append(bars(["2024-01-02"], 10.0), "equity", "AAA.NS")
+    store.append(bars(["2024-01-02"], 20.0), "equity", "BBB.NS")
+    dataset_dir = tmp_path / "dataset=equity"
+    # Crash between the two renames: the old data sits in .trash-, the new in .staging-
+    trash = dataset_dir / ".trash-ticker=AAA.NS-0123abcd"
+    staging = dataset_dir / ".staging-ticker=AAA.NS-4567cdef"
+    os.replace(store.ticker_dir("equity", "AAA.NS"), trash)
+    staging.mkdir()
+    # A replace that got as far as the second rename only leaves the old data in .trash-
+    stale_trash = dataset_dir / ".trash-ticker=BBB.NS-89abcdef"
+    stale_trash.mkdir()
+    for path in (trash, staging, stale_trash):
+        age(path)
+
+    assert DatasetStore(tmp_path).recover() == 0 # Already recovered when the store was opened
+    assert store.read("equity", "AAA.NS")['Close'].tolist() == [10.0]
+    assert store.read("equity", "BBB.NS")['Close'].tolist() == [20.0]
+    assert sorted(p.name for p in dataset_dir.iterdir()) == ["ticker=AAA.NS", "ticker=BBB.NS"]
+
+
+def test_recover_leaves_a_replace_in_progress_alone(tmp_path):
+    store = DatasetStore(tmp_path)
+    store.append(bars(["2024-01-02"], 10.0), "equity", "AAA.NS")
+    trash = tmp_path / "dataset=equity" / ".trash-ticker=AAA.NS-0123abcd"
+    os.replace(store.ticker_dir("equity", "AAA.NS"), trash)
+    assert store.recover() == 0 and trash.exists()
+    age(trash)
+    assert store.recover() == 1
+    assert store.read("equity", "AAA.NS")['Close'].tolist() == [10.0]
+
+
+def test_compact_merges_fragments_and_later_appends_still_win(tmp_path):
+    store = DatasetStore(tmp_path, compact_min_fragments=3)
+    for close in (1.0, 2.0):
+        store.append(bars(["2024-01-02"], close), "equity", "AAA.NS")
+    assert store.compact("equity") == 0 # Below the threshold
+
+    store.append(bars(["2024-01-03"], 3.0), "equity", "AAA.NS")
+    assert store.compact("equity") == 1
+    partition = store.partition_dir("equity", "AAA.NS", 2024)
+    assert len(store._fragments(partition)) == 1
+    assert store.read("equity", "AAA.NS")['Close'].tolist() == [2.0, 3.0]
+
+    store.append(bars(["2024-01-03"], 4.0), "equity", "AAA.NS")
+    assert store.read("equity", "AAA.NS")['Close'].tolist() == [2.0, 4.0]
+
+
+def test_unpartitioned_datasets_keep_one_directory_per_ticker(tmp_path):
+    store = DatasetStore(tmp_path, compact_min_fragments=2, unpartitioned=["macro"])
+    monthly = pd.date_range("2000-01-01", "2024-12-01", freq="MS")
+    series = pd.DataFrame({'Date': monthly, 'SeriesID': "S1", 'Value': range(len(monthly))})
+    store.append(series, "macro", "S1")
+    store.append(series.tail(1).assign(Value=-1), "macro", "S1")
+
+    ticker_dir = store.ticker_dir("macro", "S1")
+    assert sorted(p.is_file() for p in ticker_dir.iterdir()) == [True, True]
+    assert store.last_date("macro", "S1") == pd.Timestamp("2024-12-01")
+    assert store.read("macro", "S1", years=[2024])['Value'].tolist()[-2:] == [298, -1]
+    recent = load_dataset(tmp_path, "macro", columns=['Value'], id_column='SeriesID', start="2024-11-01")
+    assert recent['Value'].tolist() == [298, -1]
+
+    assert store.compact("macro") == 1
+    assert len(store._fragments(ticker_dir)) == 1
+    assert len(store.read("macro", "S1")) == len(monthly)
+
+
+@pytest.mark.parametrize("incremental", [True, False], ids=["append", "replace"])
+def test_macro_reruns_do_not_write_unchanged_series(make_config, incremental):
+    config = make_config([], ["SYNM1"], {
+        "storage": {"default_format": "dataset"},
+        "incremental": {"enabled": incremental},
+        "panel": {"enabled": False},
+        "snapshot": {"enabled": False},
+    })
+    curator = DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    assert curator.run_daily_indian_macro_job()["saved"] == 1
+    second = curator.run_daily_indian_macro_job()
+    assert (second["saved"], second["unchanged"]) == (0, 1)
+    curator.wait_for_background_work()
+
+    ticker_dir = curator.dataset_store.ticker_dir("indian_macro", "SYNM1")
+    assert len(curator.dataset_store._fragments(ticker_dir)) == 1
+    assert not list(ticker_dir.glob("year=*"))
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from app.scheduler import DataCuratorJob
+from benchmarks.synthetic import SyntheticFredBackend, SyntheticStockBackend
+
+TICKERS = ["SYN000.NS", "SYN001.NS", "SYN002.NS"]
+
+
+@pytest.fixture
+def curator(make_config):
+    config = make_config(TICKERS, overrides={"panel": {"enabled": False}, "storage": {"default_format": "parquet"}})
+    curator = DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    curator.run_daily_indian_equity_job()
+    return curator
+
+
+def output_dir(curator) -> tuple:
+    bars_dir = curator.config.get_data_path() / "indian" / "equity" / "daily"
+    return bars_dir, bars_dir.parent / "features"
+
+
+def test_feature_writes_stop_when_the_lease_is_lost(curator):
+    bars_dir, features_dir = output_dir(curator)
+    for path in features_dir.glob("*.parquet"):
+        path.unlink()
+    calls = []
+
+    def fence():
+        calls.append(1)
+        return len(calls) <= 1 # Lost after the first write
+
+    curator.features.update({ticker: None for ticker in TICKERS}, bars_dir, fence=fence)
+    assert len(list(features_dir.glob("*.parquet"))) == 1
+    skipped = curator.metrics.summary(dataset="indian_equity_daily")["counters"]["skipped_total"]
+    assert skipped["reason=lease_lost"] == 2
+
+
+def test_incremental_bars_are_read_per_from_date(curator, monkeypatch):
+    bars_dir, _ = output_dir(curator)
+    last = curator._load_long(TICKERS, bars_dir, ['Close'])['Date'].max()
+    recent, old = last - pd.offsets.BDay(2), last - pd.offsets.BDay(200)
+    reads = []
+    load_long = curator._load_long
+
+    def spy(tickers, directory, columns, start=None, **kwargs):
+        if directory == bars_dir:
+            reads.append((sorted(tickers), start))
+        return load_long(tickers, directory, columns, start=start, **kwargs)
+
+    monkeypatch.setattr(curator, "_load_long", spy)
+    curator.features.update({"SYN000.NS": recent, "SYN001.NS": recent, "SYN002.NS": old}, bars_dir)
+
+    starts = dict((tuple(tickers), start) for tickers, start in reads)
+    assert set(starts) == {("SYN000.NS", "SYN001.NS"), ("SYN002.NS",)}
+    assert starts[("SYN000.NS", "SYN001.NS")] > old # Not widened by the lagging ticker
+    assert starts[("SYN002.NS",)] < old
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.utils import file_lock
+from app.utils.file_lock import _lock_owner, exclusive_lock
+
+
+def test_lock_file_is_removed_on_release(tmp_path):
+    lock_path = tmp_path / ".test.lock"
+    with exclusive_lock(lock_path):
+        assert lock_path.exists()
+        assert _lock_owner(lock_path)
+    assert not lock_path.exists()
+
+
+def test_held_lock_times_out(tmp_path):
+    lock_path = tmp_path / ".test.lock"
+    with exclusive_lock(lock_path):
+        with pytest.raises(TimeoutError):
+            with exclusive_lock(lock_path, timeout=0.2):
+                pass
+    assert not lock_path.exists()
+
+
+def test_stale_lock_is_taken_over(tmp_path):
+    lock_path = tmp_path / ".test.lock"
+    lock_path.write_text("12345 crashed-holder")
+    old = time.time() - 3600
+    os.utime(lock_path, (old, old))
+    with exclusive_lock(lock_path, timeout=1, stale_after=600):
+        assert _lock_owner(lock_path) != "crashed-holder"
+    assert not lock_path.exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fresh_lock_replacing_a_stale_one_is_not_taken_over(tmp_path, monkeypatch):
+    lock_path = tmp_path / ".test.lock"
+    lock_path.write_text("12345 crashed-holder")
+    old = time.time() - 3600
+    os.utime(lock_path, (old, old))
+    rename = os.rename
+
+    def replaced_then_rename(src, dst):
+        # Another contender removed the stale lock and took the lock after our staleness check
+        lock_path.unlink()
+        lock_path.write_text("23456 fresh-holder")
+        monkeypatch.setattr(file_lock.os, "rename", rename)
+        rename(src, dst)
+
+    monkeypatch.setattr(file_lock.os, "rename", replaced_then_rename)
+    with pytest.raises(TimeoutError):
+        with exclusive_lock(lock_path, timeout=0.2):
+            pass
+    assert _lock_owner(lock_path) == "fresh-holder"
+    assert [path.name for path in tmp_path.iterdir()] == [".test.lock"]
+
+
+def test_held_lock_is_kept_fresh(tmp_path):
+    lock_path = tmp_path / ".test.lock"
+    with exclusive_lock(lock_path, stale_after=0.4):
+        time.sleep(0.8) # Twice 'stale_after'
+        assert time.time() - lock_path.stat().st_mtime < 0.4
+        with pytest.raises(TimeoutError):
+            with exclusive_lock(lock_path, timeout=0.6, stale_after=0.4):
+                pass
+
+
+def test_release_leaves_a_new_owners_lock(tmp_path):
+    lock_path = tmp_path / ".test.lock"
+    with exclusive_lock(lock_path):
+        lock_path.write_text("12345 new-owner") # Taken over while held
+    assert _lock_owner(lock_path) == "new-owner"
+
+
+def test_contenders_for_a_stale_lock_hold_it_one_at_a_time(tmp_path):
+    lock_path = tmp_path / ".test.lock"
+    lock_path.write_text("12345 crashed-holder")
+    old = time.time() - 3600
+    os.utime(lock_path, (old, old))
+    holders = []
+    overlaps = []
+    start = threading.Barrier(8)
+
+    def contend():
+        start.wait()
+        with exclusive_lock(lock_path, timeout=10):
+            holders.append(threading.get_ident())
+            if len(holders) > 1:
+                overlaps.append(len(holders))
+            time.sleep(0.01)
+            holders.remove(threading.get_ident())
+
+    threads = [threading.Thread(target=contend) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == []
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from app.processing.incremental import changed_rows, detect_restatement, merge_incremental
+
+
+def rows(dates: list, close, dividends=0.0, splits=0.0, ticker: str = "AAA.NS") -> pd.DataFrame:
+    n = len(dates)
+    closes = close if isinstance(close, list) else [close] * n
+    return pd.DataFrame({
+        'Date': pd.to_datetime(dates), 'Ticker': [ticker] * n,
+        'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': [100] * n,
+        'Dividends': dividends if isinstance(dividends, list) else [dividends] * n,
+        'Stock Splits': splits if isinstance(splits, list) else [splits] * n,
+    })
+
+
+STORED = rows(["2024-01-01", "2024-01-02", "2024-01-03"], 100.0)
+
+
+@pytest.mark.parametrize("column", ['Dividends', 'Stock Splits'])
+def test_corporate_action_after_last_stored_date(column):
+    new = rows(["2024-01-03", "2024-01-04"], 100.0)
+    assert not detect_restatement(STORED, new, "AAA.NS")
+    new.loc[1, column] = 2.0
+    assert detect_restatement(STORED, new, "AAA.NS")
+
+
+def test_corporate_action_on_a_stored_date_is_ignored():
+    # Already reflected in the stored (adjusted) prices
+    new = rows(["2024-01-03", "2024-01-04"], 100.0, dividends=[1.5, 0.0])
+    assert not detect_restatement(STORED, new, "AAA.NS")
+    # Missing action values are not actions
+    assert not detect_restatement(STORED, rows(["2024-01-04"], 100.0, dividends=float("nan")), "AAA.NS")
+
+
+@pytest.mark.parametrize("close, expected", [(100.005, False), (100.02, True), (99.98, True)])
+def test_overlap_price_change_against_tolerance(close, expected):
+    new = rows(["2024-01-03", "2024-01-04"], [close, 101.0])
+    assert detect_restatement(STORED, new, "AAA.NS", tolerance=1e-4) is expected
+
+
+def test_no_overlap_or_empty_sides():
+    assert not detect_restatement(STORED, rows(["2024-01-05"], 50.0), "AAA.NS")
+    assert not detect_restatement(pd.DataFrame(), rows(["2024-01-05"], 50.0), "AAA.NS")
+    assert not detect_restatement(STORED, None, "AAA.NS")
+
+
+def test_duplicate_stored_dates_compare_the_last_row():
+    # A flat file appended to twice: the later 2024-01-03 row is the one the loaders keep
+    stored = pd.concat([STORED, rows(["2024-01-03"], 90.0)], ignore_index=True)
+    assert not detect_restatement(stored, rows(["2024-01-03", "2024-01-04"], 90.0), "AAA.NS")
+    assert detect_restatement(stored, rows(["2024-01-03", "2024-01-04"], 100.0), "AAA.NS")
+
+
+def test_duplicate_new_dates_compare_the_last_row():
+    new = rows(["2024-01-03", "2024-01-03"], [50.0, 100.0])
+    assert not detect_restatement(STORED, new, "AAA.NS")
+
+
+def test_merge_takes_new_rows_on_the_same_key():
+    merged = merge_incremental(STORED, rows(["2024-01-03", "2024-01-04"], 105.0))
+    assert merged['Date'].dt.day.tolist() == [1, 2, 3, 4]
+    assert merged['Close'].tolist() == [100.0, 100.0, 105.0, 105.0]
+
+
+def test_merge_on_composite_key_keeps_other_identifiers():
+    stored = pd.concat([STORED, rows(["2024-01-03"], 7.0, ticker="BBB.NS")], ignore_index=True)
+    new = rows(["2024-01-03"], 8.0, ticker="BBB.NS")
+    merged = merge_incremental(stored, new, key_cols=['Date', 'Ticker'])
+    assert len(merged) == 4
+    assert merged.loc[merged['Ticker'] == "BBB.NS", 'Close'].tolist() == [8.0]
+    assert merged.loc[merged['Ticker'] == "AAA.NS", 'Close'].tolist() == [100.0] * 3
+
+
+def test_merge_collapses_duplicate_stored_dates():
+    stored = pd.concat([STORED, rows(["2024-01-02"], 90.0)], ignore_index=True)
+    merged = merge_incremental(stored, rows(["2024-01-04"], 101.0))
+    assert merged['Date'].is_unique
+    assert merged.set_index('Date').loc["2024-01-02", 'Close'] == 90.0
+
+
+def test_merge_with_an_empty_side():
+    assert merge_incremental(None, STORED) is STORED
+    assert merge_incremental(STORED, pd.DataFrame()) is STORED
+
+
+def test_changed_rows_keeps_new_and_revised_observations():
+    stored = pd.DataFrame({'Date': pd.to_datetime(["2024-01-01", "2024-02-01", "2024-02-01"]), 'Value': [1.0, 9.0, 2.0]})
+    fetched = pd.DataFrame({'Date': pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]), 'Value': [1.5, 2.0, 3.0]})
+    # 2024-01-01 was revised, 2024-02-01 matches its last stored row, 2024-03-01 is new
+    assert changed_rows(stored, fetched, ['Value'])['Value'].tolist() == [1.5, 3.0]
+    assert changed_rows(stored, fetched.iloc[[1]], ['Value']).empty
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from app.storage.intraday_store import IntradayStore
+
+
+def bars(tickers: list, day: str, close: float, volume: int = 100, float_dtype=np.float64, int_dtype=np.int64) -> pd.DataFrame:
+    times = pd.date_range(f"{day} 09:15", periods=2, freq="5min")
+    rows = [(t, ticker) for ticker in tickers for t in times]
+    n = len(rows)
+    return pd.DataFrame({
+        'Date': [t for t, _ in rows], 'Ticker': [ticker for _, ticker in rows],
+        'Open': np.full(n, close, dtype=float_dtype), 'High': np.full(n, close, dtype=float_dtype),
+        'Low': np.full(n, close, dtype=float_dtype), 'Close': np.full(n, close, dtype=float_dtype),
+        'Volume': np.full(n, volume, dtype=int_dtype),
+    })
+
+
+def test_missing_tickers_write_partial_days(tmp_path):
+    store = IntradayStore(tmp_path)
+    store.write_chunk(bars(["AAA.NS"], "2024-01-02", 10.0), "5m", "b1", tickers=["AAA.NS", "BBB.NS"])
+    assert not store.has_day("5m", "2024-01-02", "b1")
+    assert store.day_path("5m", "2024-01-02", "b1", partial=True).exists()
+
+    store.write_chunk(bars(["AAA.NS", "BBB.NS"], "2024-01-02", 11.0), "5m", "b1", tickers=["AAA.NS", "BBB.NS"])
+    assert store.has_day("5m", "2024-01-02", "b1")
+    assert not store.day_path("5m", "2024-01-02", "b1", partial=True).exists()
+
+    # A later fetch with fewer tickers leaves the complete day alone
+    store.write_chunk(bars(["AAA.NS"], "2024-01-02", 12.0), "5m", "b1", tickers=["AAA.NS", "BBB.NS"])
+    assert set(store.read("5m")['Close']) == {11.0}
+
+
+def test_complete_file_wins_over_partial(tmp_path):
+    store = IntradayStore(tmp_path)
+    store.write_chunk(bars(["AAA.NS", "BBB.NS"], "2024-01-02", 11.0), "5m", "b1", tickers=["AAA.NS", "BBB.NS"])
+    # A partial file left next to the complete one (it sorts after it by name)
+    partial_path = store.day_path("5m", "2024-01-02", "b1", partial=True)
+    bars(["AAA.NS"], "2024-01-02", 99.0).to_parquet(partial_path, index=False)
+
+    df = store.read("5m")
+    assert len(df) == 4
+    assert set(df['Close']) == {11.0}
+
+
+def test_read_promotes_mixed_file_types(tmp_path):
+    store = IntradayStore(tmp_path)
+    for day, close, volume, float_dtype, int_dtype in (("2024-01-02", 12.5, 1000, np.float32, np.int32),
+                                                       ("2024-01-03", 22123.456789, 5_000_000_000, np.float64, np.int64)):
+        # Files written before stored types were fixed keep their own types
+        path = store.day_path("5m", day, "b1")
+        path.parent.mkdir(parents=True)
+        bars(["AAA.NS"], day, close, volume, float_dtype, int_dtype).to_parquet(path, index=False)
+
+    df = store.read("5m", tickers=["AAA.NS"], columns=['Close', 'Volume'])
+    assert df['Close'].dtype == np.float64 and df['Volume'].dtype == np.int64
+    assert df['Close'].tolist() == [12.5, 12.5, 22123.456789, 22123.456789]
+    assert df['Volume'].tolist()[-1] == 5_000_000_000
+
+    assert store.read("5m", start="2024-01-03")['Date'].dt.day.unique().tolist() == [3]
+    assert store.read("5m", tickers=["ZZZ.NS"]).empty
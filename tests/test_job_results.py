@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+from app import agent
+from app.scheduler import DataCuratorJob, job_failed
+from benchmarks.synthetic import SyntheticFredBackend, SyntheticStockBackend
+
+TICKERS = ["SYN000.NS", "SYN001.NS", "SYN002.NS"]
+
+
+def empty_backend(tickers, period, interval, start=None, end=None):
+    return pd.DataFrame()
+
+
+@pytest.fixture(params=[False, True], ids=["sequential", "pipeline"])
+def config(request, make_config):
+    return make_config(TICKERS, ["SYNM1"], {
+        "pipeline": {"enabled": request.param},
+        "features": {"enabled": False},
+        "panel": {"enabled": False},
+        "yfinance": {"retries": 1, "retry_delay": 0},
+    })
+
+
+def test_sharded_job_names_match_the_scheduler():
+    assert set(agent.SHARDED_JOBS) == set(DataCuratorJob.SHARDED_JOBS)
+    assert set(agent.SHARDED_JOBS) <= set(agent.JOBS)
+
+
+def test_worker_rejects_unknown_jobs():
+    parser = agent.build_parser()
+    assert parser.parse_args(["worker", "--jobs", "indian_equity"]).jobs == ["indian_equity"]
+    with pytest.raises(SystemExit):
+        parser.parse_args(["worker", "--jobs", "indian_panel"])
+
+
+@pytest.mark.parametrize("result, failed", [
+    (None, False),
+    ({}, False),
+    ({"saved": 3, "unchanged": 0, "no_data": 0, "errors": 0}, False),
+    ({"saved": 2, "unchanged": 0, "no_data": 1, "errors": 0}, False),
+    ({"saved": 0, "unchanged": 3, "no_data": 0, "errors": 0}, False),
+    ({"saved": 0, "unchanged": 0, "no_data": 3, "errors": 0}, True),
+    ({"saved": 2, "unchanged": 0, "no_data": 0, "errors": 1}, True),
+    ({"errors": 1}, True),
+])
+def test_job_failed(result, failed):
+    assert job_failed(result) is failed
+
+
+def test_equity_job_reports_saved_then_unchanged(config):
+    curator = DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    first = curator.run_daily_indian_equity_job()
+    assert (first["saved"], first["errors"]) == (3, 0)
+    second = curator.run_daily_indian_equity_job()
+    # The refetched bars were held as float32 in one batch: the stored values must not change
+    assert (second["saved"], second["unchanged"]) == (0, 3)
+    assert not job_failed(first) and not job_failed(second)
+
+
+def test_equity_job_fails_when_every_fetch_is_empty(config):
+    curator = DataCuratorJob(config, stock_backend=empty_backend, fred_backend=SyntheticFredBackend())
+    result = curator.run_daily_indian_equity_job()
+    assert (result["saved"], result["no_data"]) == (0, 3)
+    assert job_failed(result)
+
+
+def test_failed_saves_are_errors(config, monkeypatch):
+    monkeypatch.setattr("app.scheduler.save_data", lambda *args, **kwargs: None)
+    curator = DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    result = curator.run_daily_indian_equity_job()
+    assert (result["saved"], result["errors"]) == (0, 3)
+    assert job_failed(result)
+
+
+def test_macro_job_fails_without_an_api_key(config):
+    curator = DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    curator.fred_api_key = None
+    assert job_failed(curator.run_daily_indian_macro_job())
+
+
+def test_raising_saves_are_errors_in_the_pipeline(config, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(DataCuratorJob, "_save_equity", fail)
+    curator = DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+    if not curator.pipeline_enabled:
+        with pytest.raises(OSError):
+            curator.run_daily_indian_equity_job()
+        return
+    result = curator.run_daily_indian_equity_job()
+    assert (result["saved"], result["errors"]) == (0, 3)
+    assert job_failed(result)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.storage.dataset_store import DatasetStore
+from app.storage.loader import load_dataset, load_files
+
+
+def bars(ticker: str, dates: list, close, volume, float_dtype, int_dtype) -> pd.DataFrame:
+    n = len(dates)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(dates), 'Ticker': [ticker] * n,
+        'Close': np.full(n, close, dtype=float_dtype), 'Volume': np.full(n, volume, dtype=int_dtype),
+    })
+
+
+# The first file is narrow, a later one needs the wide types
+NARROW = ("AAA.NS", ["2024-01-02", "2024-01-03"], 12.5, 1000, np.float32, np.int32)
+WIDE = ("BBB.NS", ["2024-01-02", "2024-01-03"], 22123.456789, 5_000_000_000, np.float64, np.int64)
+
+
+def check_promoted(df: pd.DataFrame):
+    assert df['Close'].dtype == np.float64 and df['Volume'].dtype == np.int64
+    wide = df[df['Ticker'] == "BBB.NS"]
+    assert wide['Close'].tolist() == [22123.456789, 22123.456789]
+    assert wide['Volume'].tolist() == [5_000_000_000, 5_000_000_000]
+    assert df[df['Ticker'] == "AAA.NS"]['Close'].tolist() == [12.5, 12.5]
+
+
+def test_load_files_promotes_mixed_file_types(tmp_path):
+    for spec in (NARROW, WIDE):
+        bars(*spec).to_parquet(tmp_path / f"{spec[0]}.parquet", index=False)
+    df = load_files(tmp_path, ["AAA.NS", "BBB.NS"], columns=['Close', 'Volume'])
+    check_promoted(df)
+    assert len(load_files(tmp_path, ["AAA.NS", "BBB.NS"], start="2024-01-03", columns=['Close'])) == 2
+
+
+def test_load_dataset_promotes_mixed_fragment_types(tmp_path):
+    store = DatasetStore(tmp_path)
+    for spec in (NARROW, WIDE):
+        # Fragments written before stored types were fixed keep their own types
+        table = bars(*spec)
+        path = store.partition_dir("equity", spec[0], 2024)
+        path.mkdir(parents=True)
+        table.to_parquet(path / "part-00000000000000000001-legacy00.parquet", index=False)
+    df = load_dataset(tmp_path, "equity", columns=['Close', 'Volume'])
+    check_promoted(df)
+
+
+def test_later_fragment_wins_across_types(tmp_path):
+    store = DatasetStore(tmp_path)
+    path = store.partition_dir("equity", "AAA.NS", 2024)
+    path.mkdir(parents=True)
+    bars("AAA.NS", ["2024-01-02"], 10.0, 1, np.float32, np.int32).to_parquet(path / "part-00000000000000000001-a.parquet", index=False)
+    bars("AAA.NS", ["2024-01-02"], 10.123456789, 2, np.float64, np.int64).to_parquet(path / "part-00000000000000000002-b.parquet", index=False)
+    df = load_dataset(tmp_path, "equity", columns=['Close', 'Volume'])
+    assert df[['Close', 'Volume']].values.tolist() == [[10.123456789, 2]]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_empty_wide_result_keeps_the_wide_shape(tmp_path, file_format):
+    df = load_files(tmp_path, ["MISSING.NS"], columns=['Close'], file_format=file_format, wide=True)
+    assert df.empty and df.index.name == 'Date'
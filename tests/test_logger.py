@@ -0,0 +1,37 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from app.utils.logger import _ExcKeepingQueueHandler, setup_logging, stop_logging
+
+
+@pytest.fixture
+def queued_logger(tmp_path):
+    log_file = tmp_path / "agent.log"
+    logger = setup_logging(str(log_file), use_queue=True, json_format=True)
+    yield logger, log_file
+    stop_logging()
+    logger.handlers.clear()
+
+
+def test_prepare_leaves_formatting_to_the_listener():
+    record = logging.LogRecord("LocalQuantAgent", logging.INFO, __file__, 1, "Fetched %d rows for %s", (3, "AAA.NS"), None)
+    prepared = _ExcKeepingQueueHandler(queue.SimpleQueue()).prepare(record)
+    assert (prepared.msg, prepared.args) == ("Fetched %d rows for %s", (3, "AAA.NS"))
+    assert prepared is not record
+
+
+def test_queued_records_are_written_as_json(queued_logger):
+    logger, log_file = queued_logger
+    logger.info("Fetched %d rows for %s", 3, "AAA.NS")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed for %s", "AAA.NS")
+    stop_logging()
+
+    info, error = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert info["msg"] == "Fetched 3 rows for AAA.NS" and "exc" not in info
+    assert error["msg"] == "Failed for AAA.NS" and "ValueError: boom" in error["exc"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.storage.file_handler import read_saved_data, save_data
+from app.storage.manifest import DatasetManifest, frame_digest
+
+
+def bars(volume_dtype=np.int64, date_unit="ns", ticker_dtype=object) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Date': pd.to_datetime(["2024-01-02", "2024-01-03"]).astype(f"datetime64[{date_unit}]"),
+        'Ticker': pd.Series(["AAA.NS", "AAA.NS"], dtype=ticker_dtype),
+        'Close': [101.25, 102.5],
+        'Volume': np.array([1000, 2000], dtype=volume_dtype),
+    })
+
+
+def test_digest_ignores_in_memory_types():
+    reference = frame_digest(bars())
+    assert frame_digest(bars(volume_dtype=np.int32)) == reference
+    assert frame_digest(bars(date_unit="us")) == reference
+    assert frame_digest(bars(ticker_dtype="category")) == reference
+
+
+def test_digest_sees_names_and_values():
+    reference = frame_digest(bars())
+    assert frame_digest(bars().rename(columns={'Close': 'Adj Close'})) != reference
+    changed = bars()
+    changed.loc[1, 'Close'] = 102.51
+    assert frame_digest(changed) != reference
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_unchanged_after_a_round_trip(tmp_path, file_format):
+    path = tmp_path / f"AAA.NS.{file_format}"
+    manifest = DatasetManifest(tmp_path)
+    assert save_data(bars(volume_dtype=np.int32), str(path), "AAA.NS", file_format=file_format, manifest=manifest)
+    manifest.flush()
+
+    stored = read_saved_data(str(path), file_format)
+    manifest = DatasetManifest(tmp_path)
+    assert manifest.unchanged(path, frame_digest(stored))
+    assert save_data(stored, str(path), "AAA.NS", file_format=file_format, manifest=manifest) is False
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.processing import panel as panel_module
+from app.processing.panel import asof_align, build_macro_panel
+
+CALENDAR = pd.bdate_range("2024-01-25", "2024-02-09")
+
+
+def monthly(values: list, start: str = "2023-12-31") -> pd.DataFrame:
+    return pd.DataFrame({'Date': pd.date_range(start, periods=len(values), freq="ME"), 'Value': values})
+
+
+def test_value_is_invisible_before_its_release():
+    # Observed on 2024-01-31, released a day later
+    aligned = pd.Series(asof_align(CALENDAR, ["2024-01-31"], [5.0], lag_days=1), index=CALENDAR)
+    assert aligned[:"2024-01-31"].isna().all()
+    assert (aligned["2024-02-01":] == 5.0).all()
+
+    # Without a lag it is usable on its own date; a release during a day is usable the next day
+    assert asof_align(CALENDAR, ["2024-01-31"], [5.0])[CALENDAR.get_loc("2024-01-31")] == 5.0
+    midday = pd.Series(asof_align(CALENDAR, ["2024-01-31"], [5.0], lag_days=1.5), index=CALENDAR)
+    assert np.isnan(midday["2024-02-01"]) and midday["2024-02-02"] == 5.0
+
+
+def test_asof_align_takes_the_latest_release_in_any_input_order():
+    aligned = pd.Series(asof_align(CALENDAR, ["2024-02-05", "2024-01-26"], [2.0, 1.0], lag_days=0), index=CALENDAR)
+    assert np.isnan(aligned["2024-01-25"])
+    assert aligned["2024-01-26"] == 1.0 and aligned["2024-02-02"] == 1.0
+    assert aligned["2024-02-05"] == 2.0 and aligned["2024-02-09"] == 2.0
+
+
+def test_panel_applies_each_series_lag():
+    series = {"A": monthly([1.0, 2.0]), "B": monthly([10.0, 20.0])}
+    panel, _, rebuilt = build_macro_panel(CALENDAR, series, release_lags={"B": 7}, default_lag_days=1)
+    panel = panel.set_index('Date')
+    assert rebuilt
+    assert panel.loc["2024-01-31", "A"] == 1.0 and panel.loc["2024-02-01", "A"] == 2.0
+    assert panel.loc["2024-02-06", "B"] == 10.0 and panel.loc["2024-02-07", "B"] == 20.0
+
+
+@pytest.fixture
+def aligned_calls(monkeypatch):
+    calls = []
+
+    def counting(calendar, dates, values, lag_days=0):
+        calls.append(len(calendar))
+        return asof_align(calendar, dates, values, lag_days)
+
+    monkeypatch.setattr(panel_module, "asof_align", counting)
+    return calls
+
+
+def test_unchanged_inputs_reuse_the_stored_panel(aligned_calls):
+    series = {"A": monthly([1.0, 2.0]), "B": monthly([10.0, 20.0])}
+    panel, inputs, _ = build_macro_panel(CALENDAR, series)
+    aligned_calls.clear()
+
+    same, same_inputs, rebuilt = build_macro_panel(CALENDAR, {sid: df.copy() for sid, df in series.items()},
+                                                   stored_panel=panel, stored_inputs=inputs)
+    assert not rebuilt and same is panel and same_inputs == inputs
+    assert aligned_calls == []
+
+
+def test_only_changed_series_are_recomputed(aligned_calls):
+    series = {"A": monthly([1.0, 2.0]), "B": monthly([10.0, 20.0])}
+    panel, inputs, _ = build_macro_panel(CALENDAR, series)
+    # Mark the stored columns: a reused column keeps the marker
+    panel['A'] = -1.0
+    aligned_calls.clear()
+
+    revised = {"A": series["A"], "B": monthly([10.0, 25.0])}
+    new_panel, new_inputs, rebuilt = build_macro_panel(CALENDAR, revised, stored_panel=panel, stored_inputs=inputs)
+    assert rebuilt and aligned_calls == [0, len(CALENDAR)] # A: no new days; B: in full
+    assert (new_panel['A'] == -1.0).all()
+    assert new_panel.set_index('Date').loc["2024-02-09", "B"] == 25.0
+    assert new_inputs["series"]["A"] == inputs["series"]["A"]
+
+    # A changed lag is a changed input too
+    aligned_calls.clear()
+    build_macro_panel(CALENDAR, revised, release_lags={"A": 3}, stored_panel=new_panel, stored_inputs=new_inputs)
+    assert aligned_calls == [len(CALENDAR), 0]
+
+
+def test_new_calendar_days_extend_unchanged_columns(aligned_calls):
+    series = {"A": monthly([1.0, 2.0])}
+    panel, inputs, _ = build_macro_panel(CALENDAR[:-3], series)
+    panel['A'] = -1.0
+    aligned_calls.clear()
+
+    extended, _, rebuilt = build_macro_panel(CALENDAR, series, stored_panel=panel, stored_inputs=inputs)
+    assert rebuilt and aligned_calls == [3]
+    assert extended['A'].tolist() == [-1.0] * (len(CALENDAR) - 3) + [2.0] * 3
+
+    # A calendar that changed inside the stored range is recomputed in full
+    aligned_calls.clear()
+    build_macro_panel(CALENDAR.delete(2), series, stored_panel=panel, stored_inputs=inputs)
+    assert aligned_calls == [len(CALENDAR) - 1]
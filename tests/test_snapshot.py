@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from app.scheduler import EQUITY_SNAPSHOT_COLUMNS, DataCuratorJob
+from app.storage.snapshot import current_version, open_snapshot
+from benchmarks.synthetic import SyntheticFredBackend, SyntheticStockBackend
+
+TICKERS = ["SYN000.NS", "SYN001.NS", "SYN002.NS"]
+
+
+@pytest.fixture
+def curator(make_config):
+    config = make_config(TICKERS, ["SYNM1"], {
+        "storage": {"default_format": "parquet"},
+        "snapshot": {"enabled": True},
+        "features": {"enabled": False},
+        "panel": {"enabled": False},
+    })
+    return DataCuratorJob(config, stock_backend=SyntheticStockBackend(), fred_backend=SyntheticFredBackend())
+
+
+def loaded_keys(curator, monkeypatch) -> list:
+    """ Records the keys of every _load_long() call. """
+    calls = []
+    load_long = curator._load_long
+
+    def recording(keys, *args, **kwargs):
+        calls.append(sorted(keys))
+        return load_long(keys, *args, **kwargs)
+
+    monkeypatch.setattr(curator, "_load_long", recording)
+    return calls
+
+
+def test_runs_without_saves_do_not_publish(curator):
+    curator.run_daily_indian_equity_job()
+    curator.run_daily_indian_macro_job()
+    version = current_version(curator.snapshot.root)
+    assert open_snapshot(curator.snapshot.root, "indian_equity_daily").num_rows == 3 * 252
+
+    assert curator.run_daily_indian_equity_job()["saved"] == 0
+    assert curator.run_daily_indian_macro_job()["saved"] == 0
+    assert current_version(curator.snapshot.root) == version
+
+
+def test_subset_run_reads_only_saved_tickers(curator, monkeypatch):
+    curator.run_daily_indian_equity_job()
+    output_dir = curator.config.get_data_path() / "indian" / "equity" / "daily"
+    full = open_snapshot(curator.snapshot.root, "indian_equity_daily").to_pandas()
+
+    # The ticker's file is lost, so a subset run fetches and saves it in full again
+    curator._equity_file_path("SYN001.NS", output_dir).unlink()
+    calls = loaded_keys(curator, monkeypatch)
+    assert curator.run_daily_indian_equity_job(tickers=["SYN001.NS"])["saved"] == 1
+    assert calls == [["SYN001.NS"]]
+
+    republished = open_snapshot(curator.snapshot.root, "indian_equity_daily").to_pandas()
+    pd.testing.assert_frame_equal(republished, full)
+    stored = curator._load_long(TICKERS, output_dir, EQUITY_SNAPSHOT_COLUMNS)
+    assert republished['Ticker'].astype(str).tolist() == stored['Ticker'].astype(str).tolist()
+
+
+def test_keys_missing_from_the_snapshot_are_read(curator, monkeypatch):
+    curator.run_daily_indian_equity_job(tickers=["SYN000.NS"])
+    curator.snapshot.enabled = False
+    curator.run_daily_indian_equity_job(tickers=["SYN001.NS"]) # Stored, but not in the snapshot
+    curator.snapshot.enabled = True
+
+    calls = loaded_keys(curator, monkeypatch)
+    curator.run_daily_indian_equity_job(tickers=["SYN002.NS"])
+    # SYN002 was saved and SYN001 was never published; SYN000 is carried over
+    assert calls == [["SYN001.NS", "SYN002.NS"]]
+    assert sorted(open_snapshot(curator.snapshot.root, "indian_equity_daily").to_pandas()['Ticker'].unique()) == TICKERS
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from app.processing.cleaner import clean_stock_universe, restore_floats
+from app.storage.dataset_store import DatasetStore
+from app.storage.file_handler import save_data
+from app.storage.intraday_store import IntradayStore
+from app.storage.schema import storage_frame
+
+
+def universe(close: float, volume: int, dates=("2024-01-02", "2024-01-03")) -> pd.DataFrame:
+    n = len(dates)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(list(dates)), 'Ticker': ['AAA.NS'] * n,
+        'Open': [close] * n, 'High': [close] * n, 'Low': [close] * n, 'Close': [close] * n,
+        'Volume': [volume] * n, 'Dividends': [0.0] * n, 'Stock Splits': [0.0] * n,
+    })
+
+
+def test_storage_frame_widens_numeric_columns():
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2024-01-02']).astype('datetime64[s]'),
+        'Ticker': pd.Categorical(['AAA.NS']),
+        'Close': np.float32([1.5]), 'Volume': np.int32([7]), 'Flag': [True],
+    })
+    stored = storage_frame(df)
+    assert stored.dtypes.to_dict() == {
+        'Date': np.dtype('datetime64[ns]'), 'Ticker': df['Ticker'].dtype,
+        'Close': np.dtype('float64'), 'Volume': np.dtype('int64'), 'Flag': np.dtype('bool'),
+    }
+    assert storage_frame(stored) is stored
+
+
+def test_stored_types_do_not_depend_on_the_batch(tmp_path):
+    # The first batch downcasts to float32/int32, the second keeps float64/int64
+    small = clean_stock_universe(universe(12.5, 1000))
+    large = clean_stock_universe(universe(22123.456789, 5_000_000_000))
+    assert small['Close'].dtype == np.float32 and small['Volume'].dtype != np.int64
+    assert large['Close'].dtype == np.float64
+
+    paths = []
+    for i, batch in enumerate([small, large]):
+        frame = batch.assign(Ticker=batch['Ticker'].astype(str))
+        path = tmp_path / f"flat{i}.parquet"
+        save_data(frame, str(path), "AAA.NS", file_format="parquet")
+        paths.append(path)
+
+    store = DatasetStore(tmp_path / "datasets")
+    for batch in (small, large):
+        store.append(batch, "equity", "AAA.NS")
+    paths.extend(sorted((tmp_path / "datasets").rglob("*.parquet")))
+
+    intraday = IntradayStore(tmp_path / "intraday")
+    for batch, day in ((small, "2024-01-02"), (large, "2024-01-03")):
+        intraday.write_chunk(batch[batch['Date'] == day], "1d", "batch")
+    paths.extend(sorted((tmp_path / "intraday").rglob("*.parquet")))
+
+    schemas = {}
+    for path in paths:
+        schema = pq.read_schema(path)
+        for name in ('Close', 'Volume', 'Date'):
+            schemas.setdefault(name, set()).add(str(schema.field(name).type))
+    assert schemas == {'Close': {'double'}, 'Volume': {'int64'}, 'Date': {'timestamp[ns]'}}
+
+
+def test_downcast_values_are_restored_exactly():
+    prices = [4578.02, 512.37, 12.5, 999.9999]
+    df = universe(0.0, 1000, dates=pd.bdate_range("2024-01-01", periods=len(prices)))
+    df[['Open', 'High', 'Low', 'Close']] = np.repeat(np.array(prices)[:, None], 4, axis=1)
+    cleaned = clean_stock_universe(df)
+    assert cleaned['Close'].dtype == np.float32
+    # One bar alone is downcast as well: the stored value must not depend on the batch
+    single = clean_stock_universe(df.iloc[:1])
+    for frame in (cleaned, single):
+        restored = restore_floats(frame)
+        assert restored['Close'].dtype == np.float64
+        assert restored['Close'].tolist() == prices[:len(frame)]
+
+
+def test_values_with_more_decimals_are_not_downcast():
+    cleaned = clean_stock_universe(universe(12.123456, 1000))
+    assert cleaned['Close'].dtype == np.float64
+    assert restore_floats(cleaned)['Close'].tolist() == [12.123456, 12.123456]
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_saved_prices_keep_full_precision(tmp_path, file_format):
+    df = universe(22123.456789, 5_000_000_000)
+    df['Close'] = df['Close'].astype(np.float64)
+    path = tmp_path / f"AAA.NS.{file_format}"
+    save_data(df, str(path), "AAA.NS", file_format=file_format)
+    stored = pd.read_parquet(path) if file_format == "parquet" else pd.read_csv(path)
+    assert stored['Close'].tolist() == [22123.456789, 22123.456789]
+    assert stored['Volume'].tolist() == [5_000_000_000, 5_000_000_000]
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.processing.validator import ROW_CHECKS, build_trading_calendar, flag_universe, validate_universe
+
+CALENDAR = build_trading_calendar("2024-01-01", "2024-01-31", holidays=["2024-01-26"])
+
+
+def universe(tickers=("AAA.NS",), dates=CALENDAR[:8]) -> pd.DataFrame:
+    """ Clean bars: rising closes, consistent OHLC, non-zero volume. """
+    frames = []
+    for ticker in tickers:
+        close = 100.0 + np.arange(len(dates))
+        frames.append(pd.DataFrame({
+            'Date': dates, 'Ticker': ticker, 'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+            'Volume': 1000, 'Stock Splits': 0.0,
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    df['Ticker'] = df['Ticker'].astype('category')
+    return df
+
+
+def flagged(df: pd.DataFrame, **kwargs) -> dict:
+    """ Check -> positions of the rows it flags (only checks that flag something). """
+    flags = flag_universe(df, CALENDAR, **kwargs)
+    return {check: np.flatnonzero(flags[check]).tolist() for check in ROW_CHECKS if flags[check].any()}
+
+
+def test_clean_bars_pass_every_check():
+    assert flagged(universe(("AAA.NS", "BBB.NS"))) == {}
+
+
+def test_ohlc_inconsistent():
+    df = universe()
+    df.loc[2, 'High'] = df.loc[2, 'Close'] - 0.5
+    df.loc[5, 'Low'] = df.loc[5, 'Open'] + 0.5
+    assert flagged(df) == {'ohlc_inconsistent': [2, 5]}
+
+
+def test_non_positive_price():
+    df = universe()
+    df.loc[3, ['Open', 'Low']] = 0.0
+    assert flagged(df) == {'non_positive_price': [3]}
+
+
+def test_zero_volume_on_trading_days_only_and_not_for_indices():
+    df = universe(("AAA.NS", "^NSEI"))
+    df['Volume'] = np.where(df['Ticker'] == "^NSEI", 0, df['Volume'])
+    df.loc[1, 'Volume'] = 0
+    assert flagged(df) == {'zero_volume': [1]}
+    assert flagged(df, zero_volume_exempt_prefixes=()) == {'zero_volume': [1] + list(range(8, 16))}
+
+
+def test_stale_close_counts_runs_per_ticker():
+    df = universe(("AAA.NS", "BBB.NS"))
+    # AAA: closes 100, 101, 101, 101, 101, 105, ...: the 3rd and 4th bars of the 101 run are flagged
+    df.loc[2:4, 'Close'] = 101.0
+    df[['Open', 'High', 'Low']] = np.column_stack([df['Close'], df['Close'] + 1, df['Close'] - 1])
+    assert flagged(df, stale_run=3) == {'stale_close': [3, 4]}
+    assert flagged(df, stale_run=5) == {}
+
+    # A run does not continue into the next ticker: BBB's first close equals AAA's last one
+    df.loc[df['Ticker'] == "BBB.NS", 'Close'] = df.loc[7, 'Close']
+    df[['Open', 'High', 'Low']] = np.column_stack([df['Close'], df['Close'] + 1, df['Close'] - 1])
+    assert flagged(df, stale_run=8) == {'stale_close': [15]}
+
+
+def test_stale_close_does_not_depend_on_row_order():
+    df = universe()
+    df.loc[2:6, 'Close'] = 101.0
+    df[['Open', 'High', 'Low']] = np.column_stack([df['Close'], df['Close'] + 1, df['Close'] - 1])
+    shuffled = df.sample(frac=1.0, random_state=7)
+    flags = flag_universe(shuffled, CALENDAR, stale_run=5)
+    assert sorted(shuffled.index[flags['stale_close'].to_numpy()]) == [5, 6]
+
+
+def test_price_jump_unless_split():
+    df = universe()
+    df.loc[4:, ['Open', 'High', 'Low', 'Close']] *= 2
+    assert flagged(df) == {'price_jump': [4]}
+    df.loc[4, 'Stock Splits'] = 0.5
+    assert flagged(df) == {}
+
+
+def test_non_trading_day():
+    df = universe()
+    df.loc[3, 'Date'] = pd.Timestamp("2024-01-26") # Holiday
+    df.loc[3, 'Volume'] = 0 # Not a zero-volume day: the exchange was closed
+    assert flagged(df) == {'non_trading_day': [3]}
+
+
+def test_report_and_quarantine():
+    df = universe(("AAA.NS", "BBB.NS"))
+    df.loc[2, 'High'] = 0.0
+    valid, report, quarantined = validate_universe(df, CALENDAR, quarantine=True)
+    assert len(valid) == len(df) - 1 and 2 not in valid.index
+    assert quarantined['QualityFlags'].tolist() == ["ohlc_inconsistent,non_positive_price"]
+    aaa = report.set_index('Ticker').loc["AAA.NS"]
+    assert (aaa['rows'], aaa['flagged_rows'], aaa['missing_days']) == (8, 1, 0)
+
+    valid, _, quarantined = validate_universe(df, CALENDAR, quarantine=False)
+    assert valid is df and quarantined.empty
+
+
+def test_missing_days_inside_a_fetch():
+    df = universe().drop(index=[3, 4])
+    _, report, _ = validate_universe(df, CALENDAR)
+    assert report['missing_days'].tolist() == [2]
+
+
+def test_context_counts_missing_days_from_the_last_stored_bar():
+    stored = universe(dates=CALENDAR[:5])
+    # The fetch starts two trading days after the last stored bar and refetches nothing
+    fetched = universe(dates=CALENDAR[7:10])
+    fetched[['Open', 'High', 'Low', 'Close']] += 7
+    _, report, _ = validate_universe(fetched, CALENDAR, context=stored)
+    row = report.iloc[0]
+    assert (row['rows'], row['missing_days'], row['flagged_rows']) == (3, 2, 0)
+    # Without the stored bars the gap before the fetch is invisible
+    assert validate_universe(fetched, CALENDAR)[1]['missing_days'].tolist() == [0]
+
+
+def test_context_finds_stale_runs_and_jumps_across_the_boundary():
+    stored = universe(dates=CALENDAR[:5])
+    stored[['Open', 'High', 'Low', 'Close']] = 100.0
+    fetched = universe(dates=CALENDAR[4:7]) # Refetches the last stored bar
+    fetched[['Open', 'High', 'Low', 'Close']] = np.repeat([[100.0], [100.0], [300.0]], 4, axis=1)
+    _, report, quarantined = validate_universe(fetched, CALENDAR, quarantine=True, stale_run=5, context=stored)
+    assert report.iloc[0][['stale_close', 'price_jump', 'missing_days']].tolist() == [2, 1, 0]
+    # Only the fetched rows are reported
+    assert quarantined['Date'].tolist() == list(CALENDAR[4:7])
+
+
+@pytest.mark.parametrize("ticker_dtype", ["category", "str"])
+def test_ticker_dtype_does_not_matter(ticker_dtype):
+    df = universe(("AAA.NS", "BBB.NS"))
+    df.loc[9, 'Close'] = -1.0
+    df['Ticker'] = df['Ticker'].astype(ticker_dtype)
+    assert flagged(df) == {'ohlc_inconsistent': [9], 'non_positive_price': [9]}
@@ -0,0 +1,109 @@
+import pandas as pd
+import pytest
+
+from app.acquisition.cache import FetchCache
+from app.acquisition.yfinance_fetcher import fetch_stock_data, fetch_stock_data_batch, split_batch_frame
+
+DATES = pd.date_range("2024-01-02", periods=3, freq="B", name="Date")
+
+
+def bars(close: float) -> pd.DataFrame:
+    return pd.DataFrame({'Open': close, 'Close': close, 'Volume': 100.0}, index=DATES)
+
+
+def combined(frames: dict, ticker_first: bool = True) -> pd.DataFrame:
+    df = pd.concat(frames, axis=1)
+    return df if ticker_first else df.swaplevel(axis=1)
+
+
+class FakeBackend:
+    """ Batch backend serving fixed frames; tickers in 'broken' make their chunk's request raise 'fail_times' times. """
+    def __init__(self, frames: dict, broken=(), fail_times: int = 1):
+        self.frames = frames
+        self.broken = set(broken)
+        self.fail_times = fail_times
+        self.calls = []
+
+    def __call__(self, tickers, period, interval, start=None, end=None):
+        self.calls.append(list(tickers))
+        if self.broken & set(tickers) and self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("boom")
+        served = {t: self.frames[t] for t in tickers if t in self.frames}
+        return combined(served) if served else pd.DataFrame()
+
+
+@pytest.mark.parametrize("ticker_first", [True, False])
+def test_split_batch_frame_accepts_both_layouts(ticker_first):
+    data = combined({"AAA.NS": bars(1.0), "BBB.NS": bars(2.0)}, ticker_first)
+    frames = split_batch_frame(data, ["AAA.NS", "BBB.NS", "ZZZ.NS"])
+    assert frames["AAA.NS"]['Close'].tolist() == [1.0] * 3
+    assert frames["BBB.NS"].columns.tolist() == ['Open', 'Close', 'Volume']
+    assert frames["BBB.NS"].columns.name is None
+    assert frames["ZZZ.NS"].empty
+
+
+def test_split_batch_frame_drops_all_nan_rows_and_tickers():
+    nan = bars(1.0) * float("nan")
+    partly = bars(3.0)
+    partly.iloc[0] = float("nan")
+    frames = split_batch_frame(combined({"AAA.NS": partly, "BBB.NS": nan}), ["AAA.NS", "BBB.NS"])
+    assert frames["AAA.NS"].index.tolist() == DATES[1:].tolist()
+    assert frames["BBB.NS"].empty
+
+
+def test_split_batch_frame_flat_columns():
+    assert split_batch_frame(bars(1.0), ["AAA.NS"])["AAA.NS"]['Close'].tolist() == [1.0] * 3
+    # Flat columns cannot be attributed to one of several tickers
+    assert all(df.empty for df in split_batch_frame(bars(1.0), ["AAA.NS", "BBB.NS"]).values())
+    assert split_batch_frame(None, ["AAA.NS"])["AAA.NS"].empty
+
+
+def test_empty_tickers_are_not_retried():
+    backend = FakeBackend({"AAA.NS": bars(1.0)})
+    results = fetch_stock_data_batch(["AAA.NS", "GONE.NS"], chunk_size=2, retries=3, delay=0, backend=backend)
+    assert backend.calls == [["AAA.NS", "GONE.NS"]]
+    assert not results["AAA.NS"].empty and results["GONE.NS"].empty
+
+
+def test_only_failed_chunks_are_retried():
+    backend = FakeBackend({"AAA.NS": bars(1.0), "BBB.NS": bars(2.0), "CCC.NS": bars(3.0)}, broken=["CCC.NS"])
+    results = fetch_stock_data_batch(["AAA.NS", "BBB.NS", "CCC.NS", "AAA.NS"], chunk_size=2, retries=3, delay=0,
+                                     backend=backend)
+    assert backend.calls == [["AAA.NS", "BBB.NS"], ["CCC.NS"], ["CCC.NS"]]
+    assert list(results) == ["AAA.NS", "BBB.NS", "CCC.NS"]
+    assert results["CCC.NS"]['Close'].tolist() == [3.0] * 3
+
+
+def test_retries_are_bounded():
+    backend = FakeBackend({"AAA.NS": bars(1.0)}, broken=["AAA.NS"], fail_times=5)
+    results = fetch_stock_data_batch(["AAA.NS"], retries=2, delay=0, backend=backend)
+    assert len(backend.calls) == 2 and results["AAA.NS"].empty
+
+
+def test_cache_serves_fetched_tickers(tmp_path):
+    cache = FetchCache(tmp_path)
+    backend = FakeBackend({"AAA.NS": bars(1.0)})
+    fetch_stock_data_batch(["AAA.NS", "GONE.NS"], retries=1, delay=0, backend=backend, cache=cache)
+    results = fetch_stock_data_batch(["AAA.NS", "GONE.NS"], retries=1, delay=0, backend=backend, cache=cache)
+    # Only the ticker without data is requested again
+    assert backend.calls == [["AAA.NS", "GONE.NS"], ["GONE.NS"]]
+    assert results["AAA.NS"]['Close'].tolist() == [1.0] * 3
+
+    # A different range is a different cache entry
+    fetch_stock_data_batch(["AAA.NS"], start="2024-01-03", retries=1, delay=0, backend=backend, cache=cache)
+    assert backend.calls[-1] == ["AAA.NS"]
+
+
+def test_offline_cache_never_requests(tmp_path):
+    backend = FakeBackend({"AAA.NS": bars(1.0)})
+    results = fetch_stock_data_batch(["AAA.NS"], backend=backend, cache=FetchCache(tmp_path, offline=True))
+    assert backend.calls == [] and results["AAA.NS"].empty
+
+
+def test_single_ticker_fetch_uses_the_batch_path(monkeypatch):
+    backend = FakeBackend({"AAA.NS": bars(1.0)})
+    monkeypatch.setattr("app.acquisition.yfinance_fetcher.yfinance_batch_backend", backend)
+    assert fetch_stock_data("AAA.NS", delay=0)['Close'].tolist() == [1.0] * 3
+    assert fetch_stock_data("GONE.NS", delay=0).empty
+    assert backend.calls == [["AAA.NS"], ["GONE.NS"]]